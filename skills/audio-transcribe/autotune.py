@@ -0,0 +1,211 @@
+"""
+Per-machine tuning of batch size, CPU threads and compute type
+(``transcribe.py autotune``).
+
+Every combination is timed on a sample of real audio and the fastest is
+saved per model, device and machine; resolve_settings fills options the
+user did not set from the saved profile.
+"""
+
+import argparse
+import json
+import os
+import platform
+import time
+from typing import Any, Dict, List, Optional
+
+from cache import CACHE_DIR
+from engine import default_compute_type, load_asr_model
+from media import SAMPLE_RATE, load_audio
+
+
+AUTOTUNE_PATH = os.path.join(CACHE_DIR, "autotune.json")
+
+
+# CTranslate2 compute types worth trying per device
+COMPUTE_TYPES = {
+    "cpu": ["int8", "int8_float32", "float32"],
+    "cuda": ["float16", "int8_float16", "int8"],
+}
+
+
+def machine_id(device: str = "cpu") -> str:
+    """Identifier for the hardware a tuning profile was measured on."""
+    try:
+        ram_gb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024**3
+    except (ValueError, OSError, AttributeError):
+        ram_gb = 0
+    cpu = platform.processor() or platform.machine()
+    return f"{platform.system()}-{cpu}-{os.cpu_count()}cpu-{round(ram_gb)}GB-{device}"
+
+
+def load_tuned_settings(model_name: str, device: str = "cpu", path: str = AUTOTUNE_PATH) -> Dict[str, Any]:
+    """Return the autotuned settings for this machine and model, or {} if none."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            profiles = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return profiles.get(f"{machine_id(device)}/{model_name}", {})
+
+
+def save_tuned_settings(
+    model_name: str, device: str, settings: Dict[str, Any], path: str = AUTOTUNE_PATH
+) -> None:
+    """Store the autotuned settings for this machine and model."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            profiles = json.load(f)
+    except (OSError, ValueError):
+        profiles = {}
+    profiles[f"{machine_id(device)}/{model_name}"] = settings
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, ensure_ascii=False, indent=2)
+
+
+def resolve_settings(
+    model_name: str,
+    device: str = "cpu",
+    batch_size: Optional[int] = None,
+    threads: Optional[int] = None,
+    compute_type: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Merge explicit overrides with the autotuned profile and built-in defaults."""
+    tuned = load_tuned_settings(model_name, device)
+    return {
+        "batch_size": batch_size or tuned.get("batch_size") or 8,
+        "threads": threads or tuned.get("threads"),
+        "compute_type": compute_type or tuned.get("compute_type") or default_compute_type(device),
+    }
+
+
+def autotune(
+    clip_path: str,
+    model_name: str = "base",
+    device: str = "cpu",
+    seconds: float = 60.0,
+    batch_sizes: Optional[List[int]] = None,
+    thread_counts: Optional[List[int]] = None,
+    compute_types: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Benchmark ASR settings on a calibration clip and return the fastest.
+
+    The model is loaded once per (compute type, threads) pair and every batch
+    size is timed on the same clip after a short warm-up. The language is
+    detected by the first warm-up and passed to every timed run. Alignment does not
+    depend on these settings and is not part of the measurement.
+
+    Args:
+        clip_path: Speech recording used for calibration.
+        model_name: Whisper model size to tune for.
+        device: Device to use ("cpu" or "cuda").
+        seconds: Length of the clip prefix to benchmark.
+        batch_sizes: Batch sizes to try.
+        thread_counts: CTranslate2 CPU thread counts to try.
+        compute_types: CTranslate2 compute types to try.
+
+    Returns:
+        Dict with the best batch_size/threads/compute_type, its real-time
+        factor and all measured results.
+    """
+    cores = os.cpu_count() or 1
+    batch_sizes = batch_sizes or [4, 8, 16, 32]
+    thread_counts = thread_counts or sorted({max(1, cores // 4), max(1, cores // 2), cores})
+    compute_types = compute_types or COMPUTE_TYPES[device]
+
+    audio = load_audio(clip_path)[: int(seconds * SAMPLE_RATE)]
+    duration = len(audio) / SAMPLE_RATE
+    if duration < 5:
+        raise ValueError("Calibration clip must be at least 5 seconds long")
+    print(f"Calibrating on {duration:.1f}s of {clip_path}")
+
+    results: List[Dict[str, Any]] = []
+    # Detected once by the first warm-up, then fixed so no timed run includes language detection
+    language: Optional[str] = None
+    for compute_type in compute_types:
+        for threads in thread_counts if device == "cpu" else [None]:
+            try:
+                model = load_asr_model(
+                    model_name, device=device, compute_type=compute_type, threads=threads
+                )
+            except ValueError as e:
+                # Compute type not supported by this CPU/GPU
+                print(f"[Skip] compute_type={compute_type}: {e}")
+                break
+            warmup = model.transcribe(audio[: 5 * SAMPLE_RATE], batch_size=batch_sizes[0], language=language)
+            language = language or warmup.get("language")
+            for batch_size in batch_sizes:
+                start = time.perf_counter()
+                model.transcribe(audio, batch_size=batch_size, language=language)
+                elapsed = time.perf_counter() - start
+                rtf = elapsed / duration
+                results.append(
+                    {
+                        "compute_type": compute_type,
+                        "threads": threads,
+                        "batch_size": batch_size,
+                        "seconds": round(elapsed, 3),
+                        "rtf": round(rtf, 4),
+                    }
+                )
+                print(
+                    f"  compute_type={compute_type:<13} threads={threads or '-':<3} "
+                    f"batch_size={batch_size:<3} rtf={rtf:.3f}"
+                )
+            del model
+
+    if not results:
+        raise RuntimeError("No configuration could be benchmarked")
+    best = min(results, key=lambda r: r["rtf"])
+    return {
+        "batch_size": best["batch_size"],
+        "threads": best["threads"],
+        "compute_type": best["compute_type"],
+        "rtf": best["rtf"],
+        "clip_seconds": round(duration, 3),
+        "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def autotune_main(argv: List[str]) -> None:
+    """CLI entry point for ``transcribe.py autotune``."""
+    parser = argparse.ArgumentParser(
+        prog="transcribe.py autotune",
+        description="Benchmark batch size, threads and compute type on this machine and save the fastest",
+    )
+    parser.add_argument("clip", help="Calibration clip (a speech recording)")
+    parser.add_argument(
+        "--model",
+        "-m",
+        default="base",
+        choices=["tiny", "base", "small", "medium", "large-v2"],
+        help="Whisper model size to tune (default: base)",
+    )
+    parser.add_argument("--device", default="cpu", choices=["cpu", "cuda"], help="Device (default: cpu)")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Clip length to benchmark (default: 60)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", help="Batch sizes to try (default: 4 8 16 32)")
+    parser.add_argument("--threads", type=int, nargs="+", help="CPU thread counts to try")
+    parser.add_argument("--compute-types", nargs="+", help="Compute types to try")
+    parser.add_argument("--dry-run", action="store_true", help="Print the result without saving it")
+    args = parser.parse_args(argv)
+
+    settings = autotune(
+        args.clip,
+        model_name=args.model,
+        device=args.device,
+        seconds=args.seconds,
+        batch_sizes=args.batch_sizes,
+        thread_counts=args.threads,
+        compute_types=args.compute_types,
+    )
+
+    print("\n" + "=" * 50)
+    print(f"Fastest for {args.model} on {machine_id(args.device)}:")
+    print(f"  batch_size={settings['batch_size']} threads={settings['threads']} "
+          f"compute_type={settings['compute_type']} (rtf {settings['rtf']:.3f})")
+    if not args.dry_run:
+        save_tuned_settings(args.model, args.device, settings)
+        print(f"Saved to: {AUTOTUNE_PATH}")
+    print("=" * 50)
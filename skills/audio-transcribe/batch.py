@@ -0,0 +1,290 @@
+"""
+Batch transcription of many files with one model load.
+
+Files are decoded ahead in background threads while the current one is
+transcribed, languages are detected from short probe windows up front, and
+outputs are written to a tree mirroring the inputs, with a JSON summary.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import TranscriptCache
+from diarize import Diarizer
+from engine import _transcribe, default_compute_type, detect_languages, load_asr_model, result_options
+from formats import TranscriptSegment, write_transcript
+from media import SAMPLE_RATE, load_audio
+from metrics import ProgressCallback, emit_stage
+from vad import speech_regions
+
+
+def mirrored_output_path(
+    audio_path: str, root: str, output_dir: Optional[str], output_format: str
+) -> str:
+    """Map an input file to its output path, mirroring its location under ``root``."""
+    stem = os.path.splitext(os.path.abspath(audio_path))[0]
+    if output_dir is None:
+        return f"{stem}.{output_format}"
+    rel = os.path.relpath(stem, root)
+    return os.path.join(output_dir, f"{rel}.{output_format}")
+
+
+def transcribe_batch(
+    audio_paths: List[str],
+    output_dir: Optional[str] = None,
+    output_format: str = "txt",
+    model_name: str = "base",
+    language: Optional[str] = None,
+    batch_size: int = 8,
+    align: bool = True,
+    device: str = "cpu",
+    vad_filter: bool = True,
+    prefetch: int = 2,
+    align_workers: int = 1,
+    cache: Optional[TranscriptCache] = None,
+    compute_type: Optional[str] = None,
+    threads: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    vad_prepass: bool = False,
+    diarizer: Optional["Diarizer"] = None,
+    audio_track: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Transcribe many files with a single model load.
+
+    Upcoming files are decoded by ffmpeg in a background thread pool while the
+    current file is being transcribed, so decoding overlaps with inference.
+    At most ``prefetch`` decoded waveforms are held in memory at once. Files
+    already in ``cache`` are neither decoded nor transcribed, and the model is
+    only loaded once the first cache miss is reached. With ``vad_prepass``
+    speech detection also runs in the background threads, and files without
+    speech never trigger a model load.
+
+    Without ``language``, every file's language is first detected from a short
+    probe window (cached per file) and files are processed grouped by
+    language, so each alignment model is loaded once and only one is held in
+    memory at a time. The summary keeps the input order.
+
+    Args:
+        audio_paths: Files to transcribe.
+        output_dir: Root of the mirrored output tree. If None, outputs are
+            written next to each input file.
+        output_format: Output format (srt/vtt/txt/json).
+        model_name: Whisper model size.
+        language: Language code. If None, auto-detect per file.
+        batch_size: Batch size for processing.
+        align: If True, perform word-level forced alignment.
+        device: Device to use ("cpu" or "cuda").
+        vad_filter: If True, use VAD to filter non-speech segments.
+        prefetch: Number of files to decode ahead of the current one.
+        align_workers: Number of CPU processes used for alignment.
+        cache: Transcript cache to read from and write to (None disables caching).
+        compute_type: CTranslate2 compute type (default: int8 on CPU, float16 on CUDA).
+        threads: CTranslate2 CPU threads.
+        progress: Callback receiving stage timing and progress events.
+        vad_prepass: Detect speech first and only transcribe speech spans.
+        diarizer: Diarization process shared by all files (pipeline loaded once).
+        audio_track: Audio track index or language tag used for every video input.
+
+    Returns:
+        Per-file summary dicts (paths, durations, timings, real-time factor).
+    """
+    if not audio_paths:
+        return []
+
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in audio_paths])
+    model = None
+    align_models: Dict[str, Tuple[Any, Any]] = {}
+
+    def file_key(path: str) -> str:
+        return cache.key(
+            path,
+            model_name,
+            language,
+            align,
+            vad_filter,
+            compute_type or default_compute_type(device),
+            **result_options(vad_prepass, diarizer, audio_track),
+        )
+
+    def decode(path: str) -> Tuple[Any, float, Optional[Tuple[List[TranscriptSegment], str]], Any]:
+        start = time.perf_counter()
+        if cache is not None:
+            cached = cache.get(file_key(path))
+            if cached is not None:
+                return None, time.perf_counter() - start, cached, None
+        audio = load_audio(path, audio_track)
+        decode_seconds = time.perf_counter() - start
+        speech = speech_regions(path, audio, device, cache, audio_track=audio_track) if vad_prepass else None
+        return audio, decode_seconds, None, speech
+
+    def write_output(output_path: str, segments: List[TranscriptSegment]) -> None:
+        write_transcript(segments, output_path, output_format)
+
+    def ensure_model() -> Any:
+        nonlocal model
+        if model is None:
+            with emit_stage(progress, "model_load", model=model_name):
+                model = load_asr_model(
+                    model_name,
+                    device=device,
+                    vad_filter=vad_filter,
+                    compute_type=compute_type,
+                    threads=threads,
+                )
+        return model
+
+    input_order = {path: i for i, path in enumerate(audio_paths)}
+    languages: Dict[str, Optional[str]] = {}
+    if language is None and len(audio_paths) > 1:
+        todo = audio_paths
+        if cache is not None:
+
+            def cached_already(path: str) -> bool:
+                try:
+                    return cache.has(file_key(path))
+                except OSError:
+                    return False  # reported when the file is decoded
+
+            # Inputs are hashed by the prefetch threads, not one after another
+            with ThreadPoolExecutor(max_workers=max(1, prefetch)) as pool:
+                hits = list(pool.map(cached_already, audio_paths))
+            todo = [path for path, hit in zip(audio_paths, hits) if not hit]
+        if todo:
+            print(f"Detecting languages of {len(todo)} files...")
+            with emit_stage(progress, "language_grouping", files=len(todo)):
+                languages = detect_languages(
+                    todo, ensure_model, model_name, cache, prefetch, progress, audio_track
+                )
+            groups: Dict[str, int] = {}
+            for path in todo:
+                groups[languages.get(path) or "?"] = groups.get(languages.get(path) or "?", 0) + 1
+            print("Languages: " + ", ".join(f"{lang} x{count}" for lang, count in sorted(groups.items())))
+            # Cached files first, then one contiguous run per language
+            audio_paths = sorted(audio_paths, key=lambda p: (p in languages, languages.get(p) or "", input_order[p]))
+
+    results: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=max(1, prefetch)) as pool:
+        pending: Dict[int, Future] = {}
+
+        def schedule(index: int) -> None:
+            if index < len(audio_paths) and index not in pending:
+                pending[index] = pool.submit(decode, audio_paths[index])
+
+        for i in range(max(1, prefetch)):
+            schedule(i)
+
+        for i, path in enumerate(audio_paths):
+            print(f"\n[{i + 1}/{len(audio_paths)}] {path}")
+            output_path = mirrored_output_path(path, root, output_dir, output_format)
+            entry: Dict[str, Any] = {"input": path, "output": output_path}
+            try:
+                audio, decode_seconds, cached, speech = pending.pop(i).result()
+                # Keep the decode pipeline full while this file is transcribed
+                schedule(i + max(1, prefetch))
+
+                if vad_prepass and cached is None and not speech:
+                    print("No speech detected - skipping transcription")
+                    cached = [], language or ""
+                    if cache is not None:
+                        # Silent files are not decoded or run through VAD again
+                        cache.put(file_key(path), *cached)
+                if cached is not None:
+                    print(f"Using cached transcript: {path}")
+                    segments, detected_language = cached
+                    write_output(output_path, segments)
+                    entry.update(
+                        {
+                            "status": "ok",
+                            "cached": True,
+                            "language": detected_language,
+                            "segments": len(segments),
+                        }
+                    )
+                    print(f"Saved: {output_path}")
+                    results.append(entry)
+                    continue
+
+                file_progress = None
+                if progress is not None:
+
+                    def file_progress(event: Dict[str, Any], path: str = path) -> None:
+                        progress({**event, "file": path})
+
+                ensure_model()
+                file_language = languages.get(path)
+                if file_language and any(lang != file_language for lang in align_models):
+                    # Files are grouped by language, so the previous model is done with
+                    align_models.clear()
+                duration = len(audio) / SAMPLE_RATE
+                start = time.perf_counter()
+                segments, detected_language = _transcribe(
+                    path,
+                    model_name=model_name,
+                    language=language,
+                    batch_size=batch_size,
+                    align=align,
+                    device=device,
+                    vad_filter=vad_filter,
+                    model=model,
+                    audio=audio,
+                    align_models=align_models,
+                    align_workers=align_workers,
+                    cache=cache,
+                    compute_type=compute_type,
+                    progress=file_progress,
+                    vad_prepass=vad_prepass,
+                    speech=speech,
+                    diarizer=diarizer,
+                    probed_language=file_language,
+                    audio_track=audio_track,
+                )
+                transcribe_seconds = time.perf_counter() - start
+                del audio
+
+                write_output(output_path, segments)
+                entry.update(
+                    {
+                        "status": "ok",
+                        "cached": False,
+                        "language": detected_language,
+                        "segments": len(segments),
+                        "audio_seconds": round(duration, 3),
+                        "decode_seconds": round(decode_seconds, 3),
+                        "transcribe_seconds": round(transcribe_seconds, 3),
+                        "rtf": round(transcribe_seconds / duration, 4) if duration else None,
+                    }
+                )
+                print(f"Saved: {output_path}")
+            except Exception as e:
+                schedule(i + max(1, prefetch))
+                entry.update({"status": "error", "error": str(e)})
+                print(f"[Error] {path}: {e}")
+            results.append(entry)
+
+    results.sort(key=lambda entry: input_order[entry["input"]])
+    return results
+
+
+def write_batch_summary(results: List[Dict[str, Any]], summary_path: str) -> None:
+    """Write the per-file batch results plus totals as JSON."""
+    ok = [r for r in results if r.get("status") == "ok"]
+    # Cache hits did no work, so they are left out of the real-time factor
+    computed = [r for r in ok if not r.get("cached")]
+    audio_seconds = sum(r["audio_seconds"] for r in computed)
+    transcribe_seconds = sum(r["transcribe_seconds"] for r in computed)
+    summary = {
+        "files": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "cached": len(ok) - len(computed),
+        "audio_seconds": round(audio_seconds, 3),
+        "transcribe_seconds": round(transcribe_seconds, 3),
+        "rtf": round(transcribe_seconds / audio_seconds, 4) if audio_seconds else None,
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(summary_path) or ".", exist_ok=True)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
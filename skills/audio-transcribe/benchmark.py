@@ -0,0 +1,266 @@
+#!/usr/bin/env -S uv run --script --python 3.12
+# /// script
+# requires-python = "==3.12.*"
+# dependencies = [
+#     "torch==2.3.1",
+#     "torchaudio==2.3.1",
+#     "whisperx==3.3.1",
+#     "pyannote.audio==3.3.2",
+#     "transformers==4.44.0",
+#     "matplotlib",
+# ]
+# ///
+
+"""
+Benchmark transcribe.py: per-stage timings, real-time factor and peak memory.
+
+Every configuration (model x audio length x align x VAD) runs in a fresh
+process so peak RSS is measured per run. Results are written as JSON so runs
+from different commits can be compared with --compare.
+
+Runs fully offline by default: models must already be in the local
+Hugging Face / torch caches (run transcribe.py once per model to fetch them).
+
+Usage:
+    uv run benchmark.py --source speech.wav [options]
+
+Examples:
+    uv run benchmark.py --source speech.wav
+    uv run benchmark.py --source speech.wav --models tiny base --lengths 30 300 -o bench.json
+    uv run benchmark.py --source speech.wav -o new.json --compare old.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS = ["tiny", "base", "small", "medium", "large-v2"]
+
+
+def prepare_audio(source: str, lengths: List[float], workdir: str) -> Dict[float, str]:
+    """Create WAV clips of the requested lengths by looping/trimming ``source``.
+
+    If ``source`` is None, speech is synthesized with ffmpeg's flite filter
+    (only available when ffmpeg is built with libflite).
+    """
+    os.makedirs(workdir, exist_ok=True)
+    clips = {}
+    for length in lengths:
+        path = os.path.join(workdir, f"bench_{int(length)}s.wav")
+        clips[length] = path
+        if os.path.exists(path):
+            continue
+        if source:
+            src = ["-stream_loop", "-1", "-i", source]
+        else:
+            text = "The quick brown fox jumps over the lazy dog. " * 8
+            src = ["-f", "lavfi", "-i", f"flite=text='{text}'", "-af", "aloop=loop=-1:size=2147483647"]
+        cmd = [
+            "ffmpeg", "-y", "-v", "error", *src,
+            "-t", str(length), "-ac", "1", "-ar", "16000", path,
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Failed to prepare benchmark audio: {result.stderr.strip()}")
+    return clips
+
+
+def run_one(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one configuration in the current (fresh) process and time every stage."""
+    if config["offline"]:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+    sys.path.insert(0, SCRIPT_DIR)
+
+    import whisperx
+    from autotune import resolve_settings
+    from engine import align_segments, load_align_model
+    from formats import FORMATTERS, TranscriptSegment, format_segments
+    from media import SAMPLE_RATE, load_audio
+    from metrics import peak_rss_mb
+
+    stages: Dict[str, Dict[str, float]] = {}
+
+    def timed(name: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        stages[name] = {
+            "seconds": round(time.perf_counter() - start, 3),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        return value
+
+    settings = resolve_settings(config["model"], config["device"])
+    audio = timed("decode", load_audio, config["audio"])
+    duration = len(audio) / SAMPLE_RATE
+
+    vad_options = None if config["vad"] else {"vad_onset": 0.1, "vad_offset": 0.1}
+    extra = {"threads": settings["threads"]} if settings["threads"] else {}
+    model = timed(
+        "model_load",
+        whisperx.load_model,
+        config["model"],
+        device=config["device"],
+        compute_type=settings["compute_type"],
+        asr_options={"suppress_numerals": False},
+        vad_options=vad_options,
+        local_files_only=config["offline"],
+        **extra,
+    )
+    result = timed("asr", model.transcribe, audio, batch_size=settings["batch_size"])
+    language = result.get("language", "en")
+    segments = [
+        TranscriptSegment(
+            start_at=float(seg["start"]), end_at=float(seg["end"]), text=seg["text"].strip(), words=[]
+        )
+        for seg in result["segments"]
+    ]
+
+    if config["align"] and segments:
+        align_model = timed("align_model_load", load_align_model, language, config["device"])
+        segments = timed(
+            "alignment",
+            align_segments,
+            segments,
+            config["audio"],
+            language,
+            config["device"],
+            audio=audio,
+            align_model=align_model,
+        )
+
+    def format_all():
+        for fmt in FORMATTERS:
+            format_segments(segments, fmt)
+
+    timed("formatting", format_all)
+
+    processing = sum(v["seconds"] for k, v in stages.items() if k not in ("model_load", "align_model_load"))
+    return {
+        **{k: config[k] for k in ("model", "align", "vad", "device")},
+        "audio_seconds": round(duration, 3),
+        "language": language,
+        "segments": len(segments),
+        "words": sum(len(seg.words) for seg in segments),
+        "settings": settings,
+        "stages": stages,
+        "total_seconds": round(sum(v["seconds"] for v in stages.values()), 3),
+        # Model loading is a fixed cost, so it is excluded from the real-time factor
+        "rtf": round(processing / duration, 4) if duration else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a configuration in a fresh spawned process so peak RSS is per run."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(run_one, config).result()
+
+
+def git_commit() -> Optional[str]:
+    """Current git commit of this checkout, if any."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR, capture_output=True, text=True
+        )
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_key(run: Dict[str, Any]) -> str:
+    return f"{run['model']}/{int(run['audio_seconds'])}s/align={run['align']}/vad={run['vad']}"
+
+
+def compare(current: Dict[str, Any], baseline_path: str) -> None:
+    """Print real-time factor and peak memory changes against a previous result file."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = {run_key(r): r for r in baseline.get("runs", []) if "error" not in r}
+
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')}):")
+    print(f"{'run':<40} {'rtf':>16} {'peak MB':>18}")
+    for run in current["runs"]:
+        if "error" in run or run_key(run) not in before:
+            continue
+        old = before[run_key(run)]
+        rtf_delta = (run["rtf"] - old["rtf"]) / old["rtf"] * 100 if old["rtf"] else 0.0
+        print(
+            f"{run_key(run):<40} {old['rtf']:.3f}->{run['rtf']:.3f} ({rtf_delta:+.0f}%)"
+            f" {old['peak_rss_mb']:.0f}->{run['peak_rss_mb']:.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcribe.py per stage")
+    parser.add_argument("--source", help="Speech recording used to build clips (default: ffmpeg flite TTS)")
+    parser.add_argument("--models", nargs="+", default=MODELS, choices=MODELS, help="Models to benchmark")
+    parser.add_argument(
+        "--lengths", nargs="+", type=float, default=[30, 120, 600], help="Clip lengths in seconds"
+    )
+    parser.add_argument("--no-align-variants", action="store_true", help="Only benchmark with alignment")
+    parser.add_argument("--no-vad-variants", action="store_true", help="Only benchmark with VAD")
+    parser.add_argument("--device", default="cpu", choices=["cpu", "cuda"], help="Device (default: cpu)")
+    parser.add_argument("--online", action="store_true", help="Allow downloading models")
+    parser.add_argument("--workdir", default=".bench_audio", help="Where generated clips are kept")
+    parser.add_argument("--output", "-o", default="transcribe_bench.json", help="Result JSON path")
+    parser.add_argument("--compare", help="Previous result JSON to compare against")
+    args = parser.parse_args()
+
+    clips = prepare_audio(args.source, args.lengths, args.workdir)
+    aligns = [True] if args.no_align_variants else [True, False]
+    vads = [True] if args.no_vad_variants else [True, False]
+
+    runs = []
+    configs = list(product(args.models, args.lengths, aligns, vads))
+    for i, (model, length, align, vad) in enumerate(configs, 1):
+        config = {
+            "model": model,
+            "audio": clips[length],
+            "align": align,
+            "vad": vad,
+            "device": args.device,
+            "offline": not args.online,
+        }
+        label = f"{model} {int(length)}s align={align} vad={vad}"
+        print(f"[{i}/{len(configs)}] {label}", flush=True)
+        try:
+            run = run_isolated(config)
+            stages = " ".join(f"{k}={v['seconds']:.2f}s" for k, v in run["stages"].items())
+            print(f"  rtf={run['rtf']:.3f} peak={run['peak_rss_mb']:.0f}MB {stages}")
+        except Exception as e:
+            run = {"model": model, "audio_seconds": length, "align": align, "vad": vad, "error": str(e)}
+            print(f"  [Error] {e}")
+        runs.append(run)
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "system": platform.system(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "runs": runs,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\nResults saved to: {args.output}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
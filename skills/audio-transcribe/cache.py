@@ -0,0 +1,188 @@
+"""
+Content-addressed on-disk cache of transcripts, speech maps and languages.
+
+Entries live under ~/.cache/vibe-ops/transcribe, keyed by a hash of the
+audio content plus every option that changes the result, so renamed or
+copied files hit the cache and edited ones miss it.
+
+Used by transcribe.py, engine.py, vad.py, incremental.py and batch.py.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, List, Optional, Tuple
+
+from formats import TranscriptSegment, segment_from_dict, segment_to_dict
+
+
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "vibe-ops", "transcribe"
+)
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """BLAKE2b digest of a file's contents."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            h.update(block)
+    return h.hexdigest()
+
+
+class TranscriptCache:
+    """Content-addressed on-disk cache of aligned transcripts.
+
+    Entries are keyed by the audio content hash plus every option that changes
+    the transcript, so re-running with a different ``--format`` (or on a copy
+    of the same file) skips ASR and alignment entirely. File digests are
+    memoized by (path, size, mtime) so unchanged large files are not re-hashed.
+    The total size is bounded by evicting least recently used entries; the
+    size is tracked as entries are written, so the cache is only walked on
+    the first write and when the running total passes the limit.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, max_bytes: int = 512 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None  # running size of the entries, None until measured
+
+    def audio_hash(self, audio_path: str) -> str:
+        """Content hash of an audio file, memoized by (path, size, mtime)."""
+        st = os.stat(audio_path)
+        stamp = f"{st.st_size}:{st.st_mtime_ns}"
+        path_id = hashlib.blake2b(os.path.abspath(audio_path).encode(), digest_size=16).hexdigest()
+        memo = os.path.join(self.root, "hashes", path_id)
+        try:
+            with open(memo, encoding="utf-8") as f:
+                saved_stamp, digest = f.read().split()
+            if saved_stamp == stamp:
+                return digest
+        except (OSError, ValueError):
+            pass
+
+        digest = file_digest(audio_path)
+        self._write_atomic(memo, f"{stamp} {digest}")
+        return digest
+
+    def key(
+        self,
+        audio_path: str,
+        model_name: str,
+        language: Optional[str],
+        align: bool,
+        vad_filter: bool,
+        compute_type: str,
+        **extra: Any,
+    ) -> str:
+        """Cache key for a file transcribed with the given options."""
+        return self.options_key(
+            self.audio_hash(audio_path), model_name, language, align, vad_filter, compute_type, **extra
+        )
+
+    def options_key(
+        self,
+        content_hash: str,
+        model_name: str,
+        language: Optional[str],
+        align: bool,
+        vad_filter: bool,
+        compute_type: str,
+        **extra: Any,
+    ) -> str:
+        """Cache key for any content hash (whole file or chunk) plus options.
+
+        ``extra`` holds further options that change the result; pass them only
+        when they differ from the default so existing keys stay valid.
+        """
+        parts = {
+            "audio": content_hash,
+            "model": model_name,
+            "language": language or "auto",
+            "align": align,
+            "vad": vad_filter,
+            "compute_type": compute_type,
+            **extra,
+        }
+        return hashlib.blake2b(json.dumps(parts, sort_keys=True).encode(), digest_size=20).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.root, "entries", key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Tuple[List[TranscriptSegment], str]]:
+        """Return (segments, language) for a key, or None on a miss."""
+        data = self.get_json(key)
+        if data is None:
+            return None
+        return [segment_from_dict(d) for d in data["segments"]], data["language"]
+
+    def put(self, key: str, segments: List[TranscriptSegment], language: str) -> None:
+        """Store a transcript and evict old entries if over the size limit."""
+        self.put_json(key, {"language": language, "segments": [segment_to_dict(seg) for seg in segments]})
+
+    def has(self, key: str) -> bool:
+        """Whether an entry exists for a key (without reading or touching it)."""
+        return os.path.exists(self._entry_path(key))
+
+    def get_json(self, key: str) -> Optional[Any]:
+        """Return any JSON value stored under a key, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)  # mark as recently used
+        return data
+
+    def put_json(self, key: str, data: Any) -> None:
+        """Store any JSON value and evict old entries if over the size limit."""
+        content = json.dumps(data, ensure_ascii=False)
+        self._write_atomic(self._entry_path(key), content)
+        with self._lock:
+            if self._size is not None:
+                self._size += len(content.encode("utf-8"))
+            over = self._size is None or self._size > self.max_bytes
+        if over:
+            # Evict a little below the limit so a full cache is not walked on every put
+            self.evict(self.max_bytes * 9 // 10)
+
+    def evict(self, max_bytes: Optional[int] = None) -> None:
+        """Delete least recently used entries until the cache fits ``max_bytes`` (default: the cache limit)."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            entries = []
+            for root, _, files in os.walk(os.path.join(self.root, "entries")):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+            self._size = total
+
+    def _write_atomic(self, path: str, content: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp, path)
+
+
+def source_hash(cache: TranscriptCache, audio_path: str, audio_track: Optional[str] = None) -> str:
+    """Content hash of a file plus the selected audio track."""
+    digest = cache.audio_hash(audio_path)
+    return digest if audio_track is None else f"{digest}#{audio_track}"
@@ -0,0 +1,165 @@
+"""
+Speaker diarization (``--diarize``).
+
+The pyannote pipeline runs in its own process (Diarizer), overlapped with
+ASR and alignment in the parent, and its speaker turns are then assigned to
+segments and words by overlap (assign_speakers).
+"""
+
+import os
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from formats import TranscriptSegment, TranscriptWord
+
+
+# Per-process state of the diarization worker (set by _diarize_worker_init)
+_WORKER: Dict[str, Any] = {}
+
+
+def _diarize_worker_init(hf_token: Optional[str], device: str, threads: int) -> None:
+    """Load the pyannote diarization pipeline once in the diarization process."""
+    import torch
+    from whisperx.diarize import DiarizationPipeline
+
+    torch.set_num_threads(threads)
+    _WORKER["diarize"] = DiarizationPipeline(use_auth_token=hf_token, device=device)
+
+
+def _diarize_worker_run(
+    shm_name: str, n_samples: int, min_speakers: Optional[int], max_speakers: Optional[int]
+) -> List[Tuple[float, float, str]]:
+    """Diarize a waveform passed through shared memory; returns (start, end, speaker) turns."""
+    from multiprocessing import shared_memory
+
+    import numpy as np
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        audio = np.ndarray((n_samples,), dtype=np.float32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+    turns = _WORKER["diarize"](audio, min_speakers=min_speakers, max_speakers=max_speakers)
+    return [(float(row.start), float(row.end), str(row.speaker)) for row in turns.itertuples()]
+
+
+class Diarizer:
+    """Speaker diarization running in its own process, overlapped with ASR.
+
+    The pyannote pipeline is loaded once in a spawned worker process (while
+    the parent loads the ASR model) and reused for every file submitted.
+    ``submit`` returns immediately, so ASR and alignment run in the parent
+    while the worker diarizes the same waveform; wall time per file is close
+    to max(ASR + alignment, diarization) instead of their sum.
+    """
+
+    def __init__(
+        self,
+        hf_token: Optional[str],
+        device: str = "cpu",
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None,
+    ):
+        from concurrent.futures import ProcessPoolExecutor
+        from multiprocessing import get_context
+
+        self.min_speakers = min_speakers
+        self.max_speakers = max_speakers
+        # Leave half the cores to the ASR model running at the same time
+        threads = max(1, (os.cpu_count() or 1) // 2)
+        self._pool = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=get_context("spawn"),
+            initializer=_diarize_worker_init,
+            initargs=(hf_token, device, threads),
+        )
+
+    def cache_options(self) -> Dict[str, Any]:
+        """Options that change the diarized transcript, for the cache key."""
+        options: Dict[str, Any] = {"diarize": True}
+        if self.min_speakers is not None:
+            options["min_speakers"] = self.min_speakers
+        if self.max_speakers is not None:
+            options["max_speakers"] = self.max_speakers
+        return options
+
+    def submit(self, audio: Any) -> "Future[List[Tuple[float, float, str]]]":
+        """Start diarizing a 16 kHz waveform; the future yields (start, end, speaker) turns."""
+        from multiprocessing import shared_memory
+
+        import numpy as np
+
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+        np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+
+        def release(_: Future) -> None:
+            shm.close()
+            shm.unlink()
+
+        future = self._pool.submit(_diarize_worker_run, shm.name, len(audio), self.min_speakers, self.max_speakers)
+        future.add_done_callback(release)
+        return future
+
+    def close(self) -> None:
+        """Shut down the diarization process."""
+        self._pool.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "Diarizer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def assign_speakers(
+    segments: List[TranscriptSegment], turns: List[Tuple[float, float, str]]
+) -> List[TranscriptSegment]:
+    """Label segments and words with the speaker whose turns overlap them most.
+
+    Segments and words are swept together in start order against the turns
+    sorted by start, keeping a heap of the turns still open, so the cost is
+    O((n + m) log m) plus the overlaps actually found. Words that overlap no
+    turn inherit their segment's speaker.
+    """
+    import heapq
+
+    turns = sorted(turns)
+    intervals = []
+    for i, seg in enumerate(segments):
+        intervals.append((seg.start_at, seg.end_at, i, -1))
+        for j, w in enumerate(seg.words):
+            intervals.append((w.start, w.end, i, j))
+    intervals.sort()
+
+    labels: Dict[Tuple[int, int], str] = {}
+    active: List[Tuple[float, int]] = []  # (turn end, turn index)
+    next_turn = 0
+    for start, end, i, j in intervals:
+        while next_turn < len(turns) and turns[next_turn][0] < end:
+            heapq.heappush(active, (turns[next_turn][1], next_turn))
+            next_turn += 1
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        overlap: Dict[str, float] = {}
+        for k in sorted(k for _, k in active):  # ties go to the earliest turn
+            turn_start, turn_end, speaker = turns[k]
+            amount = min(end, turn_end) - max(start, turn_start)
+            if amount > 0:
+                overlap[speaker] = overlap.get(speaker, 0.0) + amount
+        if overlap:
+            labels[(i, j)] = max(overlap, key=overlap.get)
+
+    labelled = []
+    for i, seg in enumerate(segments):
+        speaker = labels.get((i, -1))
+        words = [
+            TranscriptWord(
+                word=w.word, start=w.start, end=w.end, score=w.score, speaker=labels.get((i, j), speaker)
+            )
+            for j, w in enumerate(seg.words)
+        ]
+        labelled.append(
+            TranscriptSegment(start_at=seg.start_at, end_at=seg.end_at, text=seg.text, words=words, speaker=speaker)
+        )
+    return labelled
@@ -0,0 +1,886 @@
+"""
+The transcription pipeline: model loading, language detection, ASR and
+word-level alignment for one file, in one piece or window by window.
+
+transcribe_audio is the entry point for a whole file; iter_transcribe_stream
+transcribes a long recording in overlapping windows and yields final
+segments as it goes. Alignment can be sharded across CPU processes
+(align_segments_parallel).
+
+Used by transcribe.py, incremental.py, batch.py and autotune.py.
+"""
+
+import contextlib
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from cache import TranscriptCache, source_hash
+from diarize import Diarizer, assign_speakers
+from formats import TranscriptSegment, TranscriptWord, format_timestamp
+from media import SAMPLE_RATE, is_url, load_audio, stream_audio_windows
+from metrics import ProgressCallback, emit_progress, emit_stage
+from vad import compact_speech, remap_segments, speech_regions
+
+
+# Language detection looks at this much speech, found within the first
+# PROBE_DECODE_SECONDS of each file
+PROBE_SECONDS = 30.0
+
+
+PROBE_DECODE_SECONDS = 300.0
+
+
+def default_compute_type(device: str) -> str:
+    """CTranslate2 compute type used when none is configured."""
+    return "int8" if device == "cpu" else "float16"
+
+
+class _ProgressStream(io.TextIOBase):
+    """Stdout passthrough that turns whisperx's "Progress: NN.NN%..." lines into events."""
+
+    PATTERN = re.compile(r"Progress: ([\d.]+)%")
+
+    def __init__(self, target: IO[str], on_percent: Callable[[float], None]):
+        self.target = target
+        self.on_percent = on_percent
+        self.pending = ""
+
+    def write(self, text: str) -> int:
+        self.pending += text
+        *lines, self.pending = self.pending.split("\n")
+        for line in lines:
+            match = self.PATTERN.search(line)
+            if match:
+                self.on_percent(float(match.group(1)))
+            else:
+                self.target.write(line + "\n")
+        return len(text)
+
+    def flush(self) -> None:
+        if self.pending and not self.PATTERN.search(self.pending):
+            self.target.write(self.pending)
+            self.pending = ""
+        self.target.flush()
+
+
+def run_asr(
+    model: Any,
+    audio: Any,
+    batch_size: int,
+    language: Optional[str],
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """Run ``model.transcribe``, reporting per-VAD-chunk progress to ``progress``."""
+    if progress is None:
+        return model.transcribe(audio, batch_size=batch_size, language=language)
+
+    duration = len(audio) / SAMPLE_RATE
+    started = time.perf_counter()
+
+    def on_percent(percent: float) -> None:
+        # whisperx reports the share of VAD chunks done; scale to audio seconds
+        emit_progress(
+            progress,
+            "asr",
+            percent,
+            100.0,
+            started,
+            audio_seconds=duration * percent / 100,
+            audio_total=round(duration, 3),
+        )
+
+    with contextlib.redirect_stdout(_ProgressStream(sys.stdout, on_percent)):
+        return model.transcribe(audio, batch_size=batch_size, language=language, print_progress=True)
+
+
+def load_asr_model(
+    model_name: str = "base",
+    device: str = "cpu",
+    vad_filter: bool = True,
+    compute_type: Optional[str] = None,
+    threads: Optional[int] = None,
+):
+    """Load a WhisperX ASR model.
+
+    Args:
+        model_name: Whisper model size ("tiny", "base", "small", "medium", "large-v2").
+        device: Device to use ("cpu" or "cuda").
+        vad_filter: If False, use very permissive VAD thresholds.
+        compute_type: CTranslate2 compute type (default: int8 on CPU, float16 on CUDA).
+        threads: CTranslate2 CPU threads (default: whisperx's own default).
+
+    Returns:
+        The loaded WhisperX pipeline.
+    """
+    import whisperx
+
+    compute_type = compute_type or default_compute_type(device)
+    asr_options = {"suppress_numerals": False}
+
+    print(f"Loading WhisperX model: {model_name} (device={device}, compute_type={compute_type})")
+
+    # VAD options - lower onset/offset = more sensitive (catches more speech)
+    vad_options = None
+    if not vad_filter:
+        # Very low thresholds to catch almost everything
+        vad_options = {"vad_onset": 0.1, "vad_offset": 0.1}
+
+    extra = {"threads": threads} if threads else {}
+    return whisperx.load_model(
+        model_name,
+        device=device,
+        compute_type=compute_type,
+        asr_options=asr_options,
+        vad_options=vad_options,
+        **extra,
+    )
+
+
+def load_align_model(
+    language: str,
+    device: str = "cpu",
+    cache: Optional[Dict[str, Tuple[Any, Any]]] = None,
+) -> Tuple[Any, Any]:
+    """Load the alignment model for a language, reusing ``cache`` if given.
+
+    Args:
+        language: Language code.
+        device: Device to use.
+        cache: Optional dict of language -> (model, metadata) shared across calls.
+
+    Returns:
+        Tuple of (alignment model, metadata).
+    """
+    import whisperx
+
+    if cache is not None and language in cache:
+        return cache[language]
+
+    print(f"Loading alignment model ({language})...")
+    loaded = whisperx.load_align_model(language_code=language, device=device)
+    if cache is not None:
+        cache[language] = loaded
+    return loaded
+
+
+def probe_window(audio: Any, seconds: float = PROBE_SECONDS) -> Any:
+    """The first speech-bearing ``seconds`` of a waveform, for language detection.
+
+    Leading silence, music beds and room tone are skipped by starting at the
+    first 0.5 s frame whose RMS reaches a tenth of the loud (95th percentile)
+    frames' level.
+    """
+    import numpy as np
+
+    frame = SAMPLE_RATE // 2
+    n_frames = len(audio) // frame
+    start = 0
+    if n_frames > 1:
+        rms = np.sqrt(np.mean(np.square(audio[: n_frames * frame].reshape(n_frames, frame)), axis=1))
+        loud = np.flatnonzero(rms >= 0.1 * np.percentile(rms, 95))
+        if len(loud):
+            start = max(0, int(loud[0]) - 1) * frame
+    return audio[start : start + int(seconds * SAMPLE_RATE)]
+
+
+def load_probe_audio(
+    audio_path: str, seconds: float = PROBE_DECODE_SECONDS, audio_track: Optional[str] = None
+) -> Any:
+    """Decode only the first ``seconds`` of a file (ffmpeg stops as soon as they are read)."""
+    import numpy as np
+
+    windows = stream_audio_windows(audio_path, window_seconds=seconds, overlap_seconds=0.0, audio_track=audio_track)
+    try:
+        for _, audio, _ in windows:
+            return audio
+    finally:
+        windows.close()
+    return np.zeros(0, dtype=np.float32)
+
+
+def _language_key(
+    cache: Optional[TranscriptCache], audio_path: str, model_name: str, audio_track: Optional[str] = None
+) -> Optional[str]:
+    if cache is None or not os.path.exists(audio_path):
+        return None
+    return cache.options_key(
+        "lang:" + source_hash(cache, audio_path, audio_track), model_name, None, False, False, ""
+    )
+
+
+def probe_language(
+    audio_path: str,
+    audio: Any,
+    model: Any,
+    model_name: str,
+    cache: Optional[TranscriptCache] = None,
+    progress: Optional[ProgressCallback] = None,
+    audio_track: Optional[str] = None,
+) -> Optional[str]:
+    """Detect a file's language from a short probe window, cached per audio hash.
+
+    Args:
+        audio_path: Path of the file (used for the cache key).
+        audio: Its waveform, or just its beginning (see load_probe_audio).
+        model: Loaded ASR model.
+        model_name: Model name (detection results are cached per model).
+        cache: Transcript cache holding the detected languages.
+        progress: Callback receiving stage timing events.
+        audio_track: Audio track the waveform was decoded from.
+
+    Returns:
+        Language code, or None if the audio is empty.
+    """
+    key = _language_key(cache, audio_path, model_name, audio_track)
+    if key is not None:
+        cached = cache.get_json(key)
+        if cached is not None:
+            return cached["language"]
+
+    window = probe_window(audio)
+    if not len(window):
+        return None
+    with emit_stage(progress, "language_probe", audio_seconds=round(len(window) / SAMPLE_RATE, 3)):
+        language = model.detect_language(window)
+    if key is not None:
+        cache.put_json(key, {"language": language})
+    return language
+
+
+def detect_languages(
+    audio_paths: List[str],
+    get_model: Callable[[], Any],
+    model_name: str,
+    cache: Optional[TranscriptCache] = None,
+    prefetch: int = 2,
+    progress: Optional[ProgressCallback] = None,
+    audio_track: Optional[str] = None,
+) -> Dict[str, Optional[str]]:
+    """Detect the language of many files, decoding probe windows ahead.
+
+    Cached languages are looked up first; ``get_model`` is only called (and
+    the ASR model loaded) if some file still needs detection. Files whose
+    probe fails to decode are left out of the result.
+    """
+    languages: Dict[str, Optional[str]] = {}
+    todo = []
+    for path in audio_paths:
+        key = _language_key(cache, path, model_name, audio_track)
+        cached = cache.get_json(key) if key is not None else None
+        if cached is not None:
+            languages[path] = cached["language"]
+        else:
+            todo.append(path)
+    if not todo:
+        return languages
+
+    with ThreadPoolExecutor(max_workers=max(1, prefetch)) as pool:
+        pending: Dict[int, Future] = {}
+
+        def schedule(index: int) -> None:
+            if index < len(todo):
+                pending[index] = pool.submit(load_probe_audio, todo[index], PROBE_DECODE_SECONDS, audio_track)
+
+        for i in range(max(1, prefetch)):
+            schedule(i)
+        for i, path in enumerate(todo):
+            future = pending.pop(i)
+            schedule(i + max(1, prefetch))
+            try:
+                probe_audio = future.result()
+            except Exception as e:
+                print(f"[Warning] Language probe failed for {path}: {e}")
+                continue
+            languages[path] = probe_language(
+                path, probe_audio, get_model(), model_name, cache, progress, audio_track
+            )
+    return languages
+
+
+def result_options(
+    vad_prepass: bool = False, diarizer: Optional["Diarizer"] = None, audio_track: Optional[str] = None
+) -> Dict[str, Any]:
+    """Non-default options that change a transcript, for the cache key."""
+    options: Dict[str, Any] = {}
+    if audio_track is not None:
+        options["audio_track"] = audio_track
+    if vad_prepass:
+        options["vad_prepass"] = True
+    if diarizer is not None:
+        options.update(diarizer.cache_options())
+    return options
+
+
+def transcribe_audio(
+    audio_path: str,
+    model_name: str = "base",
+    language: Optional[str] = None,
+    batch_size: int = 8,
+    align: bool = True,
+    device: str = "cpu",
+    vad_filter: bool = True,
+    model: Optional[Any] = None,
+    audio: Optional[Any] = None,
+    align_models: Optional[Dict[str, Tuple[Any, Any]]] = None,
+    align_workers: int = 1,
+    cache: Optional[TranscriptCache] = None,
+    compute_type: Optional[str] = None,
+    threads: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    vad_prepass: bool = False,
+    diarizer: Optional["Diarizer"] = None,
+    audio_track: Optional[str] = None,
+) -> List[TranscriptSegment]:
+    """Transcribe audio file using WhisperX with optional word-level timestamps.
+
+    Args:
+        audio_path: Audio or video file (or URL) to transcribe.
+        model_name: Whisper model size ("tiny", "base", "small", "medium", "large-v2").
+        language: Language code (e.g., "en", "zh"). If None, auto-detect.
+        batch_size: Batch size for processing.
+        align: If True, perform word-level forced alignment.
+        device: Device to use ("cpu" or "cuda").
+        vad_filter: If True, use VAD to filter non-speech segments.
+        model: Already loaded ASR model (skips loading ``model_name``).
+        audio: Already decoded 16 kHz waveform (skips decoding ``audio_path``).
+        align_models: Optional cache of alignment models keyed by language.
+        align_workers: Number of CPU processes used for alignment.
+        cache: Transcript cache to read from and write to (None disables caching).
+        compute_type: CTranslate2 compute type (default: int8 on CPU, float16 on CUDA).
+        threads: CTranslate2 CPU threads.
+        progress: Callback receiving stage timing and progress events
+            (stage_start / stage_end with seconds and peak RSS, and progress
+            with done/total, audio seconds processed and ETA).
+        vad_prepass: If True, detect speech first (cached per audio hash),
+            return immediately for silent audio without loading any model,
+            and transcribe/align only the speech spans.
+        diarizer: If given, diarize the audio concurrently with ASR and label
+            segments and words with speakers.
+        audio_track: Audio track of a video to transcribe: index among the
+            audio tracks or language tag (default: ffmpeg's default track).
+
+    Returns:
+        List of TranscriptSegment objects.
+    """
+    segments, _ = _transcribe(
+        audio_path,
+        model_name=model_name,
+        language=language,
+        batch_size=batch_size,
+        align=align,
+        device=device,
+        vad_filter=vad_filter,
+        model=model,
+        audio=audio,
+        align_models=align_models,
+        align_workers=align_workers,
+        cache=cache,
+        compute_type=compute_type,
+        threads=threads,
+        progress=progress,
+        vad_prepass=vad_prepass,
+        diarizer=diarizer,
+        audio_track=audio_track,
+    )
+    return segments
+
+
+def _transcribe(
+    audio_path: str,
+    model_name: str = "base",
+    language: Optional[str] = None,
+    batch_size: int = 8,
+    align: bool = True,
+    device: str = "cpu",
+    vad_filter: bool = True,
+    model: Optional[Any] = None,
+    audio: Optional[Any] = None,
+    align_models: Optional[Dict[str, Tuple[Any, Any]]] = None,
+    align_workers: int = 1,
+    cache: Optional[TranscriptCache] = None,
+    compute_type: Optional[str] = None,
+    threads: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    vad_prepass: bool = False,
+    speech: Optional[List[Tuple[float, float]]] = None,
+    diarizer: Optional["Diarizer"] = None,
+    probed_language: Optional[str] = None,
+    audio_track: Optional[str] = None,
+) -> Tuple[List[TranscriptSegment], str]:
+    """Implementation of transcribe_audio that also returns the language.
+
+    ``speech`` passes in speech regions already computed for ``audio`` and
+    ``probed_language`` a language already detected by probe_language. The
+    cache key always uses the requested ``language``.
+    """
+    if audio is None and not is_url(audio_path) and not os.path.exists(audio_path):
+        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+    cache_key = None
+    if cache is not None and os.path.exists(audio_path):
+        with emit_stage(progress, "cache_lookup"):
+            cache_key = cache.key(
+                audio_path,
+                model_name,
+                language,
+                align,
+                vad_filter,
+                compute_type or default_compute_type(device),
+                **result_options(vad_prepass, diarizer, audio_track),
+            )
+            cached = cache.get(cache_key)
+        if cached is not None:
+            print(f"Using cached transcript: {audio_path}")
+            return cached
+
+    mapping = None
+    if vad_prepass:
+        if audio is None:
+            with emit_stage(progress, "decode"):
+                audio = load_audio(audio_path, audio_track)
+        if speech is None:
+            speech = speech_regions(audio_path, audio, device, cache, progress, audio_track)
+        if not speech:
+            print("No speech detected - skipping transcription")
+            segments: List[TranscriptSegment] = []
+            if cache_key is not None:
+                cache.put(cache_key, segments, language or "")
+            return segments, language or ""
+        audio, mapping = compact_speech(audio, speech)
+
+    diarization = None
+    if diarizer is not None:
+        if audio is None:
+            with emit_stage(progress, "decode"):
+                audio = load_audio(audio_path, audio_track)
+        print("Diarizing speakers in the background...")
+        diarization = diarizer.submit(audio)
+
+    if model is None:
+        with emit_stage(progress, "model_load", model=model_name):
+            model = load_asr_model(
+                model_name, device=device, vad_filter=vad_filter, compute_type=compute_type, threads=threads
+            )
+
+    print(f"Transcribing: {audio_path}")
+    if not vad_filter:
+        print("VAD filter disabled - processing all audio segments")
+    if audio is None:
+        with emit_stage(progress, "decode"):
+            audio = load_audio(audio_path, audio_track)
+    asr_language = language or probed_language or probe_language(
+        audio_path, audio, model, model_name, cache, progress, audio_track
+    )
+    with emit_stage(progress, "asr", audio_seconds=round(len(audio) / SAMPLE_RATE, 3)):
+        result = run_asr(model, audio, batch_size, asr_language, progress)
+
+    detected_language = result.get("language", "en")
+    print(f"Detected language: {detected_language}")
+    print(f"Found {len(result['segments'])} segments")
+
+    # Convert to TranscriptSegment (without word-level timestamps)
+    segments = []
+    for seg in result["segments"]:
+        segments.append(
+            TranscriptSegment(
+                start_at=float(seg["start"]),
+                end_at=float(seg["end"]),
+                text=seg["text"].strip(),
+                words=[],
+            )
+        )
+
+    # Perform word-level alignment if requested
+    if align and segments:
+        parallel = align_workers > 1 and device == "cpu"
+        align_model = None
+        if not parallel:
+            with emit_stage(progress, "align_model_load", language=detected_language):
+                align_model = load_align_model(detected_language, device, align_models)
+        with emit_stage(progress, "alignment", segments=len(segments)):
+            segments = align_segments(
+                segments,
+                audio_path,
+                detected_language,
+                device,
+                audio=audio,
+                align_model=align_model,
+                workers=align_workers,
+                progress=progress,
+            )
+
+    if diarization is not None:
+        # Only the time not already hidden behind ASR and alignment
+        with emit_stage(progress, "diarization_wait"):
+            turns = diarization.result()
+        segments = assign_speakers(segments, turns)
+        print(f"Found {len({speaker for _, _, speaker in turns})} speakers")
+
+    if mapping is not None:
+        segments = remap_segments(segments, mapping)
+
+    if cache_key is not None:
+        cache.put(cache_key, segments, detected_language)
+
+    return segments, detected_language
+
+
+def align_segments(
+    segments: List[TranscriptSegment],
+    audio_path: str,
+    language: str,
+    device: str = "cpu",
+    audio: Optional[Any] = None,
+    align_model: Optional[Tuple[Any, Any]] = None,
+    workers: int = 1,
+    progress: Optional[ProgressCallback] = None,
+) -> List[TranscriptSegment]:
+    """Align transcript segments to get word-level timestamps.
+
+    Args:
+        segments: List of TranscriptSegment objects to align.
+        audio_path: Path to the audio file.
+        language: Language code.
+        device: Device to use.
+        audio: Already decoded 16 kHz waveform (skips decoding ``audio_path``).
+        align_model: Already loaded (model, metadata) from load_align_model.
+        workers: Number of CPU worker processes. With more than one, segments
+            are sharded across a process pool (see align_segments_parallel).
+        progress: Callback receiving "segment N of M" progress events.
+
+    Returns:
+        List of TranscriptSegment with word-level timestamps.
+    """
+    import whisperx
+
+    if audio is None:
+        audio = load_audio(audio_path)
+
+    if workers > 1 and device == "cpu" and len(segments) > 1:
+        return align_segments_parallel(segments, audio, language, workers, progress)
+
+    if align_model is None:
+        align_model = load_align_model(language, device)
+    model_a, metadata = align_model
+
+    # Convert to whisperx format
+    whisperx_segments = [
+        {"start": seg.start_at, "end": seg.end_at, "text": seg.text} for seg in segments
+    ]
+
+    print("Aligning transcription for word-level timestamps...")
+    # Segments align independently, so with a progress callback they are fed
+    # in slices to report "segment N of M" as alignment proceeds
+    step = len(whisperx_segments) if progress is None else max(1, len(whisperx_segments) // 50)
+    started = time.perf_counter()
+    aligned: List[Dict[str, Any]] = []
+    for i in range(0, len(whisperx_segments), step):
+        batch = whisperx_segments[i : i + step]
+        aligned_result = whisperx.align(
+            batch,
+            model_a,
+            metadata,
+            audio,
+            device,
+            return_char_alignments=False,
+        )
+        aligned.extend(aligned_result["segments"])
+        emit_progress(
+            progress,
+            "alignment",
+            i + len(batch),
+            len(whisperx_segments),
+            started,
+            audio_seconds=batch[-1]["end"],
+        )
+
+    aligned_segments = _segments_from_aligned(aligned)
+
+    total_words = sum(len(seg.words) for seg in aligned_segments)
+    print(f"Aligned {total_words} words")
+
+    return aligned_segments
+
+
+def _segments_from_aligned(aligned: List[Dict[str, Any]]) -> List[TranscriptSegment]:
+    """Convert whisperx aligned segment dicts back to TranscriptSegment with words."""
+    aligned_segments: List[TranscriptSegment] = []
+    for seg in aligned:
+        words = []
+        for w in seg.get("words", []):
+            if "start" in w and "end" in w:
+                words.append(
+                    TranscriptWord(
+                        word=w["word"],
+                        start=float(w["start"]),
+                        end=float(w["end"]),
+                        score=float(w.get("score", 0.0)),
+                    )
+                )
+
+        aligned_segments.append(
+            TranscriptSegment(
+                start_at=float(seg["start"]),
+                end_at=float(seg["end"]),
+                text=seg["text"].strip(),
+                words=words,
+            )
+        )
+    return aligned_segments
+
+
+def shard_segments(segments: List[TranscriptSegment], shards: int) -> List[List[TranscriptSegment]]:
+    """Split segments into contiguous ranges of roughly equal total duration."""
+    shards = max(1, min(shards, len(segments)))
+    weights = [max(seg.end_at - seg.start_at, 0.0) for seg in segments]
+    if not any(weights):
+        weights = [1.0] * len(segments)
+    target = sum(weights) / shards
+
+    ranges: List[List[TranscriptSegment]] = [[]]
+    acc = 0.0
+    for i, (seg, weight) in enumerate(zip(segments, weights)):
+        ranges[-1].append(seg)
+        acc += weight
+        remaining_segments = len(segments) - i - 1
+        remaining_shards = shards - len(ranges)
+        if remaining_shards and remaining_segments and (
+            acc >= target * len(ranges) or remaining_segments == remaining_shards
+        ):
+            ranges.append([])
+    return ranges
+
+
+# Per-process state for alignment workers (set by _align_worker_init)
+_WORKER: Dict[str, Any] = {}
+
+
+def _align_worker_init(shm_name: str, n_samples: int, language: str, threads: int) -> None:
+    """Attach to the shared waveform and load this worker's alignment model."""
+    from multiprocessing import shared_memory
+
+    import numpy as np
+    import torch
+    import whisperx
+
+    torch.set_num_threads(threads)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _WORKER["shm"] = shm  # keep the mapping alive for the worker's lifetime
+    _WORKER["audio"] = np.ndarray((n_samples,), dtype=np.float32, buffer=shm.buf)
+    _WORKER["model"] = whisperx.load_align_model(language_code=language, device="cpu")
+
+
+def _align_worker_run(whisperx_segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Align one shard of segments against the shared waveform."""
+    import whisperx
+
+    model_a, metadata = _WORKER["model"]
+    result = whisperx.align(
+        whisperx_segments,
+        model_a,
+        metadata,
+        _WORKER["audio"],
+        "cpu",
+        return_char_alignments=False,
+    )
+    # Plain Python types only, so results pickle cheaply back to the parent
+    return [
+        {
+            "start": float(seg["start"]),
+            "end": float(seg["end"]),
+            "text": seg["text"],
+            "words": [
+                {
+                    "word": w["word"],
+                    "start": float(w["start"]),
+                    "end": float(w["end"]),
+                    "score": float(w.get("score", 0.0)),
+                }
+                for w in seg.get("words", [])
+                if "start" in w and "end" in w
+            ],
+        }
+        for seg in result["segments"]
+    ]
+
+
+def align_segments_parallel(
+    segments: List[TranscriptSegment],
+    audio: Any,
+    language: str,
+    workers: int,
+    progress: Optional[ProgressCallback] = None,
+) -> List[TranscriptSegment]:
+    """Align segments on CPU across a pool of worker processes.
+
+    The waveform is copied once into shared memory and mapped read-only by
+    every worker; each worker loads its own alignment model. Segments are
+    split into contiguous, duration-balanced shards (two per worker so a slow
+    shard does not leave the pool idle) and merged back in order.
+
+    Args:
+        segments: List of TranscriptSegment objects to align.
+        audio: Decoded 16 kHz float32 waveform.
+        language: Language code.
+        workers: Number of worker processes.
+        progress: Callback receiving progress events as shards finish.
+
+    Returns:
+        List of TranscriptSegment with word-level timestamps.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    import numpy as np
+
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    shards = shard_segments(segments, workers * 2)
+    workers = min(workers, len(shards))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    print(f"Aligning transcription for word-level timestamps ({workers} workers, {len(shards)} shards)...")
+    shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+    try:
+        np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_align_worker_init,
+            initargs=(shm.name, len(audio), language, threads),
+        ) as pool:
+            futures = {
+                pool.submit(
+                    _align_worker_run,
+                    [{"start": seg.start_at, "end": seg.end_at, "text": seg.text} for seg in shard],
+                ): i
+                for i, shard in enumerate(shards)
+            }
+            results: List[List[Dict[str, Any]]] = [[] for _ in shards]
+            started = time.perf_counter()
+            done = 0
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                done += len(shards[index])
+                emit_progress(progress, "alignment", done, len(segments), started)
+            aligned = [seg for shard in results for seg in shard]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    aligned_segments = _segments_from_aligned(aligned)
+    total_words = sum(len(seg.words) for seg in aligned_segments)
+    print(f"Aligned {total_words} words")
+    return aligned_segments
+
+
+def shift_segments(segments: List[TranscriptSegment], offset: float) -> List[TranscriptSegment]:
+    """Return copies of segments with all timestamps shifted by ``offset`` seconds."""
+    return [
+        TranscriptSegment(
+            start_at=seg.start_at + offset,
+            end_at=seg.end_at + offset,
+            text=seg.text,
+            words=[
+                TranscriptWord(
+                    word=w.word, start=w.start + offset, end=w.end + offset, score=w.score, speaker=w.speaker
+                )
+                for w in seg.words
+            ],
+            speaker=seg.speaker,
+        )
+        for seg in segments
+    ]
+
+
+def iter_transcribe_stream(
+    audio_path: str,
+    model_name: str = "base",
+    language: Optional[str] = None,
+    batch_size: int = 8,
+    align: bool = True,
+    device: str = "cpu",
+    vad_filter: bool = True,
+    window_seconds: float = 120.0,
+    overlap_seconds: float = 10.0,
+    model: Optional[Any] = None,
+    align_workers: int = 1,
+    compute_type: Optional[str] = None,
+    threads: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    vad_prepass: bool = False,
+    audio_track: Optional[str] = None,
+) -> Iterator[TranscriptSegment]:
+    """Transcribe a long recording window by window, yielding final segments.
+
+    Each window is transcribed and aligned on its own and its segments are
+    shifted to absolute time. Consecutive windows overlap; a segment belongs
+    to the window whose cut point (middle of the overlap) comes after its
+    start, so boundary segments are emitted once, from the window that saw
+    them with the most context.
+
+    Args:
+        audio_path: Path to the audio file to transcribe.
+        model_name: Whisper model size.
+        language: Language code. If None, detected on the first window and
+            reused for the rest of the recording.
+        batch_size: Batch size for processing.
+        align: If True, perform word-level forced alignment per window.
+        device: Device to use ("cpu" or "cuda").
+        vad_filter: If True, use VAD to filter non-speech segments.
+        window_seconds: Length of each decoded window.
+        overlap_seconds: Overlap between consecutive windows.
+        model: Already loaded ASR model.
+        align_workers: Number of CPU processes used for alignment.
+        compute_type: CTranslate2 compute type (default: int8 on CPU, float16 on CUDA).
+        threads: CTranslate2 CPU threads.
+        progress: Callback receiving stage timing and progress events.
+        vad_prepass: Detect speech per window and skip silent windows.
+        audio_track: Audio track index or language tag of a video input.
+
+    Yields:
+        TranscriptSegment objects in order, as soon as their window is done.
+    """
+    if model is None:
+        with emit_stage(progress, "model_load", model=model_name):
+            model = load_asr_model(
+                model_name, device=device, vad_filter=vad_filter, compute_type=compute_type, threads=threads
+            )
+    align_models: Dict[str, Tuple[Any, Any]] = {}
+
+    committed_until = 0.0
+    last_end = 0.0
+    for offset, window, is_last in stream_audio_windows(
+        audio_path, window_seconds, overlap_seconds, audio_track
+    ):
+        window_end = offset + len(window) / SAMPLE_RATE
+        cut = window_end if is_last else window_end - overlap_seconds / 2
+        segments, detected_language = _transcribe(
+            f"{audio_path} [{format_timestamp(offset)} - {format_timestamp(window_end)}]",
+            language=language,
+            batch_size=batch_size,
+            align=align,
+            device=device,
+            vad_filter=vad_filter,
+            model=model,
+            audio=window,
+            align_models=align_models,
+            align_workers=align_workers,
+            progress=progress,
+            vad_prepass=vad_prepass,
+        )
+        language = language or detected_language
+
+        for seg in shift_segments(segments, offset):
+            if seg.start_at < committed_until or seg.start_at >= cut:
+                continue
+            if seg.end_at <= last_end:
+                # Already covered by a segment emitted from the previous window
+                continue
+            last_end = seg.end_at
+            yield seg
+        committed_until = cut
@@ -0,0 +1,374 @@
+"""
+Transcript data types and output formats.
+
+TranscriptSegment/TranscriptWord are what every transcription path returns
+(as plain lists); Transcript is the columnar NumPy form used to save and
+load the ``npz`` format. The formatters render txt, srt, vtt, json and
+jsonl either as one string (format_segments) or segment by segment
+(StreamingWriter, which write_transcript and the CLI's stdout output use),
+and load_transcript reads json, jsonl and npz transcripts back.
+
+Used by transcribe.py and the other modules of this skill.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+@dataclass(slots=True)
+class TranscriptWord:
+    """A single word with timestamp."""
+
+    word: str
+    start: float
+    end: float
+    score: float
+    speaker: Optional[str] = None
+
+
+@dataclass(slots=True)
+class TranscriptSegment:
+    """A transcript segment with optional word-level timestamps."""
+
+    start_at: float
+    end_at: float
+    text: str
+    words: List[TranscriptWord]
+    speaker: Optional[str] = None
+
+
+class Transcript:
+    """Columnar transcript: timings and scores in NumPy arrays, text in one buffer.
+
+    The storage form of ``npz`` transcripts: write_transcript builds it from
+    the segment list when saving and load_transcript returns it, while
+    transcription itself still produces lists of segments. It is a read-only
+    sequence of TranscriptSegment, so a loaded transcript can be formatted
+    or written like a list; segments and words are only built as they are
+    accessed. Storage is about 36 bytes per word plus its UTF-8 text, instead
+    of a dataclass, a float per field and a str object each.
+
+    Columns (``n`` segments, ``m`` words):
+        seg_start, seg_end: float64[n]
+        seg_text: int64[n + 1] byte offsets of segment texts in ``text``
+        seg_words: int64[n + 1] ranges of each segment's words
+        seg_speaker, word_speaker: int32 indices into ``speakers`` (-1: none)
+        word_start, word_end, word_score: float64[m]
+        word_text: int64[m + 1] byte offsets of words in ``text``
+        text: uint8 UTF-8 buffer, all segment texts followed by all words
+    """
+
+    COLUMNS = (
+        "seg_start", "seg_end", "seg_text", "seg_words", "seg_speaker",
+        "word_start", "word_end", "word_score", "word_text", "word_speaker", "text",
+    )
+
+    def __init__(self, columns: Dict[str, Any], speakers: List[str]):
+        self.columns = columns
+        self.speakers = speakers
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[TranscriptSegment]) -> "Transcript":
+        """Build the columnar form from segments (consumed one at a time)."""
+        from array import array
+
+        import numpy as np
+
+        seg_start, seg_end, word_start, word_end = array("d"), array("d"), array("d"), array("d")
+        word_score = array("d")
+        seg_text, seg_words, word_text = array("q", [0]), array("q", [0]), array("q", [0])
+        seg_speaker, word_speaker = array("i"), array("i")
+        seg_bytes, word_bytes = bytearray(), bytearray()
+        speaker_ids: Dict[str, int] = {}
+
+        def speaker_id(speaker: Optional[str]) -> int:
+            if speaker is None:
+                return -1
+            return speaker_ids.setdefault(speaker, len(speaker_ids))
+
+        for seg in segments:
+            seg_start.append(seg.start_at)
+            seg_end.append(seg.end_at)
+            seg_speaker.append(speaker_id(seg.speaker))
+            seg_bytes += seg.text.encode("utf-8")
+            seg_text.append(len(seg_bytes))
+            for w in seg.words:
+                word_start.append(w.start)
+                word_end.append(w.end)
+                word_score.append(w.score)
+                word_speaker.append(speaker_id(w.speaker))
+                word_bytes += w.word.encode("utf-8")
+                word_text.append(len(word_bytes))
+            seg_words.append(len(word_start))
+
+        columns = {
+            "seg_start": np.frombuffer(seg_start, dtype=np.float64),
+            "seg_end": np.frombuffer(seg_end, dtype=np.float64),
+            "seg_text": np.frombuffer(seg_text, dtype=np.int64),
+            "seg_words": np.frombuffer(seg_words, dtype=np.int64),
+            "seg_speaker": np.frombuffer(seg_speaker, dtype=np.int32),
+            "word_start": np.frombuffer(word_start, dtype=np.float64),
+            "word_end": np.frombuffer(word_end, dtype=np.float64),
+            "word_score": np.frombuffer(word_score, dtype=np.float64),
+            "word_text": np.frombuffer(word_text, dtype=np.int64) + len(seg_bytes),
+            "word_speaker": np.frombuffer(word_speaker, dtype=np.int32),
+            "text": np.frombuffer(bytes(seg_bytes + word_bytes), dtype=np.uint8),
+        }
+        return cls(columns, list(speaker_ids))
+
+    def __len__(self) -> int:
+        return len(self.columns["seg_start"])
+
+    @property
+    def word_count(self) -> int:
+        return len(self.columns["word_start"])
+
+    def _text(self, offsets: Any, i: int) -> str:
+        return self.columns["text"][offsets[i] : offsets[i + 1]].tobytes().decode("utf-8")
+
+    def _speaker(self, code: int) -> Optional[str]:
+        return self.speakers[code] if code >= 0 else None
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transcript index out of range")
+        c = self.columns
+        first, last = int(c["seg_words"][index]), int(c["seg_words"][index + 1])
+        return TranscriptSegment(
+            start_at=float(c["seg_start"][index]),
+            end_at=float(c["seg_end"][index]),
+            text=self._text(c["seg_text"], index),
+            words=[
+                TranscriptWord(
+                    word=self._text(c["word_text"], j),
+                    start=float(c["word_start"][j]),
+                    end=float(c["word_end"][j]),
+                    score=float(c["word_score"][j]),
+                    speaker=self._speaker(int(c["word_speaker"][j])),
+                )
+                for j in range(first, last)
+            ],
+            speaker=self._speaker(int(c["seg_speaker"][index])),
+        )
+
+    def __iter__(self) -> Iterator[TranscriptSegment]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def save(self, file: Any) -> None:
+        """Write the columns as an uncompressed .npz archive (a path or binary file)."""
+        import numpy as np
+
+        np.savez(file, speakers=np.array(self.speakers, dtype=str), **self.columns)
+
+    @classmethod
+    def load(cls, file: Any) -> "Transcript":
+        """Read a transcript written by ``save``; columns are loaded eagerly."""
+        import numpy as np
+
+        with np.load(file, allow_pickle=False) as data:
+            columns = {name: data[name] for name in cls.COLUMNS}
+            speakers = [str(s) for s in data["speakers"]]
+        return cls(columns, speakers)
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds to HH:MM:SS.mmm"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{secs:06.3f}"
+
+
+def labelled_text(seg: TranscriptSegment) -> str:
+    """Segment text prefixed with its speaker label, if diarized."""
+    return f"[{seg.speaker}] {seg.text}" if seg.speaker else seg.text
+
+
+def vtt_text(seg: TranscriptSegment) -> str:
+    """Segment text with a WebVTT voice tag for its speaker, if diarized."""
+    return f"<v {seg.speaker}>{seg.text}" if seg.speaker else seg.text
+
+
+def format_srt(segments: List[TranscriptSegment]) -> str:
+    """Format segments as SRT subtitle format."""
+    lines = []
+    for i, seg in enumerate(segments, 1):
+        start = format_timestamp(seg.start_at).replace(".", ",")
+        end = format_timestamp(seg.end_at).replace(".", ",")
+        lines.append(f"{i}")
+        lines.append(f"{start} --> {end}")
+        lines.append(labelled_text(seg))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def format_vtt(segments: List[TranscriptSegment]) -> str:
+    """Format segments as WebVTT subtitle format."""
+    lines = ["WEBVTT", ""]
+    for seg in segments:
+        start = format_timestamp(seg.start_at)
+        end = format_timestamp(seg.end_at)
+        lines.append(f"{start} --> {end}")
+        lines.append(vtt_text(seg))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def format_txt(segments: List[TranscriptSegment]) -> str:
+    """Format segments as plain text with timestamps."""
+    lines = []
+    for seg in segments:
+        start = format_timestamp(seg.start_at)
+        end = format_timestamp(seg.end_at)
+        lines.append(f"[{start} - {end}] {labelled_text(seg)}")
+    return "\n".join(lines)
+
+
+def segment_to_dict(seg: TranscriptSegment) -> Dict[str, Any]:
+    """Convert a segment to the dict layout used by the JSON formats."""
+    seg_dict: Dict[str, Any] = {
+        "start": seg.start_at,
+        "end": seg.end_at,
+        "text": seg.text,
+    }
+    if seg.speaker:
+        seg_dict["speaker"] = seg.speaker
+    if seg.words:
+        seg_dict["words"] = [word_to_dict(w) for w in seg.words]
+    return seg_dict
+
+
+def word_to_dict(w: TranscriptWord) -> Dict[str, Any]:
+    """Convert a word to its JSON dict (``speaker`` only when diarized)."""
+    word_dict: Dict[str, Any] = {"word": w.word, "start": w.start, "end": w.end, "score": w.score}
+    if w.speaker is not None:
+        word_dict["speaker"] = w.speaker
+    return word_dict
+
+
+def segment_from_dict(data: Dict[str, Any]) -> TranscriptSegment:
+    """Inverse of segment_to_dict."""
+    return TranscriptSegment(
+        start_at=float(data["start"]),
+        end_at=float(data["end"]),
+        text=data["text"],
+        words=[TranscriptWord(**w) for w in data.get("words", [])],
+        speaker=data.get("speaker"),
+    )
+
+
+def format_json(segments: List[TranscriptSegment]) -> str:
+    """Format segments as JSON."""
+    data = [segment_to_dict(seg) for seg in segments]
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def format_jsonl(segments: List[TranscriptSegment]) -> str:
+    """Format segments as JSON Lines (one segment object per line)."""
+    return "\n".join(json.dumps(segment_to_dict(seg), ensure_ascii=False) for seg in segments)
+
+
+FORMATTERS = {
+    "srt": format_srt,
+    "vtt": format_vtt,
+    "txt": format_txt,
+    "json": format_json,
+    "jsonl": format_jsonl,
+}
+
+
+class StreamingWriter:
+    """Append-only transcript writer that flushes every segment as it arrives.
+
+    Partial SRT/VTT/TXT/JSONL output is usable while transcription is still
+    running. JSON output is only a valid document once ``close`` is called.
+    With ``flush=False`` it is simply an incremental writer that never holds
+    the whole output in memory (see write_segments).
+    """
+
+    def __init__(self, stream: IO[str], output_format: str, flush: bool = True):
+        self.stream = stream
+        self.output_format = output_format
+        self.flush = flush
+        self.count = 0
+        if output_format == "vtt":
+            self.stream.write("WEBVTT\n\n")
+        elif output_format == "json":
+            self.stream.write("[")
+        self.stream.flush()
+
+    def write(self, seg: TranscriptSegment) -> None:
+        """Append one segment and flush."""
+        self.count += 1
+        fmt = self.output_format
+        if fmt == "srt":
+            start = format_timestamp(seg.start_at).replace(".", ",")
+            end = format_timestamp(seg.end_at).replace(".", ",")
+            self.stream.write(f"{self.count}\n{start} --> {end}\n{labelled_text(seg)}\n\n")
+        elif fmt == "vtt":
+            start = format_timestamp(seg.start_at)
+            end = format_timestamp(seg.end_at)
+            self.stream.write(f"{start} --> {end}\n{vtt_text(seg)}\n\n")
+        elif fmt == "jsonl":
+            self.stream.write(json.dumps(segment_to_dict(seg), ensure_ascii=False) + "\n")
+        elif fmt == "json":
+            sep = "\n" if self.count == 1 else ",\n"
+            item = json.dumps(segment_to_dict(seg), ensure_ascii=False, indent=2)
+            self.stream.write(sep + "\n".join("  " + line for line in item.splitlines()))
+        else:
+            start = format_timestamp(seg.start_at)
+            end = format_timestamp(seg.end_at)
+            self.stream.write(f"[{start} - {end}] {labelled_text(seg)}\n")
+        if self.flush:
+            self.stream.flush()
+
+    def close(self) -> None:
+        """Finish the document (closes the JSON array) and flush."""
+        if self.output_format == "json":
+            self.stream.write("\n]\n" if self.count else "]\n")
+        self.stream.flush()
+
+
+def format_segments(segments: Sequence[TranscriptSegment], output_format: str) -> str:
+    """Format segments in the given output format (srt/vtt/txt/json)."""
+    return FORMATTERS.get(output_format, format_txt)(segments)
+
+
+# Text formats plus the binary columnar format (Transcript.save)
+OUTPUT_FORMATS = [*FORMATTERS, "npz"]
+
+
+def write_transcript(segments: Iterable[TranscriptSegment], path: str, output_format: str) -> None:
+    """Write a transcript file without building the whole output in memory.
+
+    Text formats are written segment by segment; ``npz`` stores the columnar
+    Transcript form.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if output_format == "npz":
+        transcript = segments if isinstance(segments, Transcript) else Transcript.from_segments(segments)
+        with open(path, "wb") as f:
+            transcript.save(f)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        writer = StreamingWriter(f, output_format if output_format in FORMATTERS else "txt", flush=False)
+        for seg in segments:
+            writer.write(seg)
+        writer.close()
+
+
+def load_transcript(path: str) -> Sequence[TranscriptSegment]:
+    """Read a transcript written as .npz, .json or .jsonl."""
+    if path.endswith(".npz"):
+        return Transcript.load(path)
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [segment_from_dict(json.loads(line)) for line in f if line.strip()]
+        return [segment_from_dict(d) for d in json.load(f)]
@@ -0,0 +1,234 @@
+"""
+Incremental re-transcription of edited recordings (``--incremental``).
+
+The audio is cut into content-defined chunks: boundaries are placed at the
+quietest nearby sample, so they depend only on local content and an edit
+changes only the chunks it touches. Each chunk is cached by a fingerprint of
+its samples, and only new or changed chunks are transcribed again.
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import TranscriptCache
+from engine import _transcribe, default_compute_type, load_asr_model, result_options, shift_segments
+from formats import TranscriptSegment, format_timestamp
+from media import SAMPLE_RATE, load_audio
+from metrics import ProgressCallback, emit_stage
+
+
+def _sliding_min(x: Any, radius: int) -> Any:
+    """Minimum of ``x`` over a centered window of 2*radius+1 (van Herk/Gil-Werman)."""
+    import numpy as np
+
+    w = 2 * radius + 1
+    pad_right = radius + (-(len(x) + 2 * radius)) % w
+    blocks = np.pad(x, (radius, pad_right), mode="edge").reshape(-1, w)
+    prefix = np.minimum.accumulate(blocks, axis=1).ravel()
+    suffix = np.minimum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return np.minimum(suffix[: len(x)], prefix[w - 1 : w - 1 + len(x)])
+
+
+def _refine_cut(audio: Any, approx: int, search: int, extent: int, width: int = 160) -> int:
+    """Move an approximate cut to a sample-exact, content-determined position.
+
+    Within ``search`` samples of ``approx``, finds the quietest point by the
+    exact integer sum of |sample| over the preceding ``width`` samples, then
+    cuts in the middle of the plateau of equally quiet positions (bounded by
+    ``extent``). The result depends only on nearby samples, not on where
+    the file starts, so the same audio is cut at the same place after an edit
+    shifts it by any number of samples.
+    """
+    import numpy as np
+
+    lo = max(approx - extent, width)
+    hi = min(approx + extent, len(audio))
+    if hi <= lo:
+        return approx
+    pcm = np.abs(np.rint(audio[lo - width : hi] * 32768)).astype(np.int64)
+    csum = np.concatenate(([0], np.cumsum(pcm)))
+    quiet = csum[width:] - csum[:-width]  # quiet[j] is the sum before sample lo + j
+
+    a = max(approx - search, lo) - lo
+    b = min(approx + search, hi) - lo
+    best = a + int(np.argmin(quiet[a : b + 1]))
+    value = quiet[best]
+    left = np.flatnonzero(quiet[:best] != value)
+    right = np.flatnonzero(quiet[best:] != value)
+    start = int(left[-1]) + 1 if len(left) else 0
+    end = best + int(right[0]) - 1 if len(right) else len(quiet) - 1
+    return lo + (start + end) // 2
+
+
+def content_defined_chunks(audio: Any, chunk_seconds: float = 30.0) -> List[Tuple[int, int]]:
+    """Split a waveform into chunks whose boundaries are chosen by the audio itself.
+
+    Cut points are the quietest spots of the recording (minima of 100 ms
+    energy within +/- chunk_seconds/2), refined to an exact sample with
+    _refine_cut. Because the cut positions depend only on local content, an
+    edit only changes the chunks it touches; chunks before and after it keep
+    identical samples and can be matched by fingerprint even when they moved
+    in time.
+
+    Args:
+        audio: 16 kHz float32 waveform.
+        chunk_seconds: Target chunk length; chunks are at most 2x this long.
+
+    Returns:
+        List of (start_sample, end_sample) covering the whole waveform.
+    """
+    import numpy as np
+
+    total = len(audio)
+    min_len = int(chunk_seconds * SAMPLE_RATE / 4)
+    max_len = int(chunk_seconds * SAMPLE_RATE * 2)
+    if total <= max_len:
+        return [(0, total)] if total else []
+
+    frame = SAMPLE_RATE // 100  # 10 ms
+    n = total // frame
+    frames = audio[: n * frame].reshape(n, frame)
+    energy = np.einsum("ij,ij->i", frames, frames)
+    smooth = np.convolve(energy, np.ones(10), mode="same")
+    is_min = smooth <= _sliding_min(smooth, max(1, int(chunk_seconds * 50)))
+    # One candidate per run of minimal frames (the run's center)
+    edges = np.diff(np.concatenate(([0], is_min.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    candidates = (run_starts + run_ends) // 2 * frame + frame // 2
+
+    bounds: List[Tuple[int, int]] = []
+    start = 0
+    while total - start > max_len:
+        idx = int(np.searchsorted(candidates, start + min_len))
+        if idx < len(candidates) and candidates[idx] <= start + max_len:
+            cut = _refine_cut(audio, int(candidates[idx]), search=SAMPLE_RATE // 4, extent=5 * SAMPLE_RATE)
+        else:
+            cut = start + max_len
+        cut = min(max(cut, start + 1), total)
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, total))
+    return bounds
+
+
+def chunk_fingerprint(samples: Any) -> str:
+    """Fingerprint of a chunk's decoded samples."""
+    return hashlib.blake2b(samples.tobytes(), digest_size=20).hexdigest()
+
+
+def transcribe_incremental(
+    audio_path: str,
+    cache: TranscriptCache,
+    model_name: str = "base",
+    language: Optional[str] = None,
+    batch_size: int = 8,
+    align: bool = True,
+    device: str = "cpu",
+    vad_filter: bool = True,
+    chunk_seconds: float = 30.0,
+    model: Optional[Any] = None,
+    align_workers: int = 1,
+    compute_type: Optional[str] = None,
+    threads: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    vad_prepass: bool = False,
+    audio_track: Optional[str] = None,
+) -> List[TranscriptSegment]:
+    """Transcribe a file chunk by chunk, re-using cached chunks from earlier runs.
+
+    The audio is split with content_defined_chunks and every chunk is looked
+    up in ``cache`` by its sample fingerprint. Only new or changed chunks are
+    transcribed and aligned; cached chunks are stored with chunk-relative
+    timestamps and shifted to wherever the chunk sits now. For an edited or
+    appended recording the work is proportional to the edit, not the file.
+
+    Note that a lossy re-encode changes every decoded sample, so only edits
+    exported losslessly (or appends to a growing file) benefit.
+
+    Args:
+        audio_path: Path to the audio file to transcribe.
+        cache: Transcript cache holding the per-chunk results.
+        model_name: Whisper model size.
+        language: Language code. If None, detected on the first transcribed
+            chunk and reused for the rest of the file.
+        batch_size: Batch size for processing.
+        align: If True, perform word-level forced alignment.
+        device: Device to use ("cpu" or "cuda").
+        vad_filter: If True, use VAD to filter non-speech segments.
+        chunk_seconds: Target chunk length.
+        model: Already loaded ASR model (loaded lazily on the first miss otherwise).
+        align_workers: Number of CPU processes used for alignment.
+        compute_type: CTranslate2 compute type (default: int8 on CPU, float16 on CUDA).
+        threads: CTranslate2 CPU threads.
+        progress: Callback receiving stage timing and progress events.
+        vad_prepass: Detect speech per chunk and skip silent chunks.
+        audio_track: Audio track index or language tag of a video input.
+
+    Returns:
+        List of TranscriptSegment objects.
+    """
+    if not os.path.exists(audio_path):
+        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+    with emit_stage(progress, "decode"):
+        audio = load_audio(audio_path, audio_track)
+    with emit_stage(progress, "chunking"):
+        bounds = content_defined_chunks(audio, chunk_seconds)
+    effective_compute_type = compute_type or default_compute_type(device)
+    align_models: Dict[str, Tuple[Any, Any]] = {}
+    detected = language
+
+    segments: List[TranscriptSegment] = []
+    reused_chunks = 0
+    reused_samples = 0
+    # Same result-changing options as the whole-file key, so the two caches cannot diverge
+    options = result_options(vad_prepass, audio_track=audio_track)
+    for start, end in bounds:
+        chunk = audio[start:end]
+        key = cache.options_key(
+            "chunk:" + chunk_fingerprint(chunk),
+            model_name,
+            language,
+            align,
+            vad_filter,
+            effective_compute_type,
+            **options,
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            chunk_segments, chunk_language = cached
+            reused_chunks += 1
+            reused_samples += end - start
+        else:
+            if model is None:
+                with emit_stage(progress, "model_load", model=model_name):
+                    model = load_asr_model(
+                        model_name,
+                        device=device,
+                        vad_filter=vad_filter,
+                        compute_type=compute_type,
+                        threads=threads,
+                    )
+            chunk_segments, chunk_language = _transcribe(
+                f"{audio_path} [{format_timestamp(start / SAMPLE_RATE)} - {format_timestamp(end / SAMPLE_RATE)}]",
+                language=detected,
+                batch_size=batch_size,
+                align=align,
+                device=device,
+                vad_filter=vad_filter,
+                model=model,
+                audio=chunk,
+                align_models=align_models,
+                align_workers=align_workers,
+                progress=progress,
+                vad_prepass=vad_prepass,
+            )
+            cache.put(key, chunk_segments, chunk_language)
+        detected = detected or chunk_language
+        segments.extend(shift_segments(chunk_segments, start / SAMPLE_RATE))
+
+    reused_ratio = reused_samples / len(audio) if len(audio) else 1.0
+    print(f"Reused {reused_chunks}/{len(bounds)} cached chunks ({reused_ratio:.0%} of audio)")
+    return segments
@@ -0,0 +1,210 @@
+"""
+Media inputs: finding files, and decoding their audio to 16 kHz mono.
+
+Audio is decoded by an ffmpeg pipe straight into memory, either whole
+(load_audio) or as overlapping windows of bounded size
+(stream_audio_windows); video streams are never decoded.
+"""
+
+import glob
+import os
+import re
+import subprocess
+import tempfile
+from typing import Any, Iterator, List, Optional, Tuple
+
+
+# WhisperX decodes everything to 16 kHz mono float32
+SAMPLE_RATE = 16000
+
+
+MEDIA_EXTENSIONS = {
+    # audio
+    ".mp3", ".wav", ".flac", ".m4a", ".ogg", ".opus", ".aac", ".wma",
+    # video
+    ".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".m4v",
+    ".ts", ".mts", ".m2ts", ".wmv", ".mpg", ".mpeg", ".3gp", ".mxf",
+}
+
+
+def is_url(source: str) -> bool:
+    """Whether an input is a URL (handed to ffmpeg as is) rather than a path."""
+    return re.match(r"^[a-zA-Z][a-zA-Z0-9+.-]*://", source) is not None
+
+
+def resolve_source(source: str) -> str:
+    """Turn ``file://`` URLs into local paths; other inputs are returned unchanged."""
+    if source.startswith("file://"):
+        from urllib.parse import unquote, urlparse
+        from urllib.request import url2pathname
+
+        return url2pathname(unquote(urlparse(source).path))
+    return source
+
+
+def audio_track_index(source: str, language: str) -> int:
+    """Index (among the audio tracks) of the first audio track tagged with a language.
+
+    Raises:
+        RuntimeError: If ffprobe fails or no audio track has that language.
+    """
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "a",
+            "-show_entries", "stream_tags=language", "-of", "csv=p=0", source,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to probe audio tracks: {result.stderr.strip()}")
+    languages = [line.strip().lower() for line in result.stdout.splitlines()]
+    if language.lower() not in languages:
+        found = ", ".join(lang or "untagged" for lang in languages) or "none"
+        raise RuntimeError(f"No audio track with language {language!r} in {source} (tracks: {found})")
+    return languages.index(language.lower())
+
+
+def ffmpeg_decode_cmd(source: str, audio_track: Optional[str] = None) -> List[str]:
+    """ffmpeg command decoding one audio track to 16 kHz mono s16le on stdout.
+
+    Args:
+        source: Audio/video file or URL.
+        audio_track: Audio track to use: an index among the audio tracks
+            ("0" is the first) or a language tag such as "eng", which selects
+            the first track with that language. None lets ffmpeg pick the
+            default track.
+    """
+    cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-threads", "0", "-i", source]
+    if audio_track is not None:
+        index = audio_track if audio_track.isdigit() else audio_track_index(source, audio_track)
+        cmd += ["-map", f"0:a:{index}"]
+    # Only the audio track is demuxed and decoded; video frames are never touched
+    cmd += ["-vn", "-sn", "-dn", "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"]
+    return cmd
+
+
+def load_audio(source: str, audio_track: Optional[str] = None) -> Any:
+    """Decode an audio track of any media file or URL straight into memory.
+
+    Video containers are demuxed and resampled to 16 kHz mono float32 in a
+    single ffmpeg pipe, so no intermediate audio file is needed.
+
+    Args:
+        source: Audio/video file or URL.
+        audio_track: Audio track index or language tag (see ffmpeg_decode_cmd).
+
+    Returns:
+        16 kHz mono float32 waveform.
+    """
+    import numpy as np
+
+    result = subprocess.run(ffmpeg_decode_cmd(source, audio_track), capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to load audio: {result.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def stream_audio_windows(
+    audio_path: str,
+    window_seconds: float = 120.0,
+    overlap_seconds: float = 10.0,
+    audio_track: Optional[str] = None,
+) -> Iterator[Tuple[float, Any, bool]]:
+    """Decode audio through an ffmpeg pipe and yield overlapping windows.
+
+    Only one window (plus the overlap carried into the next) is held in
+    memory, so peak memory does not depend on the recording's duration.
+
+    Args:
+        audio_path: Path to the audio/video file, or a URL.
+        window_seconds: Length of each window.
+        overlap_seconds: Audio shared between consecutive windows.
+        audio_track: Audio track index or language tag (see ffmpeg_decode_cmd).
+
+    Yields:
+        Tuples of (window start in seconds, 16 kHz float32 waveform, is_last).
+    """
+    import numpy as np
+
+    if overlap_seconds >= window_seconds:
+        raise ValueError("overlap_seconds must be smaller than window_seconds")
+    if not is_url(audio_path) and not os.path.exists(audio_path):
+        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+    window = int(window_seconds * SAMPLE_RATE)
+    step = window - int(overlap_seconds * SAMPLE_RATE)
+    cmd = ffmpeg_decode_cmd(audio_path, audio_track)
+    # stderr goes to a temp file so a chatty ffmpeg can never block on a full pipe
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            buffer = np.zeros(0, dtype=np.float32)
+            offset = 0
+            while True:
+                need = window - len(buffer)
+                raw = proc.stdout.read(need * 2)
+                is_last = len(raw) < need * 2
+                raw = raw[: len(raw) - len(raw) % 2]
+                chunk = np.frombuffer(raw, np.int16).astype(np.float32) / 32768.0
+                buffer = np.concatenate([buffer, chunk])
+                if is_last and proc.wait() != 0 and offset == 0 and not len(buffer):
+                    stderr.seek(0)
+                    error = stderr.read().decode(errors="replace").strip()
+                    raise RuntimeError(f"Failed to load audio: {error}")
+                if len(buffer):
+                    yield offset / SAMPLE_RATE, buffer, is_last
+                if is_last:
+                    break
+                buffer = buffer[step:].copy()
+                offset += step
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            proc.stdout.close()
+
+
+def expand_inputs(inputs: List[str], extensions: Optional[set] = None) -> List[str]:
+    """Expand directories, glob patterns and @list files into media file paths.
+
+    Args:
+        inputs: Paths to files or directories, glob patterns, ``file://`` or
+            other URLs, or ``@file`` references to a text file with one path
+            per line.
+        extensions: File extensions picked from directories and globs
+            (default: MEDIA_EXTENSIONS).
+
+    Returns:
+        De-duplicated list of file paths, in input order.
+    """
+    extensions = extensions or MEDIA_EXTENSIONS
+    paths: List[str] = []
+    for item in inputs:
+        if item.startswith("@"):
+            with open(item[1:], encoding="utf-8") as f:
+                listed = [line.strip() for line in f]
+            paths.extend(expand_inputs([p for p in listed if p and not p.startswith("#")], extensions))
+        elif os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in extensions:
+                        paths.append(os.path.join(root, name))
+        elif glob.has_magic(item):
+            paths.extend(
+                p
+                for p in sorted(glob.glob(item, recursive=True))
+                if os.path.isfile(p) and os.path.splitext(p)[1].lower() in extensions
+            )
+        else:
+            paths.append(resolve_source(item))
+
+    seen = set()
+    unique = []
+    for p in paths:
+        key = p if is_url(p) else os.path.abspath(p)
+        if key not in seen:
+            seen.add(key)
+            unique.append(p)
+    return unique
@@ -0,0 +1,96 @@
+"""
+Structured progress and timing events.
+
+Transcription functions take an optional ProgressCallback and report stage
+start/end (with seconds and peak RSS) and progress with an ETA through it;
+jsonl_metrics writes the events as JSON lines for ``--metrics``.
+"""
+
+import contextlib
+import json
+import sys
+import threading
+import time
+from typing import IO, Any, Callable, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Receives structured progress/timing events (see emit_stage)
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+@contextlib.contextmanager
+def emit_stage(progress: Optional[ProgressCallback], stage: str, **fields: Any) -> Iterator[None]:
+    """Time a stage and report it to ``progress``.
+
+    Emits ``{"event": "stage_start", ...}`` on entry and ``{"event":
+    "stage_end", "seconds": ..., "peak_rss_mb": ...}`` on exit; the RSS
+    value is the process high-water mark at the end of the stage.
+    """
+    if progress is None:
+        yield
+        return
+    progress({"event": "stage_start", "stage": stage, **fields})
+    start = time.perf_counter()
+    yield
+    progress(
+        {
+            "event": "stage_end",
+            "stage": stage,
+            "seconds": round(time.perf_counter() - start, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            **fields,
+        }
+    )
+
+
+def emit_progress(
+    progress: Optional[ProgressCallback],
+    stage: str,
+    done: float,
+    total: float,
+    started: float,
+    audio_seconds: Optional[float] = None,
+    **fields: Any,
+) -> None:
+    """Report ``done`` of ``total`` units (segments, or percent for ASR) with an ETA."""
+    if progress is None or total <= 0:
+        return
+    elapsed = time.perf_counter() - started
+    event: Dict[str, Any] = {
+        "event": "progress",
+        "stage": stage,
+        "done": done,
+        "total": total,
+        "elapsed_seconds": round(elapsed, 3),
+        "eta_seconds": round(elapsed * (total - done) / done, 1) if done else None,
+        **fields,
+    }
+    if audio_seconds is not None:
+        event["audio_seconds"] = round(audio_seconds, 3)
+    progress(event)
+
+
+def jsonl_metrics(stream: IO[str]) -> ProgressCallback:
+    """Progress callback writing each event as a timestamped JSON line."""
+    lock = threading.Lock()
+
+    def emit(event: Dict[str, Any]) -> None:
+        with lock:
+            stream.write(json.dumps({"ts": round(time.time(), 3), **event}, ensure_ascii=False) + "\n")
+            stream.flush()
+
+    return emit
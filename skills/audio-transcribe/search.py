@@ -0,0 +1,239 @@
+"""
+Full-text search over saved transcripts (``transcribe.py index`` and
+``transcribe.py search``).
+
+Transcripts are indexed into a SQLite table of word positions, so phrase and
+prefix queries return the file and the start/end time of every match.
+Unchanged files are skipped when re-indexing and deleted ones are dropped.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+from cache import CACHE_DIR
+from formats import TranscriptSegment, format_timestamp, load_transcript
+from media import expand_inputs
+
+
+# Transcript outputs that can be indexed for search
+TRANSCRIPT_EXTENSIONS = {".json", ".jsonl", ".npz"}
+
+
+INDEX_PATH = os.path.join(CACHE_DIR, "search.sqlite")
+
+
+# Latin/Cyrillic/... words (with inner apostrophes), or single CJK characters,
+# which is also how whisperx aligns Chinese/Japanese text
+_TERM_RE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]|[^\W_]+(?:'[^\W_]+)*")
+
+
+def index_terms(text: str) -> List[str]:
+    """Normalised search terms of a word or query (lowercase, NFKC, no punctuation)."""
+    import unicodedata
+
+    return _TERM_RE.findall(unicodedata.normalize("NFKC", text).lower())
+
+
+class TranscriptIndex:
+    """Persistent inverted index over transcript files, stored in SQLite.
+
+    Every term of every aligned word is a posting (term, file, position,
+    segment, start, end), clustered by term so exact and prefix lookups are
+    index range scans. Positions are consecutive per file, so a phrase is a
+    chain of postings at position p, p + 1, ... Segments without word
+    timestamps are indexed from their text with segment times.
+
+    ``update`` is incremental: files whose size and mtime are unchanged are
+    skipped and files that no longer exist are dropped.
+    """
+
+    def __init__(self, path: str = INDEX_PATH):
+        import sqlite3
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, size INTEGER, mtime_ns INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS segments (
+                file_id INTEGER, seg INTEGER, start REAL, end REAL, text TEXT, speaker TEXT,
+                PRIMARY KEY (file_id, seg)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT, file_id INTEGER, pos INTEGER, seg INTEGER, start REAL, end REAL,
+                PRIMARY KEY (term, file_id, pos)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id);
+            """
+        )
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "TranscriptIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _remove(self, file_id: int) -> None:
+        self.db.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+        self.db.execute("DELETE FROM segments WHERE file_id = ?", (file_id,))
+        self.db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def add(self, path: str, segments: Iterable[TranscriptSegment]) -> int:
+        """(Re)index one transcript file; returns the number of postings."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self.db:
+            row = self.db.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+            if row:
+                self._remove(row[0])
+            file_id = self.db.execute(
+                "INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)", (path, st.st_size, st.st_mtime_ns)
+            ).lastrowid
+            seg_rows = []
+            postings = []
+            pos = 0
+            for i, seg in enumerate(segments):
+                seg_rows.append((file_id, i, seg.start_at, seg.end_at, seg.text, seg.speaker))
+                timed = [(w.word, w.start, w.end) for w in seg.words] or [(seg.text, seg.start_at, seg.end_at)]
+                for text, start, end in timed:
+                    for term in index_terms(text):
+                        postings.append((term, file_id, pos, i, start, end))
+                        pos += 1
+            self.db.executemany("INSERT INTO segments VALUES (?, ?, ?, ?, ?, ?)", seg_rows)
+            self.db.executemany("INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?)", postings)
+        return len(postings)
+
+    def update(self, paths: List[str]) -> Dict[str, int]:
+        """Index new or changed files and drop deleted ones.
+
+        Returns:
+            Counts of indexed, unchanged, failed and removed files.
+        """
+        known = {path: (file_id, size, mtime) for file_id, path, size, mtime in self.db.execute(
+            "SELECT id, path, size, mtime_ns FROM files"
+        )}
+        stats = {"indexed": 0, "unchanged": 0, "failed": 0, "removed": 0}
+        for path in paths:
+            abspath = os.path.abspath(path)
+            try:
+                st = os.stat(abspath)
+            except OSError:
+                continue  # deleted since it was listed; dropped from the index below
+            if abspath in known and known[abspath][1:] == (st.st_size, st.st_mtime_ns):
+                stats["unchanged"] += 1
+                continue
+            try:
+                segments = load_transcript(abspath)
+                postings = self.add(abspath, segments)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"[Warning] Skipping {path}: not a transcript ({e})")
+                stats["failed"] += 1
+                continue
+            print(f"Indexed: {path} ({len(segments)} segments, {postings} terms)")
+            stats["indexed"] += 1
+        with self.db:
+            for path, (file_id, _, _) in known.items():
+                if not os.path.exists(path):
+                    self._remove(file_id)
+                    stats["removed"] += 1
+        return stats
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Find a phrase; a trailing ``*`` on a query word matches it as a prefix.
+
+        Returns:
+            Hits ordered by file and time, each with the file path, start/end of
+            the matched words and the text of the segment they start in.
+        """
+        words = query.split()
+        terms: List[Tuple[str, bool]] = []
+        for word in words:
+            prefix = word.endswith("*")
+            found = index_terms(word)
+            terms.extend((t, False) for t in found[:-1])
+            if found:
+                terms.append((found[-1], prefix))
+        if not terms:
+            return []
+
+        joins, where, params = [], [], []
+        for i, (term, prefix) in enumerate(terms):
+            if i:
+                joins.append(f"JOIN postings p{i} ON p{i}.file_id = p0.file_id AND p{i}.pos = p0.pos + {i}")
+            if prefix:
+                where.append(f"p{i}.term >= ? AND p{i}.term < ?")
+                params += [term, term + "\U0010ffff"]
+            else:
+                where.append(f"p{i}.term = ?")
+                params.append(term)
+        last = len(terms) - 1
+        sql = (
+            f"SELECT f.path, p0.start, p{last}.end, s.text, s.speaker FROM postings p0 {' '.join(joins)} "
+            f"JOIN files f ON f.id = p0.file_id "
+            f"JOIN segments s ON s.file_id = p0.file_id AND s.seg = p0.seg "
+            f"WHERE {' AND '.join(where)} ORDER BY f.path, p0.start LIMIT ?"
+        )
+        return [
+            {"file": path, "start": start, "end": end, "text": text, "speaker": speaker}
+            for path, start, end, text, speaker in self.db.execute(sql, [*params, limit])
+        ]
+
+
+def index_main(argv: List[str]) -> None:
+    """CLI entry point for ``transcribe.py index``."""
+    parser = argparse.ArgumentParser(
+        prog="transcribe.py index",
+        description="Add transcript files (.json/.jsonl/.npz) to the search index; unchanged files are skipped",
+    )
+    parser.add_argument("inputs", nargs="+", help="Transcript files, directories, glob patterns or @list files")
+    parser.add_argument("--index", default=INDEX_PATH, help=f"Index database (default: {INDEX_PATH})")
+    args = parser.parse_args(argv)
+
+    paths = [p for p in expand_inputs(args.inputs, TRANSCRIPT_EXTENSIONS) if os.path.isfile(p)]
+    started = time.perf_counter()
+    with TranscriptIndex(args.index) as index:
+        stats = index.update(paths)
+    print(
+        f"\n{stats['indexed']} indexed, {stats['unchanged']} unchanged, {stats['failed']} skipped, "
+        f"{stats['removed']} removed in {time.perf_counter() - started:.1f}s -> {args.index}"
+    )
+
+
+def search_main(argv: List[str]) -> None:
+    """CLI entry point for ``transcribe.py search``."""
+    parser = argparse.ArgumentParser(
+        prog="transcribe.py search",
+        description="Search indexed transcripts for a phrase (end a word with * for prefix matching)",
+    )
+    parser.add_argument("query", help='Phrase to find, e.g. "machine learn*"')
+    parser.add_argument("--index", default=INDEX_PATH, help=f"Index database (default: {INDEX_PATH})")
+    parser.add_argument("--limit", "-n", type=int, default=20, help="Maximum number of hits (default: 20)")
+    parser.add_argument("--json", action="store_true", help="Print hits as JSON Lines")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.index):
+        parser.error(f"no index at {args.index}; run 'transcribe.py index' first")
+    started = time.perf_counter()
+    with TranscriptIndex(args.index) as index:
+        hits = index.search(args.query, args.limit)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    for hit in hits:
+        if args.json:
+            print(json.dumps(hit, ensure_ascii=False))
+        else:
+            speaker = f" [{hit['speaker']}]" if hit["speaker"] else ""
+            print(f"{hit['file']} [{format_timestamp(hit['start'])} - {format_timestamp(hit['end'])}]{speaker} {hit['text']}")
+    if not args.json:
+        print(f"\n{len(hits)} hits in {elapsed_ms:.1f} ms")
@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from engine import shard_segments  # noqa: E402
+from formats import TranscriptSegment  # noqa: E402
+
+
+def segments(durations):
+    result, t = [], 0.0
+    for d in durations:
+        result.append(TranscriptSegment(t, t + d, "", []))
+        t += d
+    return result
+
+
+def test_shards_are_contiguous_and_keep_order():
+    segs = segments([3, 1, 4, 1, 5, 9, 2, 6, 5, 3])
+    shards = shard_segments(segs, 4)
+    assert len(shards) == 4
+    assert [seg for shard in shards for seg in shard] == segs
+
+
+def test_shards_balance_duration():
+    segs = segments([1] * 40)
+    assert [len(shard) for shard in shard_segments(segs, 4)] == [10, 10, 10, 10]
+
+
+def test_more_shards_than_segments():
+    segs = segments([2, 2, 2])
+    assert [len(shard) for shard in shard_segments(segs, 8)] == [1, 1, 1]
+
+
+def test_zero_length_segments():
+    segs = [TranscriptSegment(1.0, 1.0, "", []) for _ in range(6)]
+    shards = shard_segments(segs, 3)
+    assert [len(shard) for shard in shards] == [2, 2, 2]
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from incremental import chunk_fingerprint, content_defined_chunks  # noqa: E402
+from media import SAMPLE_RATE  # noqa: E402
+
+np = pytest.importorskip("numpy")
+
+
+def speech_like(seconds: float, seed: int = 0):
+    """Noise bursts of 2-15 s separated by 0.3-1.5 s of near silence."""
+    rng = np.random.default_rng(seed)
+    pieces, total = [], 0
+    while total < seconds * SAMPLE_RATE:
+        burst = rng.normal(0, 0.2, int(rng.uniform(2, 15) * SAMPLE_RATE))
+        pause = rng.normal(0, 0.001, int(rng.uniform(0.3, 1.5) * SAMPLE_RATE))
+        pieces += [burst, pause]
+        total += len(burst) + len(pause)
+    return np.concatenate(pieces)[: int(seconds * SAMPLE_RATE)].astype(np.float32)
+
+
+def test_short_and_empty_audio():
+    assert content_defined_chunks(np.zeros(0, dtype=np.float32)) == []
+    audio = speech_like(40)
+    assert content_defined_chunks(audio) == [(0, len(audio))]
+
+
+def test_chunks_cover_the_waveform():
+    audio = speech_like(300)
+    chunks = content_defined_chunks(audio, chunk_seconds=30)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(audio)
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+    assert all(0 < end - start <= 60 * SAMPLE_RATE for start, end in chunks)
+    assert len(chunks) > 3
+
+
+def test_edit_only_changes_nearby_chunks():
+    audio = speech_like(300)
+    edited = np.concatenate([speech_like(7.3, seed=1), audio])
+
+    def fingerprints(samples):
+        return [chunk_fingerprint(samples[start:end]) for start, end in content_defined_chunks(samples)]
+
+    before, after = fingerprints(audio), fingerprints(edited)
+    # Everything after the first couple of chunks is found again, shifted in time
+    assert set(before[2:]) <= set(after)
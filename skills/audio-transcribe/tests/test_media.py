@@ -0,0 +1,28 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from media import audio_track_index, ffmpeg_decode_cmd  # noqa: E402
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+def test_language_tag_maps_exactly_one_track(tmp_path):
+    source = str(tmp_path / "dub.mkv")
+    cmd = ["ffmpeg", "-v", "error", "-y"]
+    for freq in (440, 880, 220):
+        cmd += ["-f", "lavfi", "-i", f"sine={freq}:d=1"]
+    cmd += ["-map", "0", "-map", "1", "-map", "2"]
+    for i, language in enumerate(("eng", "jpn", "jpn")):
+        cmd += [f"-metadata:s:a:{i}", f"language={language}"]
+    subprocess.run([*cmd, source], check=True)
+
+    assert audio_track_index(source, "JPN") == 1
+    decode = ffmpeg_decode_cmd(source, "jpn")
+    assert decode[decode.index("-map") + 1] == "0:a:1"
+    assert decode.count("-map") == 1
+    with pytest.raises(RuntimeError, match="fre"):
+        audio_track_index(source, "fre")
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from formats import TranscriptSegment, TranscriptWord  # noqa: E402
+from media import SAMPLE_RATE  # noqa: E402
+from vad import compact_speech, remap_segments  # noqa: E402
+
+
+def test_remap_segments():
+    # Two kept spans: 10-15 s at 0 s and 30-34 s at 5.5 s of the compact audio
+    mapping = [(0.0, 10.0, 5.0), (5.5, 30.0, 4.0)]
+    segments = [
+        TranscriptSegment(1.0, 6.0, "hello there", [TranscriptWord("hello", 1.0, 1.5, 0.9, "A")], speaker="A"),
+    ]
+    [seg] = remap_segments(segments, mapping)
+    assert (seg.start_at, seg.end_at) == (11.0, 30.5)
+    assert (seg.words[0].start, seg.words[0].end, seg.words[0].speaker) == (11.0, 11.5, "A")
+    assert (seg.text, seg.speaker) == ("hello there", "A")
+
+
+def test_remap_clamps_times_in_the_joining_gap():
+    mapping = [(0.0, 10.0, 5.0), (5.5, 30.0, 4.0)]
+    [seg] = remap_segments([TranscriptSegment(5.2, 5.4, "", [])], mapping)
+    assert seg.start_at == seg.end_at == 15.0
+
+
+def test_compact_speech_round_trip():
+    np = pytest.importorskip("numpy")
+    audio = np.arange(60 * SAMPLE_RATE, dtype=np.float32)
+    compact, mapping = compact_speech(audio, [(40.0, 45.0), (10.0, 12.0), (12.2, 13.0)])
+    # Touching regions are merged; spans keep their order
+    assert [round(original, 2) for _, original, _ in mapping] == [9.75, 39.75]
+    for t in (0.5, 2.0, 4.0, 6.0, 9.0):
+        [seg] = remap_segments([TranscriptSegment(t, t, "", [])], mapping)
+        assert compact[int(t * SAMPLE_RATE)] == audio[int(round(seg.start_at * SAMPLE_RATE))]
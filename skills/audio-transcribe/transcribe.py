@@ -16,247 +16,57 @@ Audio transcription using WhisperX with word-level timestamps.
 
 Usage:
     uv run transcribe.py <audio_file> [options]
+    uv run transcribe.py <dir|glob|@list.txt> [...] --output-dir DIR [options]
 
 Examples:
     uv run transcribe.py audio.mp3
     uv run transcribe.py audio.mp3 --model medium --language zh
     uv run transcribe.py audio.mp3 --no-align --output transcript.json
+    uv run transcribe.py movie.mkv --audio-track jpn -f srt -o movie.srt
+    uv run transcribe.py index transcripts/
+    uv run transcribe.py search "machine learn*"
+    uv run transcribe.py interviews/ -f srt --output-dir transcripts/
 """
 
 import argparse
-import json
+import contextlib
 import os
-from dataclasses import asdict, dataclass
+import sys
+import time
 from typing import List, Optional
 
-
-@dataclass
-class TranscriptWord:
-    """A single word with timestamp."""
-
-    word: str
-    start: float
-    end: float
-    score: float
-
-
-@dataclass
-class TranscriptSegment:
-    """A transcript segment with optional word-level timestamps."""
-
-    start_at: float
-    end_at: float
-    text: str
-    words: List[TranscriptWord]
-
-
-def transcribe_audio(
-    audio_path: str,
-    model_name: str = "base",
-    language: Optional[str] = None,
-    batch_size: int = 8,
-    align: bool = True,
-    device: str = "cpu",
-    vad_filter: bool = True,
-) -> List[TranscriptSegment]:
-    """Transcribe audio file using WhisperX with optional word-level timestamps.
-
-    Args:
-        audio_path: Path to the audio file to transcribe.
-        model_name: Whisper model size ("tiny", "base", "small", "medium", "large-v2").
-        language: Language code (e.g., "en", "zh"). If None, auto-detect.
-        batch_size: Batch size for processing.
-        align: If True, perform word-level forced alignment.
-        device: Device to use ("cpu" or "cuda").
-        vad_filter: If True, use VAD to filter non-speech segments.
-
-    Returns:
-        List of TranscriptSegment objects.
-    """
-    import whisperx
-
-    if not os.path.exists(audio_path):
-        raise FileNotFoundError(f"Audio file not found: {audio_path}")
-
-    compute_type = "int8" if device == "cpu" else "float16"
-    asr_options = {"suppress_numerals": False}
-
-    print(f"Loading WhisperX model: {model_name} (device={device})")
-
-    # VAD options - lower onset/offset = more sensitive (catches more speech)
-    vad_options = None
-    if not vad_filter:
-        # Very low thresholds to catch almost everything
-        vad_options = {"vad_onset": 0.1, "vad_offset": 0.1}
-
-    model = whisperx.load_model(
-        model_name,
-        device=device,
-        compute_type=compute_type,
-        asr_options=asr_options,
-        vad_options=vad_options,
-    )
-
-    print(f"Transcribing: {audio_path}")
-    if not vad_filter:
-        print("VAD filter disabled - processing all audio segments")
-    audio = whisperx.load_audio(audio_path)
-    result = model.transcribe(audio, batch_size=batch_size, language=language)
-
-    detected_language = result.get("language", "en")
-    print(f"Detected language: {detected_language}")
-    print(f"Found {len(result['segments'])} segments")
-
-    # Convert to TranscriptSegment (without word-level timestamps)
-    segments: List[TranscriptSegment] = []
-    for seg in result["segments"]:
-        segments.append(
-            TranscriptSegment(
-                start_at=float(seg["start"]),
-                end_at=float(seg["end"]),
-                text=seg["text"].strip(),
-                words=[],
-            )
-        )
-
-    # Perform word-level alignment if requested
-    if align:
-        segments = align_segments(segments, audio_path, detected_language, device)
-
-    return segments
-
-
-def align_segments(
-    segments: List[TranscriptSegment],
-    audio_path: str,
-    language: str,
-    device: str = "cpu",
-) -> List[TranscriptSegment]:
-    """Align transcript segments to get word-level timestamps.
-
-    Args:
-        segments: List of TranscriptSegment objects to align.
-        audio_path: Path to the audio file.
-        language: Language code.
-        device: Device to use.
-
-    Returns:
-        List of TranscriptSegment with word-level timestamps.
-    """
-    import whisperx
-
-    print("Loading alignment model...")
-    model_a, metadata = whisperx.load_align_model(language_code=language, device=device)
-
-    # Convert to whisperx format
-    whisperx_segments = [
-        {"start": seg.start_at, "end": seg.end_at, "text": seg.text} for seg in segments
-    ]
-
-    print("Aligning transcription for word-level timestamps...")
-    audio = whisperx.load_audio(audio_path)
-    aligned_result = whisperx.align(
-        whisperx_segments,
-        model_a,
-        metadata,
-        audio,
-        device,
-        return_char_alignments=False,
-    )
-
-    # Convert back to TranscriptSegment with words
-    aligned_segments: List[TranscriptSegment] = []
-    for seg in aligned_result["segments"]:
-        words = []
-        for w in seg.get("words", []):
-            if "start" in w and "end" in w:
-                words.append(
-                    TranscriptWord(
-                        word=w["word"],
-                        start=float(w["start"]),
-                        end=float(w["end"]),
-                        score=float(w.get("score", 0.0)),
-                    )
-                )
-
-        aligned_segments.append(
-            TranscriptSegment(
-                start_at=float(seg["start"]),
-                end_at=float(seg["end"]),
-                text=seg["text"].strip(),
-                words=words,
-            )
-        )
-
-    total_words = sum(len(seg.words) for seg in aligned_segments)
-    print(f"Aligned {total_words} words")
-
-    return aligned_segments
-
-
-def format_timestamp(seconds: float) -> str:
-    """Format seconds to HH:MM:SS.mmm"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{secs:06.3f}"
-
-
-def format_srt(segments: List[TranscriptSegment]) -> str:
-    """Format segments as SRT subtitle format."""
-    lines = []
-    for i, seg in enumerate(segments, 1):
-        start = format_timestamp(seg.start_at).replace(".", ",")
-        end = format_timestamp(seg.end_at).replace(".", ",")
-        lines.append(f"{i}")
-        lines.append(f"{start} --> {end}")
-        lines.append(seg.text)
-        lines.append("")
-    return "\n".join(lines)
-
-
-def format_vtt(segments: List[TranscriptSegment]) -> str:
-    """Format segments as WebVTT subtitle format."""
-    lines = ["WEBVTT", ""]
-    for seg in segments:
-        start = format_timestamp(seg.start_at)
-        end = format_timestamp(seg.end_at)
-        lines.append(f"{start} --> {end}")
-        lines.append(seg.text)
-        lines.append("")
-    return "\n".join(lines)
-
-
-def format_txt(segments: List[TranscriptSegment]) -> str:
-    """Format segments as plain text with timestamps."""
-    lines = []
-    for seg in segments:
-        start = format_timestamp(seg.start_at)
-        end = format_timestamp(seg.end_at)
-        lines.append(f"[{start} - {end}] {seg.text}")
-    return "\n".join(lines)
-
-
-def format_json(segments: List[TranscriptSegment]) -> str:
-    """Format segments as JSON."""
-    data = []
-    for seg in segments:
-        seg_dict = {
-            "start": seg.start_at,
-            "end": seg.end_at,
-            "text": seg.text,
-        }
-        if seg.words:
-            seg_dict["words"] = [asdict(w) for w in seg.words]
-        data.append(seg_dict)
-    return json.dumps(data, ensure_ascii=False, indent=2)
+from autotune import autotune_main, resolve_settings
+from batch import transcribe_batch, write_batch_summary
+from cache import CACHE_DIR, TranscriptCache
+from diarize import Diarizer
+from engine import iter_transcribe_stream, transcribe_audio
+from formats import OUTPUT_FORMATS, StreamingWriter, write_transcript
+from incremental import transcribe_incremental
+from media import expand_inputs, is_url, resolve_source
+from metrics import ProgressCallback, emit_stage, jsonl_metrics
+from search import index_main, search_main
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "autotune":
+        autotune_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "index":
+        index_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "search":
+        search_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description="Transcribe audio using WhisperX with word-level timestamps"
     )
-    parser.add_argument("audio_file", help="Path to audio file")
+    parser.add_argument(
+        "audio_files",
+        nargs="+",
+        metavar="audio_file",
+        help="Audio/video file(s), directories, glob patterns or @list.txt files",
+    )
     parser.add_argument(
         "--model",
         "-m",
@@ -278,17 +88,39 @@ def main():
         action="store_true",
         help="Disable VAD filtering (use if transcription has gaps/missing segments)",
     )
+    parser.add_argument(
+        "--vad-prepass",
+        action="store_true",
+        help="Detect speech first and only transcribe speech spans; silent files skip the model entirely",
+    )
+    parser.add_argument(
+        "--audio-track",
+        default=None,
+        help="Audio track of video inputs: index among the audio tracks (0 = first) or language tag (e.g. eng, jpn)",
+    )
+    parser.add_argument(
+        "--diarize",
+        action="store_true",
+        help="Label segments and words with speakers (pyannote, runs alongside ASR)",
+    )
+    parser.add_argument(
+        "--hf-token",
+        default=os.environ.get("HF_TOKEN"),
+        help="Hugging Face token for the pyannote diarization model (default: $HF_TOKEN)",
+    )
+    parser.add_argument("--min-speakers", type=int, default=None, help="Diarization: minimum number of speakers")
+    parser.add_argument("--max-speakers", type=int, default=None, help="Diarization: maximum number of speakers")
     parser.add_argument(
         "--output",
         "-o",
         default=None,
-        help="Output file path. Format determined by extension (.srt, .vtt, .txt, .json)",
+        help="Output file path. Format determined by extension (.srt, .vtt, .txt, .json, .jsonl, .npz)",
     )
     parser.add_argument(
         "--format",
         "-f",
         default=None,
-        choices=["srt", "vtt", "txt", "json"],
+        choices=OUTPUT_FORMATS,
         help="Output format (overrides extension detection)",
     )
     parser.add_argument(
@@ -297,46 +129,303 @@ def main():
         choices=["cpu", "cuda"],
         help="Device to use (default: cpu)",
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="ASR batch size (default: autotuned, else 8)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="CTranslate2 CPU threads (default: autotuned, else whisperx default)",
+    )
+    parser.add_argument(
+        "--compute-type",
+        default=None,
+        help="CTranslate2 compute type, e.g. int8, float32, float16 (default: autotuned, else int8 on CPU)",
+    )
+    parser.add_argument(
+        "--align-workers",
+        type=int,
+        default=1,
+        help="CPU processes for word-level alignment (default: 1)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Cache per audio chunk and only re-transcribe chunks that changed (edited/appended audio)",
+    )
+    parser.add_argument(
+        "--chunk-seconds",
+        type=float,
+        default=30.0,
+        help="Incremental mode: target chunk length in seconds (default: 30)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the local transcript cache",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=CACHE_DIR,
+        help=f"Transcript cache directory (default: {CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=512,
+        help="Evict least recently used cache entries above this size (default: 512)",
+    )
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        help="Write stage timings and progress events as JSON lines to this file ('-' for stderr)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=None,
+        help="Batch mode: root of the mirrored output tree (default: next to each input)",
+    )
+    parser.add_argument(
+        "--summary",
+        default=None,
+        help="Batch mode: JSON summary path (default: <output-dir>/batch_summary.json)",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=2,
+        help="Batch mode: number of files decoded ahead in the background (default: 2)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Decode and transcribe in windows, appending segments to the output as they finish",
+    )
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=120.0,
+        help="Streaming mode: window length in seconds (default: 120)",
+    )
+    parser.add_argument(
+        "--overlap",
+        type=float,
+        default=10.0,
+        help="Streaming mode: overlap between windows in seconds (default: 10)",
+    )
 
     args = parser.parse_args()
-
-    # Transcribe
-    segments = transcribe_audio(
-        audio_path=args.audio_file,
-        model_name=args.model,
-        language=args.language,
-        align=not args.no_align,
-        device=args.device,
-        vad_filter=not args.no_vad,
+    if args.vad_prepass and args.no_vad:
+        parser.error("--vad-prepass cannot be combined with --no-vad")
+    if args.diarize and (args.stream or args.incremental):
+        # Speaker labels would not be consistent across windows/chunks
+        parser.error("--diarize cannot be combined with --stream or --incremental")
+    if args.diarize and not args.hf_token:
+        parser.error("--diarize needs a Hugging Face token (--hf-token or $HF_TOKEN)")
+    # Fill unset tuning options from the autotune profile
+    args.__dict__.update(
+        resolve_settings(args.model, args.device, args.batch_size, args.threads, args.compute_type)
     )
 
+    metrics_file = None
+    progress = None
+    if args.metrics == "-":
+        progress = jsonl_metrics(sys.stderr)
+    elif args.metrics:
+        metrics_file = open(args.metrics, "a", encoding="utf-8")
+        progress = jsonl_metrics(metrics_file)
+    try:
+        if args.diarize:
+            with Diarizer(args.hf_token, args.device, args.min_speakers, args.max_speakers) as diarizer:
+                run(parser, args, progress, diarizer)
+        else:
+            run(parser, args, progress)
+    finally:
+        if metrics_file is not None:
+            metrics_file.close()
+
+
+def run(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    progress: Optional[ProgressCallback] = None,
+    diarizer: Optional[Diarizer] = None,
+) -> None:
+    """Dispatch a parsed transcription command line to single/stream/batch mode."""
+    audio_files = expand_inputs(args.audio_files)
+    cache = None if args.no_cache else TranscriptCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    is_batch = len(audio_files) != 1 or resolve_source(args.audio_files[0]) != audio_files[0]
+    if is_batch:
+        if not audio_files:
+            parser.error("no media files matched the given inputs")
+        if any(is_url(p) for p in audio_files):
+            parser.error("remote URLs can only be transcribed one at a time")
+        if args.output:
+            parser.error("--output cannot be used with multiple inputs; use --output-dir")
+        run_batch(args, audio_files, cache, progress, diarizer)
+        return
+
     # Determine output format
     output_format = args.format
     if output_format is None and args.output:
         ext = os.path.splitext(args.output)[1].lower()
-        output_format = ext[1:] if ext else "txt"
+        output_format = ext[1:] if ext[1:] in OUTPUT_FORMATS else "txt"
     output_format = output_format or "txt"
+    if output_format == "npz" and (args.stream or not args.output):
+        parser.error("npz output needs --output and cannot be streamed")
 
-    # Format output
-    if output_format == "srt":
-        output = format_srt(segments)
-    elif output_format == "vtt":
-        output = format_vtt(segments)
-    elif output_format == "json":
-        output = format_json(segments)
+    if args.stream:
+        run_stream(args, audio_files[0], output_format, progress)
+        return
+
+    if args.incremental and is_url(audio_files[0]):
+        parser.error("--incremental needs a local file")
+    if args.incremental and cache is None:
+        parser.error("--incremental needs the transcript cache; remove --no-cache")
+
+    # Transcribe
+    if args.incremental:
+        segments = transcribe_incremental(
+            audio_files[0],
+            cache,
+            model_name=args.model,
+            language=args.language,
+            align=not args.no_align,
+            device=args.device,
+            vad_filter=not args.no_vad,
+            chunk_seconds=args.chunk_seconds,
+            align_workers=args.align_workers,
+            batch_size=args.batch_size,
+            compute_type=args.compute_type,
+            threads=args.threads,
+            progress=progress,
+            vad_prepass=args.vad_prepass,
+            audio_track=args.audio_track,
+        )
     else:
-        output = format_txt(segments)
+        segments = transcribe_audio(
+            audio_path=audio_files[0],
+            model_name=args.model,
+            language=args.language,
+            align=not args.no_align,
+            device=args.device,
+            vad_filter=not args.no_vad,
+            align_workers=args.align_workers,
+            cache=cache,
+            batch_size=args.batch_size,
+            compute_type=args.compute_type,
+            threads=args.threads,
+            progress=progress,
+            vad_prepass=args.vad_prepass,
+            diarizer=diarizer,
+            audio_track=args.audio_track,
+        )
 
     # Write or print output
     if args.output:
-        with open(args.output, "w", encoding="utf-8") as f:
-            f.write(output)
+        with emit_stage(progress, "write", format=output_format):
+            write_transcript(segments, args.output, output_format)
         print(f"\nTranscript saved to: {args.output}")
     else:
         print("\n" + "=" * 50)
         print("TRANSCRIPT")
         print("=" * 50)
-        print(output)
+        # Printed segment by segment, like files, instead of as one formatted string
+        with emit_stage(progress, "formatting", format=output_format):
+            writer = StreamingWriter(sys.stdout, output_format, flush=False)
+            for seg in segments:
+                writer.write(seg)
+            writer.close()
+
+
+def run_stream(
+    args: argparse.Namespace,
+    audio_path: str,
+    output_format: str,
+    progress: Optional[ProgressCallback] = None,
+) -> None:
+    """Transcribe one file in streaming mode, appending to the output as it goes."""
+    stream = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    if args.output:
+        print(f"Streaming transcript to: {args.output}")
+    # Keep stdout for the transcript alone when it is streamed there
+    diagnostics = contextlib.nullcontext() if args.output else contextlib.redirect_stdout(sys.stderr)
+    try:
+        writer = StreamingWriter(stream, output_format)
+        with diagnostics:
+            segments = iter_transcribe_stream(
+                audio_path,
+                model_name=args.model,
+                language=args.language,
+                align=not args.no_align,
+                device=args.device,
+                vad_filter=not args.no_vad,
+                window_seconds=args.window,
+                overlap_seconds=args.overlap,
+                align_workers=args.align_workers,
+                batch_size=args.batch_size,
+                compute_type=args.compute_type,
+                threads=args.threads,
+                progress=progress,
+                vad_prepass=args.vad_prepass,
+                audio_track=args.audio_track,
+            )
+            for seg in segments:
+                writer.write(seg)
+        writer.close()
+    finally:
+        if args.output:
+            stream.close()
+
+    if args.output:
+        print(f"\nTranscript saved to: {args.output} ({writer.count} segments)")
+
+
+def run_batch(
+    args: argparse.Namespace,
+    audio_files: List[str],
+    cache: Optional[TranscriptCache] = None,
+    progress: Optional[ProgressCallback] = None,
+    diarizer: Optional[Diarizer] = None,
+) -> None:
+    """Transcribe several files with one model load and write a JSON summary."""
+    output_format = args.format or "txt"
+    print(f"Batch mode: {len(audio_files)} files -> {args.output_dir or '(next to inputs)'}")
+
+    started = time.perf_counter()
+    results = transcribe_batch(
+        audio_files,
+        output_dir=args.output_dir,
+        output_format=output_format,
+        model_name=args.model,
+        language=args.language,
+        align=not args.no_align,
+        device=args.device,
+        vad_filter=not args.no_vad,
+        prefetch=args.prefetch,
+        align_workers=args.align_workers,
+        cache=cache,
+        batch_size=args.batch_size,
+        compute_type=args.compute_type,
+        threads=args.threads,
+        progress=progress,
+        vad_prepass=args.vad_prepass,
+        diarizer=diarizer,
+        audio_track=args.audio_track,
+    )
+
+    summary_path = args.summary or os.path.join(args.output_dir or ".", "batch_summary.json")
+    write_batch_summary(results, summary_path)
+
+    failed = sum(1 for r in results if r.get("status") != "ok")
+    print("\n" + "=" * 50)
+    print(f"Transcribed {len(results) - failed}/{len(results)} files in {time.perf_counter() - started:.1f}s")
+    print(f"Summary saved to: {summary_path}")
+    print("=" * 50)
 
 
 if __name__ == "__main__":
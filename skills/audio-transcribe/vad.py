@@ -0,0 +1,166 @@
+"""
+Voice activity detection pre-pass (``--vad-prepass``).
+
+Speech regions are detected once per file with whisperx's pyannote VAD and
+cached by audio hash. Silent files are skipped without loading the ASR
+model; otherwise only the speech spans are cut out and joined
+(compact_speech) for ASR and alignment, and the resulting timestamps are
+mapped back to the original audio (remap_segments).
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import TranscriptCache, source_hash
+from formats import TranscriptSegment, TranscriptWord
+from media import SAMPLE_RATE
+from metrics import ProgressCallback, emit_stage
+
+
+# Voice activity models are shared by all threads of the process; the
+# thresholds are fixed when a model loads, so they are part of the key
+_VAD_MODELS: Dict[Tuple[str, float, float], Any] = {}
+
+
+_VAD_LOCK = threading.Lock()
+
+
+def detect_speech(
+    audio: Any,
+    device: str = "cpu",
+    onset: float = 0.5,
+    offset: float = 0.363,
+) -> List[Tuple[float, float]]:
+    """Run whisperx's pyannote VAD on a waveform and return speech regions.
+
+    Args:
+        audio: 16 kHz float32 waveform.
+        device: Device to use.
+        onset: VAD onset threshold.
+        offset: VAD offset threshold.
+
+    Returns:
+        Sorted list of (start, end) speech regions in seconds.
+    """
+    import torch
+    from whisperx.vad import load_vad_model, merge_chunks
+
+    model_key = (device, onset, offset)
+    with _VAD_LOCK:
+        if model_key not in _VAD_MODELS:
+            _VAD_MODELS[model_key] = load_vad_model(torch.device(device), vad_onset=onset, vad_offset=offset)
+        scores = _VAD_MODELS[model_key](
+            {"waveform": torch.from_numpy(audio).unsqueeze(0), "sample_rate": SAMPLE_RATE}
+        )
+    chunks = merge_chunks(scores, 30, onset=onset, offset=offset)
+    return [(float(start), float(end)) for chunk in chunks for start, end in chunk["segments"]]
+
+
+def speech_regions(
+    audio_path: str,
+    audio: Any,
+    device: str = "cpu",
+    cache: Optional[TranscriptCache] = None,
+    progress: Optional[ProgressCallback] = None,
+    audio_track: Optional[str] = None,
+) -> List[Tuple[float, float]]:
+    """Speech regions of a file, cached alongside its audio hash.
+
+    Prints the speech ratio so sparse or silent recordings are obvious.
+    """
+    key = None
+    if cache is not None and os.path.exists(audio_path):
+        key = cache.options_key(
+            "vad:" + source_hash(cache, audio_path, audio_track), "pyannote", None, False, True, ""
+        )
+        cached = cache.get_json(key)
+        if cached is not None:
+            regions = [(float(start), float(end)) for start, end in cached]
+            print(f"Using cached speech map: {audio_path}")
+            report_speech_ratio(regions, len(audio) / SAMPLE_RATE)
+            return regions
+
+    with emit_stage(progress, "vad"):
+        regions = detect_speech(audio, device)
+    if key is not None:
+        cache.put_json(key, regions)
+    report_speech_ratio(regions, len(audio) / SAMPLE_RATE)
+    return regions
+
+
+def report_speech_ratio(regions: List[Tuple[float, float]], duration: float) -> float:
+    """Print and return the share of ``duration`` covered by speech."""
+    speech = sum(end - start for start, end in regions)
+    ratio = speech / duration if duration else 0.0
+    print(f"Speech: {speech:.1f}s of {duration:.1f}s ({ratio:.0%}, {len(regions)} regions)")
+    return ratio
+
+
+def compact_speech(
+    audio: Any,
+    regions: List[Tuple[float, float]],
+    pad: float = 0.25,
+    gap: float = 0.5,
+) -> Tuple[Any, List[Tuple[float, float, float]]]:
+    """Cut the speech regions out of a waveform and join them.
+
+    Regions are padded by ``pad`` seconds, merged when they touch, and joined
+    with ``gap`` seconds of silence so neighbouring words are not glued.
+
+    Returns:
+        Tuple of (compact waveform, mapping), where mapping holds
+        (compact start, original start, length) per kept span.
+    """
+    import numpy as np
+
+    duration = len(audio) / SAMPLE_RATE
+    merged: List[List[float]] = []
+    for start, end in sorted(regions):
+        start, end = max(0.0, start - pad), min(duration, end + pad)
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    silence = np.zeros(int(gap * SAMPLE_RATE), dtype=np.float32)
+    pieces = []
+    mapping: List[Tuple[float, float, float]] = []
+    position = 0
+    for start, end in merged:
+        piece = audio[int(start * SAMPLE_RATE) : int(end * SAMPLE_RATE)]
+        mapping.append((position / SAMPLE_RATE, start, len(piece) / SAMPLE_RATE))
+        pieces.extend([piece, silence])
+        position += len(piece) + len(silence)
+    compact = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    return compact, mapping
+
+
+def remap_segments(
+    segments: List[TranscriptSegment], mapping: List[Tuple[float, float, float]]
+) -> List[TranscriptSegment]:
+    """Map timestamps from compact_speech's waveform back to the original audio."""
+    import bisect
+
+    starts = [m[0] for m in mapping]
+
+    def to_original(t: float) -> float:
+        i = max(0, bisect.bisect_right(starts, t) - 1)
+        compact_start, original_start, length = mapping[i]
+        return original_start + min(max(t - compact_start, 0.0), length)
+
+    return [
+        TranscriptSegment(
+            start_at=to_original(seg.start_at),
+            end_at=to_original(seg.end_at),
+            text=seg.text,
+            words=[
+                TranscriptWord(
+                    word=w.word, start=to_original(w.start), end=to_original(w.end), score=w.score, speaker=w.speaker
+                )
+                for w in seg.words
+            ],
+            speaker=seg.speaker,
+        )
+        for seg in segments
+    ]
@@ -0,0 +1,293 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+
+"""
+Cached ffprobe metadata for media files, shared by the media skills.
+
+Format and stream information (and, on request, the keyframe index of the
+first video stream) is stored under ~/.cache/vibe-ops/probe, keyed by the
+file's absolute path, size and mtime, so probing the same file again, from
+any skill or process, costs one stat() instead of an ffprobe run. Changed
+files are re-probed automatically. Many files are probed in parallel.
+
+Other skills import it from their scripts:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "media-probe"))
+    from probe import probe, probe_many
+
+Usage:
+    uv run probe.py FILE [FILE ...] [options]
+
+Examples:
+    uv run probe.py movie.mp4
+    uv run probe.py clips/*.mp4 --jobs 16
+    uv run probe.py movie.mp4 --keyframes --json
+    uv run probe.py --clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from typing import Any, Dict, List, Optional
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "vibe-ops", "probe")
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Bump when the stored layout changes so old entries are ignored
+CACHE_VERSION = 1
+
+_lock = threading.Lock()
+# Running size of each cache root in this process, so writes only walk the
+# cache once at first use and again when the total passes the limit
+_cache_bytes: Dict[str, int] = {}
+
+
+def run(cmd: List[str]) -> str:
+    """Run an ffprobe command and return stdout, raising with stderr on failure."""
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{cmd[0]} failed: {result.stderr.strip()[-2000:]}")
+    return result.stdout
+
+
+def ffprobe_info(path: str) -> Dict[str, Any]:
+    """Format and stream information straight from ffprobe (uncached)."""
+    out = run(["ffprobe", "-v", "error", "-show_format", "-show_streams", "-of", "json", path])
+    data = json.loads(out)
+    return {"format": data.get("format", {}), "streams": data.get("streams", [])}
+
+
+def ffprobe_keyframes(path: str) -> List[float]:
+    """Timestamps of the first video stream's keyframes (uncached).
+
+    Reads packet flags only: the file is demuxed but nothing is decoded.
+    """
+    out = run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path,
+    ])
+    keyframes = []
+    for line in out.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts and pts != "N/A":
+            keyframes.append(float(pts))
+    return sorted(keyframes)
+
+
+def _entry_path(path: str, root: str) -> str:
+    path_id = hashlib.blake2b(path.encode(), digest_size=16).hexdigest()
+    return os.path.join(root, path_id[:2], f"{path_id}.json")
+
+
+def _stamp(path: str) -> Dict[str, Any]:
+    st = os.stat(path)
+    return {"version": CACHE_VERSION, "path": path, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _read_entry(entry_path: str, stamp: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    try:
+        with open(entry_path, encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if any(entry.get(key) != value for key, value in stamp.items()):
+        return None
+    try:
+        os.utime(entry_path)  # mark as recently used
+    except OSError:
+        pass
+    return entry
+
+
+def _write_atomic(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def evict(root: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES) -> None:
+    """Delete least recently used entries until the cache fits ``max_bytes``."""
+    with _lock:
+        entries = []
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        _cache_bytes[root] = total
+
+
+def _grow(root: str, added: int, max_bytes: int = CACHE_MAX_BYTES) -> None:
+    """Count bytes written to the cache and evict once the running total passes ``max_bytes``."""
+    with _lock:
+        total = _cache_bytes.get(root)
+        if total is not None:
+            _cache_bytes[root] = total + added
+    # The first write in a process measures the cache; evicting a little below
+    # the limit keeps a full cache from being walked on every write
+    if total is None or total + added > max_bytes:
+        evict(root, max_bytes * 9 // 10)
+
+
+def probe(path: str, keyframes: bool = False, refresh: bool = False, root: str = CACHE_DIR) -> Dict[str, Any]:
+    """Format and stream information for a file, from the cache when it is unchanged.
+
+    Args:
+        path: Media file path. URLs and other non-files are probed without caching.
+        keyframes: Also return ``"keyframes"``, the sorted keyframe timestamps
+            of the first video stream (empty without video).
+        refresh: Ignore any cached entry and probe again.
+        root: Cache directory.
+
+    Returns:
+        Dict with ffprobe's ``"format"`` and ``"streams"``, plus
+        ``"keyframes"`` when requested.
+    """
+    if not os.path.isfile(path):
+        info = ffprobe_info(path)
+        if keyframes:
+            info["keyframes"] = ffprobe_keyframes(path)
+        return info
+
+    path = os.path.abspath(path)
+    stamp = _stamp(path)
+    entry_path = _entry_path(path, root)
+    entry = None if refresh else _read_entry(entry_path, stamp)
+    if entry is not None and (not keyframes or "keyframes" in entry):
+        return {key: entry[key] for key in ("format", "streams", "keyframes") if key in entry}
+
+    # A hit without keyframes only needs the keyframe scan
+    entry = entry or {**stamp, **ffprobe_info(path)}
+    if keyframes:
+        entry["keyframes"] = ffprobe_keyframes(path)
+    content = json.dumps(entry, ensure_ascii=False)
+    _write_atomic(entry_path, content)
+    _grow(root, len(content.encode("utf-8")))
+    return {key: entry[key] for key in ("format", "streams", "keyframes") if key in entry}
+
+
+def probe_many(
+    paths: List[str], keyframes: bool = False, refresh: bool = False, jobs: int = 8, root: str = CACHE_DIR
+) -> List[Dict[str, Any]]:
+    """Probe several files in parallel; results are in the order of ``paths``.
+
+    Raises the first error (as ``RuntimeError`` naming the file) after all
+    probes have finished.
+    """
+
+    def one(path: str) -> Dict[str, Any]:
+        try:
+            return probe(path, keyframes, refresh, root)
+        except (OSError, RuntimeError, ValueError) as e:
+            raise RuntimeError(f"{path}: {e}") from e
+
+    if len(paths) <= 1:
+        return [one(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(paths)))) as pool:
+        return list(pool.map(one, paths))
+
+
+def first_stream(info: Dict[str, Any], codec_type: str) -> Optional[Dict[str, Any]]:
+    """The first stream of a type ("video", "audio", "subtitle") in probe output, or None."""
+    return next((s for s in info.get("streams", []) if s.get("codec_type") == codec_type), None)
+
+
+def format_duration(seconds: float) -> str:
+    minutes, secs = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours}:{minutes:02d}:{secs:04.1f}" if hours else f"{minutes}:{secs:04.1f}"
+
+
+def summary(path: str, info: Dict[str, Any]) -> str:
+    """One-line human readable description of a probed file."""
+    fmt = info.get("format", {})
+    parts = [format_duration(float(fmt.get("duration") or 0))]
+    if fmt.get("size"):
+        parts.append(f"{int(fmt['size']) / (1024 * 1024):.1f} MB")
+    if fmt.get("bit_rate"):
+        parts.append(f"{int(fmt['bit_rate']) / 1000:.0f} kb/s")
+    lines = [f"{path}: {', '.join(parts)}"]
+    for stream in info.get("streams", []):
+        kind = stream.get("codec_type")
+        desc = [kind or "?", stream.get("codec_name", "?")]
+        if kind == "video":
+            rate = stream.get("avg_frame_rate") or stream.get("r_frame_rate") or "0/1"
+            fps = float(Fraction(rate)) if rate != "0/0" else 0
+            desc += [f"{stream.get('width')}x{stream.get('height')}", f"{fps:.3g}fps", stream.get("pix_fmt", "")]
+        elif kind == "audio":
+            desc += [f"{stream.get('sample_rate')}Hz", f"{stream.get('channels')}ch"]
+        if stream.get("bit_rate"):
+            desc.append(f"{int(stream['bit_rate']) / 1000:.0f} kb/s")
+        language = stream.get("tags", {}).get("language")
+        if language and language != "und":
+            desc.append(language)
+        lines.append(f"  #{stream.get('index')} " + " ".join(d for d in desc if d))
+    if "keyframes" in info:
+        keys = info["keyframes"]
+        gaps = [b - a for a, b in zip(keys, keys[1:])]
+        interval = f", every {sum(gaps) / len(gaps):.2f}s (max {max(gaps):.2f}s)" if gaps else ""
+        lines.append(f"  keyframes: {len(keys)}{interval}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cached ffprobe metadata for media files")
+    parser.add_argument("files", nargs="*", help="Media files to probe")
+    parser.add_argument("--keyframes", action="store_true", help="Also index keyframes of the first video stream")
+    parser.add_argument("--json", action="store_true", help="Print full ffprobe JSON keyed by file path")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached entries and probe again")
+    parser.add_argument("--jobs", type=int, default=8, help="Files probed in parallel (default: 8)")
+    parser.add_argument("--clear", action="store_true", help="Delete the probe cache")
+    args = parser.parse_args()
+
+    if args.clear:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        print(f"[Cache] Cleared {CACHE_DIR}")
+        if not args.files:
+            return
+    if not args.files:
+        parser.error("no input files")
+
+    missing = [path for path in args.files if "://" not in path and not os.path.exists(path)]
+    if missing:
+        print(f"Error: Input file not found: {', '.join(missing)}")
+        sys.exit(1)
+    try:
+        results = probe_many(args.files, args.keyframes, args.refresh, args.jobs)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(dict(zip(args.files, results)), ensure_ascii=False, indent=2))
+    else:
+        print("\n".join(summary(path, info) for path, info in zip(args.files, results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+
+"""
+Concatenate videos, re-encoding only the inputs that do not match.
+
+All inputs are probed in parallel and a target profile is picked: by default
+the video/audio parameters that cover the most total duration, optionally
+overridden from the command line. Each input then gets the cheapest fix that
+makes it conform:
+
+  copy    already matches, used as-is
+  remux   only the time base differs, rewritten with stream copy
+  audio   only the audio differs (codec, sample rate, channel layout),
+          video copied and audio re-encoded
+  encode  video differs (codec, profile/level, resolution, fps, pixel
+          format), re-encoded with scale/pad to the target
+
+Fixes run in parallel into intermediates, then everything is joined with the
+concat demuxer using stream copy. Merging ten 1080p clips with one 720p clip
+re-encodes one clip, not eleven.
+
+The time base is only conformed for MP4/MOV outputs, where the muxer keeps
+each track's timescale. Matroska, WebM and MPEG-TS store timestamps in their
+own fixed time base (1 ms, 90 kHz) whatever the inputs use, so the time base
+is deliberately not compared for them.
+
+Usage:
+    uv run concat.py INPUT1 INPUT2 [...] -o OUTPUT [options]
+
+Examples:
+    uv run concat.py a.mp4 b.mp4 c.mp4 -o merged.mp4
+    uv run concat.py a.mp4 b.mp4 -o merged.mp4 --resolution 1280x720 --crf 23
+    uv run concat.py *.mp4 -o merged.mp4 --audio-codec aac --dry-run
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "media-probe"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "video-trim"))
+from farm import chunked_encode  # noqa: E402
+from probe import first_stream, probe_many  # noqa: E402
+
+# Video codec -> encoder used when an input has to be re-encoded
+VIDEO_ENCODERS = {"h264": "libx264", "hevc": "libx265", "vp9": "libvpx-vp9", "av1": "libaom-av1"}
+AUDIO_ENCODERS = {"aac": "aac", "ac3": "ac3", "eac3": "eac3", "mp3": "libmp3lame", "opus": "libopus", "flac": "flac"}
+
+# Parameter sets in-band before every keyframe, so inputs from different
+# encoders still decode after being joined into one track
+ANNEXB_FILTERS = {"h264": "h264_mp4toannexb", "hevc": "hevc_mp4toannexb"}
+
+MP4_EXTENSIONS = (".mp4", ".mov", ".m4v")
+
+# Layout assumed when a stream does not report one (ffmpeg's defaults)
+DEFAULT_LAYOUTS = {1: "mono", 2: "stereo", 6: "5.1"}
+
+# Encoder profile names for the ffprobe profiles they can write
+ENCODER_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+    "Main 10": "main10",
+    "High 10": "high10",
+}
+
+# ffprobe reports levels scaled by codec: H.264 4.1 is 41, HEVC 4.1 is 123
+LEVEL_SCALES = {"h264": 10, "hevc": 30}
+
+
+@dataclass
+class MediaProfile:
+    """The stream parameters that must match for concat-demuxer stream copy."""
+
+    video: Tuple  # (codec, width, height, pix_fmt, fps)
+    time_base: str
+    audio: Optional[Tuple]  # (codec, sample_rate, channels, channel_layout) or None without audio
+    profile: str = ""  # codec profile of the video stream, e.g. "High"
+    level: int = 0  # codec level as reported by ffprobe, e.g. 40 for H.264 4.0
+
+
+@dataclass
+class InputPlan:
+    path: str
+    duration: float
+    profile: MediaProfile
+    action: str = "copy"
+    reasons: List[str] = field(default_factory=list)
+    source: str = ""  # file that goes into the concat list
+
+
+def run(cmd: List[str]) -> str:
+    """Run an ffmpeg/ffprobe command and return stdout, raising with stderr on failure."""
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{cmd[0]} failed: {result.stderr.strip()[-2000:]}")
+    return result.stdout
+
+
+def media_profile(info: Dict) -> MediaProfile:
+    """Extract the concat-relevant parameters of the first video and audio streams."""
+    video = first_stream(info, "video")
+    if video is None:
+        raise ValueError("no video stream")
+    audio = first_stream(info, "audio")
+    fps = str(Fraction(video.get("r_frame_rate") or video.get("avg_frame_rate") or "0/1"))
+    if audio:
+        channels = int(audio.get("channels", 0))
+        layout = audio.get("channel_layout") or DEFAULT_LAYOUTS.get(channels, "")
+        audio = (audio["codec_name"], int(audio.get("sample_rate", 0)), channels, layout)
+    return MediaProfile(
+        video=(video["codec_name"], int(video["width"]), int(video["height"]), video.get("pix_fmt"), fps),
+        time_base=video.get("time_base", ""),
+        audio=audio,
+        profile=video.get("profile", ""),
+        level=max(0, int(video.get("level") or 0)),
+    )
+
+
+def probe_inputs(paths: List[str], jobs: int) -> List[InputPlan]:
+    """Probe every input in parallel (cached across runs by media-probe)."""
+    inputs = []
+    for path, info in zip(paths, probe_many(paths, jobs=jobs)):
+        try:
+            profile = media_profile(info)
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"{path}: {e}") from e
+        inputs.append(InputPlan(path=path, duration=float(info.get("format", {}).get("duration") or 0), profile=profile))
+    return inputs
+
+
+def pick_target(
+    inputs: List[InputPlan],
+    resolution: Optional[Tuple[int, int]] = None,
+    fps: Optional[str] = None,
+    audio_codec: Optional[str] = None,
+    no_audio: bool = False,
+    video_codec: Optional[str] = None,
+) -> MediaProfile:
+    """Target profile: the parameters covering the most total duration, with overrides applied."""
+
+    def heaviest(values) -> object:
+        weight: Dict[object, float] = defaultdict(float)
+        for value, duration in values:
+            weight[value] += duration or 1.0
+        return max(weight, key=lambda value: weight[value])
+
+    video = heaviest((p.profile.video, p.duration) for p in inputs)
+    codec, width, height, pix_fmt, rate = video
+    if resolution:
+        width, height = resolution
+    if fps:
+        rate = str(Fraction(fps))
+    time_base = heaviest((p.profile.time_base, p.duration) for p in inputs if p.profile.video == video)
+    target_video = (video_codec or codec, width, height, pix_fmt, rate)
+    # Profile and level come from the inputs that can be copied; when none
+    # match the overrides, every input is re-encoded and the encoder picks them
+    matching = [p for p in inputs if p.profile.video == target_video]
+    if matching:
+        profile, level = heaviest(((p.profile.profile, p.profile.level), p.duration) for p in matching)
+    else:
+        same_codec = [p for p in inputs if p.profile.video == video and codec == target_video[0]]
+        profile = heaviest((p.profile.profile, p.duration) for p in same_codec) if same_codec else ""
+        level = 0
+
+    audio = None
+    with_audio = [p for p in inputs if p.profile.audio]
+    if with_audio and not no_audio:
+        audio = heaviest((p.profile.audio, p.duration) for p in with_audio)
+        if audio_codec:
+            audio = (audio_codec, *audio[1:])
+        if audio[0] not in AUDIO_ENCODERS:
+            # Inputs that need audio fixes must be encodable to the target
+            audio = ("aac", *audio[1:])
+    return MediaProfile(video=target_video, time_base=time_base, audio=audio, profile=profile, level=level)
+
+
+def plan_inputs(inputs: List[InputPlan], target: MediaProfile, output: str) -> None:
+    """Choose the cheapest action that makes each input match the target."""
+    names = ("codec", "resolution", "resolution", "pixel format", "fps")
+    mp4 = os.path.splitext(output)[1].lower() in MP4_EXTENSIONS
+    for item in inputs:
+        profile = item.profile
+        item.reasons = sorted({names[i] for i, (a, b) in enumerate(zip(profile.video, target.video)) if a != b})
+        if not item.reasons and (profile.profile, profile.level) != (target.profile, target.level):
+            # Differing parameter sets are not reliably handled by one stream copy
+            item.reasons.append("profile/level")
+        if target.audio and profile.audio != target.audio:
+            item.reasons.append("audio" if profile.audio else "missing audio")
+        if item.reasons and item.reasons[-1] in ("audio", "missing audio") and len(item.reasons) == 1:
+            item.action = "audio"
+        elif item.reasons:
+            item.action = "encode"
+        elif target.audio is None and profile.audio:
+            item.action, item.reasons = "audio", ["drop audio"]
+        elif mp4 and profile.time_base != target.time_base:
+            item.action, item.reasons = "remux", ["time base"]
+        else:
+            item.action = "copy"
+
+
+def timescale_args(target: MediaProfile, ext: str) -> List[str]:
+    if ext in MP4_EXTENSIONS and "/" in target.time_base:
+        return ["-video_track_timescale", target.time_base.split("/")[1]]
+    return []
+
+
+def audio_encode_args(target: MediaProfile, bitrate: str) -> List[str]:
+    if target.audio is None:
+        return ["-an"]
+    codec, sample_rate, channels, layout = target.audio
+    args = ["-c:a", AUDIO_ENCODERS[codec], "-ar", str(sample_rate)]
+    args += ["-ch_layout", layout] if layout else ["-ac", str(channels)]
+    if codec != "flac":
+        args += ["-b:a", bitrate]
+    return args
+
+
+def video_encode_args(target: MediaProfile, crf: int, preset: str) -> List[str]:
+    codec, width, height, pix_fmt, fps = target.video
+    encoder = VIDEO_ENCODERS.get(codec)
+    if encoder is None:
+        raise ValueError(f"Cannot re-encode to {codec}; pass --video-codec h264")
+    filters = [
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease",
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2",
+        "setsar=1",
+        f"fps={fps}",
+    ]
+    args = ["-vf", ",".join(filters), "-c:v", encoder]
+    if encoder in ("libx264", "libx265"):
+        args += ["-preset", preset, "-crf", str(crf)]
+        profile = ENCODER_PROFILES.get(target.profile)
+        if profile:
+            args += ["-profile:v", profile]
+        if target.level and encoder == "libx264":
+            args += ["-level", level_name(codec, target.level)]
+        elif target.level:
+            args += ["-x265-params", f"level-idc={level_name(codec, target.level)}"]
+    else:
+        args += ["-crf", str(crf), "-b:v", "0"]
+    if pix_fmt:
+        args += ["-pix_fmt", pix_fmt]
+    return args
+
+
+def fix_input(item: InputPlan, target: MediaProfile, workdir: str, index: int, ext: str, args: argparse.Namespace) -> str:
+    """Write the conforming intermediate for one input and return its path."""
+    path = os.path.join(workdir, f"{index:03d}_{item.action}{ext}")
+    if item.action == "encode" and args.chunks != 1 and (item.profile.audio or not target.audio):
+        # Long inputs are split at keyframes and encoded in parallel chunks
+        chunked_encode(
+            item.path, path, 0.0, item.duration,
+            video_encode_args(target, args.crf, args.preset),
+            audio_encode_args(target, args.audio_bitrate),
+            timescale_args(target, ext), chunks=args.chunks,
+            cpus=max(1, (os.cpu_count() or 1) // max(1, args.jobs)),
+        )
+        return path
+    codec = target.video[0]
+    bsf = ["-bsf:v", ANNEXB_FILTERS[codec]] if codec in ANNEXB_FILTERS else []
+    cmd = ["ffmpeg", "-v", "error", "-y", "-i", item.path]
+    if target.audio and item.profile.audio is None:
+        # Silent track so every piece has the same streams
+        _, sample_rate, channels, layout = target.audio
+        layout = layout or DEFAULT_LAYOUTS.get(channels, "stereo")
+        cmd += ["-f", "lavfi", "-i", f"anullsrc=r={sample_rate}:cl={layout}"]
+        audio_map = ["-map", "1:a:0", "-shortest"]
+    else:
+        audio_map = ["-map", "0:a:0"] if target.audio else []
+    cmd += ["-map", "0:v:0", *audio_map, "-sn", "-dn"]
+
+    if item.action == "encode":
+        cmd += video_encode_args(target, args.crf, args.preset)
+    else:
+        cmd += ["-c:v", "copy"]
+    if item.action == "remux" and target.audio:
+        cmd += ["-c:a", "copy"]
+    else:
+        cmd += audio_encode_args(target, args.audio_bitrate)
+    cmd += [*bsf, *timescale_args(target, ext), path]
+    run(cmd)
+    return path
+
+
+def level_name(codec: str, level: int) -> str:
+    """Codec level as written by encoders and spec sheets, e.g. "4.1"."""
+    return f"{level / LEVEL_SCALES[codec]:.1f}" if codec in LEVEL_SCALES else str(level)
+
+
+def describe(profile: MediaProfile) -> str:
+    codec, width, height, pix_fmt, fps = profile.video
+    fps_value = float(Fraction(fps)) if fps else 0
+    if profile.audio:
+        audio_codec, sample_rate, channels, layout = profile.audio
+        audio = f"{audio_codec} {sample_rate // 1000}kHz {layout or f'{channels}ch'}"
+    else:
+        audio = "no audio"
+    name = " ".join(filter(None, [codec, profile.profile, profile.level and f"L{level_name(codec, profile.level)}"]))
+    return f"{name} {width}x{height} {pix_fmt} {fps_value:.3g}fps, {audio}"
+
+
+def parse_resolution(value: str) -> Tuple[int, int]:
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concatenate videos, re-encoding only non-conforming inputs")
+    parser.add_argument("inputs", nargs="+", help="Input files in concatenation order")
+    parser.add_argument("--output", "-o", required=True, help="Output file")
+    parser.add_argument("--resolution", type=parse_resolution, help="Target WxH (default: most common)")
+    parser.add_argument("--fps", help="Target frame rate, e.g. 30 or 30000/1001 (default: most common)")
+    parser.add_argument("--video-codec", choices=sorted(VIDEO_ENCODERS), help="Target video codec (default: most common)")
+    parser.add_argument("--audio-codec", choices=sorted(AUDIO_ENCODERS), help="Target audio codec (default: most common)")
+    parser.add_argument("--audio-bitrate", default="192k", help="Bitrate for re-encoded audio (default: 192k)")
+    parser.add_argument("--no-audio", action="store_true", help="Drop audio from the output")
+    parser.add_argument("--crf", type=int, default=18, help="CRF for re-encoded inputs (default: 18)")
+    parser.add_argument("--preset", default="medium", help="x264/x265 preset (default: medium)")
+    parser.add_argument(
+        "--jobs", type=int, default=max(1, (os.cpu_count() or 4) // 4), help="Inputs fixed in parallel (default: CPUs/4)"
+    )
+    parser.add_argument(
+        "--chunks",
+        type=int,
+        default=0,
+        help="Split each re-encoded input at keyframes into N chunks encoded in parallel (default: 0 = auto, 1 = off)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only print the plan")
+    args = parser.parse_args()
+
+    missing = [path for path in args.inputs if not os.path.exists(path)]
+    if missing:
+        print(f"Error: Input file not found: {', '.join(missing)}")
+        sys.exit(1)
+
+    began = time.time()
+    try:
+        inputs = probe_inputs(args.inputs, max(args.jobs, 8))
+        target = pick_target(inputs, args.resolution, args.fps, args.audio_codec, args.no_audio, args.video_codec)
+        plan_inputs(inputs, target, args.output)
+    except (RuntimeError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"[Target] {describe(target)}")
+    for i, item in enumerate(inputs, 1):
+        reasons = f" ({', '.join(item.reasons)})" if item.reasons else ""
+        print(f"[Plan] {i}. {item.path}: {describe(item.profile)} -> {item.action}{reasons}")
+    fixes = [item for item in inputs if item.action != "copy"]
+    print(f"[Plan] {len(fixes)} of {len(inputs)} inputs need work, {sum(i.action == 'encode' for i in inputs)} re-encodes")
+    if args.dry_run:
+        return
+
+    ext = os.path.splitext(args.output)[1].lower() or ".mp4"
+    with tempfile.TemporaryDirectory(prefix="concat-") as workdir:
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+                futures = {
+                    pool.submit(fix_input, item, target, workdir, i, ext, args): item
+                    for i, item in enumerate(inputs)
+                    if item.action != "copy"
+                }
+                for future, item in futures.items():
+                    item.source = future.result()
+                    print(f"[Fix] {item.path}: {item.action} done")
+            list_path = os.path.join(workdir, "inputs.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                for item in inputs:
+                    source = os.path.abspath(item.source or item.path).replace("'", "'\\''")
+                    f.write(f"file '{source}'\n")
+            container = ["-movflags", "+faststart"] if ext in MP4_EXTENSIONS else []
+            if target.video[0] == "hevc" and ext in MP4_EXTENSIONS:
+                container += ["-tag:v", "hvc1"]
+            run([
+                "ffmpeg", "-v", "error", "-y", "-f", "concat", "-safe", "0", "-i", list_path,
+                "-map", "0:v:0", *(["-map", "0:a:0"] if target.audio else []), "-c", "copy",
+                *container, args.output,
+            ])
+        except (RuntimeError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"[Done] {args.output} ({size_mb:.1f} MB) in {time.time() - began:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["requests", "pillow"]
+# ///
+
+"""
+Benchmark video-gen.py end to end against the local mock API (mock_server.py).
+
+Measures, fully offline:
+  * single: create_video_task -> wait_for_generation -> download_video, one job
+    at a time; reports time-to-detect-completion (how long after the mock
+    finished "generating" the client noticed) and status polls per job
+  * batch: run_batch with N jobs, reporting wall time, throughput and polls
+  * download: download_video throughput with one stream and with parallel
+    byte ranges, against servers with and without Range support
+
+The client runs with a temporary cache directory, so the local journal,
+result cache and duration history are not touched (and cannot turn jobs into
+cache hits). Duration history does build up across the single runs, as it
+would in real use.
+
+Usage:
+    uv run benchmark.py [options]
+
+Examples:
+    uv run benchmark.py
+    uv run benchmark.py --generation-seconds 30 --runs 5 --batch-jobs 50 -o bench.json
+    uv run benchmark.py --error-rate 0.2 --fail-rate 0.05 --latency-ms 80
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+
+def load_client(cache_dir: Path):
+    """Import video-gen.py (not a valid module name) with an isolated cache directory."""
+    os.environ["XDG_CACHE_HOME"] = str(cache_dir)
+    spec = importlib.util.spec_from_file_location("video_gen", SCRIPT_DIR / "video-gen.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def start_mock(options: list[str]) -> tuple[subprocess.Popen, str]:
+    """Run mock_server.py in its own process (so it does not share our GIL) and return its URL."""
+    proc = subprocess.Popen(
+        [sys.executable, str(SCRIPT_DIR / "mock_server.py"), "--port", "0", *options],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    line = proc.stdout.readline()
+    if "http://" not in line:
+        proc.kill()
+        raise RuntimeError(f"Mock server failed to start: {line!r}")
+    return proc, line.strip().rsplit(" ", 1)[-1]
+
+
+def mock_stats(vg, base_url: str) -> dict:
+    return vg.requests.get(f"{base_url}/stats", timeout=10).json()
+
+
+def bench_single(vg, base_url: str, runs: int, workdir: Path) -> list[dict]:
+    """Sequential jobs through the single-job API calls."""
+    results = []
+    session = vg.make_session(1)
+    try:
+        for i in range(1, runs + 1):
+            before = mock_stats(vg, base_url)
+            schedule = vg.poll_schedule("mock", "720P", "8")
+            expected = schedule.expected
+            start = time.time()
+            video_id = vg.create_video_task("bench", "mock", f"benchmark {i}", "720P", "8", session=session)
+            try:
+                duration = vg.wait_for_generation("bench", video_id, schedule=schedule, session=session)
+            except Exception as e:
+                results.append({"run": i, "error": str(e)})
+                print(f"  [{i}] {e}")
+                continue
+            detected = time.time()
+            vg.record_duration("mock", "720P", "8", duration)
+            polls = mock_stats(vg, base_url)["polls"] - before["polls"]
+            data, _ = vg.get_video_status("bench", video_id, session)
+
+            output = workdir / f"single_{i}.mp4"
+            download_start = time.time()
+            vg.download_video("bench", video_id, str(output), session)
+            download_seconds = time.time() - download_start
+            size_mb = output.stat().st_size / (1 << 20)
+            output.unlink()
+
+            run = {
+                "run": i,
+                "expected_seconds": round(expected, 1),
+                "generation_seconds": round(data["completed_at"] - data["created_at"], 2),
+                "total_seconds": round(time.time() - start, 2),
+                "detect_lag_seconds": round(detected - data["completed_at"], 2),
+                "polls": polls,
+                "download_mb_s": round(size_mb / download_seconds, 1),
+            }
+            results.append(run)
+            print(
+                f"  [{i}] generation {run['generation_seconds']}s, detected +{run['detect_lag_seconds']}s"
+                f" after {polls} polls (expected {run['expected_seconds']}s), download {run['download_mb_s']} MB/s"
+            )
+    finally:
+        session.close()
+    return results
+
+
+def bench_batch(vg, base_url: str, jobs: int, concurrency: int, workdir: Path) -> dict:
+    """One batch of distinct jobs through run_batch."""
+    before = mock_stats(vg, base_url)
+    batch = [
+        {"model": "mock", "prompt": f"batch {i}", "size": "720P", "seconds": "8", "output_dir": str(workdir / "batch")}
+        for i in range(jobs)
+    ]
+    start = time.time()
+    results = asyncio.run(vg.run_batch(batch, "bench", concurrency, force=True))
+    wall = time.time() - start
+    after = mock_stats(vg, base_url)
+    ok = sum(r["status"] == "ok" for r in results)
+    for path in (workdir / "batch").glob("*.mp4"):
+        path.unlink()
+    result = {
+        "jobs": jobs,
+        "concurrency": concurrency,
+        "ok": ok,
+        "failed": jobs - ok,
+        "wall_seconds": round(wall, 2),
+        "jobs_per_minute": round(ok / wall * 60, 1),
+        "polls": after["polls"] - before["polls"],
+        "polls_per_job": round((after["polls"] - before["polls"]) / jobs, 1),
+        "injected_errors": after["injected_errors"] - before["injected_errors"],
+    }
+    print(
+        f"  {ok}/{jobs} ok in {result['wall_seconds']}s ({result['jobs_per_minute']} jobs/min),"
+        f" {result['polls_per_job']} polls/job"
+    )
+    return result
+
+
+def bench_download(vg, base_url: str, label: str, parts_options: list[int], workdir: Path) -> list[dict]:
+    """download_video throughput for a single finished task."""
+    session = vg.make_session(max(parts_options))
+    results = []
+    try:
+        video_id = vg.create_video_task("bench", "mock", "download", "720P", "8", session=session)
+        while not vg.is_finished(vg.get_video_status("bench", video_id, session)[0] or {}):
+            time.sleep(0.2)
+        for parts in parts_options:
+            output = workdir / f"download_{parts}.mp4"
+            start = time.time()
+            vg.download_video("bench", video_id, str(output), session, parts=parts)
+            seconds = time.time() - start
+            size_mb = output.stat().st_size / (1 << 20)
+            output.unlink()
+            run = {"server": label, "parts": parts, "mb": round(size_mb, 1), "mb_s": round(size_mb / seconds, 1)}
+            results.append(run)
+            print(f"  {label}, parts={parts}: {run['mb']} MB at {run['mb_s']} MB/s")
+    finally:
+        session.close()
+    return results
+
+
+def git_commit() -> str | None:
+    """Current git commit of this checkout, if any."""
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark video-gen.py against the local mock API")
+    parser.add_argument("--generation-seconds", type=float, default=10.0, help="Mock generation time (default: 10)")
+    parser.add_argument("--generation-jitter", type=float, default=1.0, help="Std-dev of generation time (default: 1)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of status polls answered with 503")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of tasks that fail")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Extra latency per request")
+    parser.add_argument("--payload-mb", type=float, default=50.0, help="Size of every video (default: 50)")
+    parser.add_argument("--runs", type=int, default=3, help="Sequential single-job runs (default: 3)")
+    parser.add_argument("--batch-jobs", type=int, default=20, help="Jobs in the batch scenario (default: 20)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Batch concurrency (default: 10)")
+    parser.add_argument(
+        "--scenarios", nargs="+", default=["single", "batch", "download"], choices=["single", "batch", "download"]
+    )
+    parser.add_argument("--output", "-o", default="video_gen_bench.json", help="Result JSON path")
+    args = parser.parse_args()
+
+    mock_options = [
+        "--generation-seconds", str(args.generation_seconds),
+        "--generation-jitter", str(args.generation_jitter),
+        "--error-rate", str(args.error_rate),
+        "--fail-rate", str(args.fail_rate),
+        "--latency-ms", str(args.latency_ms),
+        "--payload-mb", str(args.payload_mb),
+    ]
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "system": platform.system(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "options": vars(args),
+    }
+
+    procs = []
+    with tempfile.TemporaryDirectory(prefix="video-gen-bench-") as tmp:
+        workdir = Path(tmp)
+        # History, journal and result cache live under the temporary directory and go with it
+        vg = load_client(workdir / "cache")
+        try:
+            proc, base_url = start_mock(mock_options)
+            procs.append(proc)
+            vg.BASE_URL = base_url
+            if "single" in args.scenarios:
+                print(f"[single] {args.runs} sequential jobs")
+                result["single"] = bench_single(vg, base_url, args.runs, workdir)
+            if "batch" in args.scenarios:
+                print(f"[batch] {args.batch_jobs} jobs, concurrency {args.concurrency}")
+                result["batch"] = bench_batch(vg, base_url, args.batch_jobs, args.concurrency, workdir)
+            if "download" in args.scenarios:
+                print("[download]")
+                # Downloads need a finished task quickly and must not fail
+                fast = [*mock_options, "--generation-seconds", "0", "--generation-jitter", "0", "--fail-rate", "0"]
+                downloads = []
+                for label, extra in (("range", []), ("no-range", ["--no-range"])):
+                    proc, vg.BASE_URL = start_mock([*fast, *extra])
+                    procs.append(proc)
+                    parts = [1, vg.DOWNLOAD_PARTS] if label == "range" else [1]
+                    downloads += bench_download(vg, vg.BASE_URL, label, parts, workdir)
+                result["download"] = downloads
+        finally:
+            for proc in procs:
+                proc.terminate()
+                proc.wait()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
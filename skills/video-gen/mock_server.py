@@ -0,0 +1,239 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+
+"""
+Local stand-in for the video generation API used by video-gen.py.
+
+Implements POST /videos, GET /videos/{id} and GET /videos/{id}/content with
+configurable generation time, per-request latency, failure injection, HTTP
+Range support and large payloads, so the client's polling, download and
+upload paths can be tested and benchmarked offline. GET /stats returns
+request counters.
+
+Usage:
+    uv run mock_server.py [options]
+    VIDEO_GEN_BASE_URL=http://127.0.0.1:8765 uv run video-gen.py veo-3.1 "a cat" 720P 8 .
+
+Examples:
+    uv run mock_server.py --port 8765 --generation-seconds 20 --payload-mb 200
+    uv run mock_server.py --fail-rate 0.1 --error-rate 0.2 --latency-ms 50 --no-range
+"""
+
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+BLOCK_SIZE = 1 << 20
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class MockState:
+    """Tasks, payload and counters shared by all request handlers."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.tasks: dict[str, dict] = {}
+        self.stats = {"creates": 0, "polls": 0, "injected_errors": 0, "downloads": 0, "bytes_sent": 0, "bytes_received": 0}
+        # The payload is a random block repeated to the requested size, so large
+        # payloads cost no memory and any byte range can be served directly
+        self.block = random.Random(args.seed).randbytes(BLOCK_SIZE)
+        self.payload_size = int(args.payload_mb * (1 << 20))
+        # Opaque strong ETag for If-Range; the MD5 is declared in x-goog-hash on every
+        # response, as GCS does, and full responses also carry Content-MD5
+        digest = hashlib.md5()
+        for chunk in self.chunks(0, self.payload_size - 1):
+            digest.update(chunk)
+        self.etag = f'"{args.seed:x}-{self.payload_size:x}"'
+        self.content_md5 = base64.b64encode(digest.digest()).decode()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self.lock:
+            self.stats[name] += amount
+
+    def create(self, body: dict) -> dict:
+        with self.lock:
+            video_id = f"video_{next(self.ids)}"
+            duration = max(0.0, self.rng.gauss(self.args.generation_seconds, self.args.generation_jitter))
+            task = {
+                "id": video_id,
+                "model": body.get("model"),
+                "created_at": time.time(),
+                "duration": duration,
+                "fails": self.rng.random() < self.args.fail_rate,
+            }
+            self.tasks[video_id] = task
+        return task
+
+    def status(self, task: dict) -> dict:
+        elapsed = time.time() - task["created_at"]
+        data = {"id": task["id"], "object": "video", "model": task["model"], "created_at": int(task["created_at"])}
+        if elapsed < min(1.0, task["duration"]):
+            return {**data, "status": "queued", "progress": 0}
+        if elapsed < task["duration"]:
+            status = {**data, "status": "in_progress"}
+            if self.args.progress:
+                status["progress"] = int(elapsed / task["duration"] * 100)
+            return status
+        completed_at = task["created_at"] + task["duration"]
+        if task["fails"]:
+            return {**data, "status": "failed", "error": {"message": "Injected generation failure"}}
+        return {**data, "status": "completed", "progress": 100, "completed_at": completed_at}
+
+    def chunks(self, start: int, end: int):
+        """Yield payload bytes [start, end] in block-sized pieces."""
+        pos = start
+        while pos <= end:
+            offset = pos % BLOCK_SIZE
+            piece = self.block[offset : min(BLOCK_SIZE, offset + end - pos + 1)]
+            yield piece
+            pos += len(piece)
+
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            if state.args.verbose:
+                super().log_message(format, *args)
+
+        def send_json(self, code: int, data: dict, headers: dict | None = None) -> None:
+            body = json.dumps(data).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def delay(self) -> None:
+            if state.args.latency_ms:
+                time.sleep(state.args.latency_ms / 1000)
+
+        def do_POST(self):
+            self.delay()
+            length = int(self.headers.get("Content-Length", 0))
+            raw = self.rfile.read(length)
+            state.count("bytes_received", len(raw))
+            if urlparse(self.path).path.rstrip("/").endswith("/videos"):
+                body = json.loads(raw) if self.headers.get("Content-Type", "").startswith("application/json") else {}
+                task = state.create(body)
+                state.count("creates")
+                return self.send_json(200, state.status(task))
+            self.send_json(404, {"error": {"message": "Not found"}})
+
+        def do_GET(self):
+            self.delay()
+            parts = urlparse(self.path).path.strip("/").split("/")
+            if parts[-1] == "stats":
+                with state.lock:
+                    return self.send_json(200, {**state.stats, "tasks": len(state.tasks)})
+            if len(parts) >= 2 and parts[-1] == "content" and parts[-2] in state.tasks:
+                return self.send_content(state.tasks[parts[-2]])
+            if parts and parts[-1] in state.tasks:
+                state.count("polls")
+                if state.rng.random() < state.args.error_rate:
+                    state.count("injected_errors")
+                    return self.send_json(503, {"error": {"message": "Injected error"}}, {"Retry-After": "1"})
+                return self.send_json(200, state.status(state.tasks[parts[-1]]))
+            self.send_json(404, {"error": {"message": "Not found"}})
+
+        def send_content(self, task: dict) -> None:
+            if state.status(task)["status"] != "completed":
+                return self.send_json(409, {"error": {"message": "Video is not ready"}})
+            size = state.payload_size
+            start, end, code = 0, size - 1, 200
+            match = _RANGE_RE.match(self.headers.get("Range", ""))
+            if_range = self.headers.get("If-Range")
+            if match and not state.args.no_range and (not if_range or if_range == state.etag):
+                first, last = match.groups()
+                if first:
+                    start, end = int(first), min(int(last), size - 1) if last else size - 1
+                else:
+                    start = max(0, size - int(last))
+                if start >= size or start > end:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                code = 206
+
+            state.count("downloads")
+            self.send_response(code)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("ETag", state.etag)
+            self.send_header("x-goog-hash", f"md5={state.content_md5}")
+            if not state.args.no_range:
+                self.send_header("Accept-Ranges", "bytes")
+            if code == 206:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_header("Content-MD5", state.content_md5)
+            self.end_headers()
+            try:
+                for chunk in state.chunks(start, end):
+                    self.wfile.write(chunk)
+                    state.count("bytes_sent", len(chunk))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Local stand-in for the video generation API")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port, 0 picks a free one (default: 8765)")
+    parser.add_argument("--generation-seconds", type=float, default=20.0, help="Mean generation time (default: 20)")
+    parser.add_argument("--generation-jitter", type=float, default=2.0, help="Std-dev of generation time (default: 2)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of tasks that end as failed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of status polls answered with 503")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Extra latency added to every request")
+    parser.add_argument("--payload-mb", type=float, default=20.0, help="Size of every generated video (default: 20)")
+    parser.add_argument("--no-range", action="store_true", help="Ignore Range requests and omit Accept-Ranges")
+    parser.add_argument("--progress", action="store_true", help="Report a progress percentage while generating")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for durations, failures and payload")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    return parser
+
+
+def serve(args: argparse.Namespace) -> ThreadingHTTPServer:
+    """Create the server; call serve_forever() on it (it is bound already)."""
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(MockState(args)))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    args = build_parser().parse_args()
+    server = serve(args)
+    host, port = server.server_address[:2]
+    # The first line is parsed by benchmark.py to find the port
+    print(f"Mock video API listening on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
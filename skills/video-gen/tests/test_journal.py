@@ -0,0 +1,36 @@
+import importlib.util
+import os
+
+spec = importlib.util.spec_from_file_location(
+    "video_gen", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "video-gen.py")
+)
+vg = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(vg)
+
+
+def test_load_journal_compacts_to_one_line_per_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(vg, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(vg, "JOURNAL_PATH", tmp_path / "jobs.jsonl")
+    vg.journal_append("a", "created", prompt="first")
+    vg.journal_append("b", "created", prompt="second")
+    vg.journal_append("a", "generated")
+    vg.journal_append("a", "downloaded", output="a.mp4")
+
+    jobs = vg.load_journal()
+    assert [job["state"] for job in jobs.values()] == ["downloaded", "created"]
+    assert len(vg.JOURNAL_PATH.read_text(encoding="utf-8").splitlines()) == 2
+    assert vg.load_journal() == jobs
+
+
+def test_load_journal_drops_old_finished_jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(vg, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(vg, "JOURNAL_PATH", tmp_path / "jobs.jsonl")
+    monkeypatch.setattr(vg, "JOURNAL_KEEP_FINISHED", 1)
+    vg.journal_append("old", "created")
+    vg.journal_append("pending", "created")
+    vg.journal_append("new", "created")
+    vg.journal_append("old", "failed", error="boom")
+    vg.journal_append("new", "downloaded")
+
+    assert list(vg.load_journal()) == ["pending", "new"]
+    assert list(vg.load_journal()) == ["pending", "new"]
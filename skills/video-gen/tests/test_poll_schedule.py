@@ -0,0 +1,58 @@
+import importlib.util
+import os
+
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "video_gen", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "video-gen.py")
+)
+vg = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(vg)
+
+
+def test_polls_sparsely_far_from_the_expected_time():
+    schedule = vg.PollSchedule(120.0)
+    assert schedule.next_delay(0.0, {}) == pytest.approx(vg.MAX_POLL_INTERVAL, rel=0.1)
+    assert schedule.next_delay(100.0, {}) == pytest.approx(10.0, rel=0.1)
+    assert schedule.next_delay(119.0, {}) == pytest.approx(vg.MIN_POLL_INTERVAL, rel=0.1)
+
+
+def test_slows_down_after_the_expected_time():
+    schedule = vg.PollSchedule(60.0)
+    assert schedule.next_delay(100.0, {}) == pytest.approx(10.0, rel=0.1)
+
+
+def test_progress_extrapolates_the_expected_time():
+    schedule = vg.PollSchedule(600.0)
+    # 50% after 20 s means ~20 s left, so the next poll is ~10 s away
+    assert schedule.next_delay(20.0, {"progress": 50}) == pytest.approx(10.0, rel=0.1)
+
+
+def test_failures_back_off_and_respect_retry_after():
+    schedule = vg.PollSchedule(120.0)
+    delays = [schedule.next_delay(0.0, None) for _ in range(3)]
+    assert delays[0] <= 1.5 * 2 * vg.MIN_POLL_INTERVAL
+    assert delays[2] >= 0.5 * 8 * vg.MIN_POLL_INTERVAL
+    assert schedule.next_delay(0.0, None, retry_after=300.0) == 300.0
+    schedule.next_delay(0.0, {})
+    assert schedule.failures == 0
+
+
+def test_max_interval_caps_the_schedule():
+    schedule = vg.PollSchedule(vg.DEFAULT_EXPECTED_SECONDS, max_interval=vg.NO_HISTORY_MAX_INTERVAL)
+    assert schedule.next_delay(0.0, {}) <= vg.NO_HISTORY_MAX_INTERVAL * 1.1
+
+
+def test_generation_seconds_prefers_server_timestamps():
+    assert vg.generation_seconds({"created_at": 1000, "completed_at": 1042}, 60.0) == 42.0
+    assert vg.generation_seconds({"created_at": 1000}, 60.0) == 60.0
+
+
+def test_poll_interval_still_gives_a_fixed_schedule(monkeypatch):
+    sleeps = []
+    statuses = iter([{"status": "in_progress"}, {"status": "completed"}])
+    monkeypatch.setattr(vg, "get_video_status", lambda *args: (next(statuses), None))
+    monkeypatch.setattr(vg.time, "sleep", sleeps.append)
+    with pytest.warns(DeprecationWarning):
+        assert vg.wait_for_completion("key", "video", poll_interval=5) is None
+    assert sleeps == [pytest.approx(5.0, rel=0.1)] * 2
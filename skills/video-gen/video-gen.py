@@ -7,19 +7,36 @@
 """
 AI Video Generator - 生成 AI 视频
 支持 Veo 3.1 (文生视频) 和 Sora 2 Pro (图生视频)
+
+批量模式：--batch jobs.jsonl，每行一个任务，并发提交，单个轮询循环统一查询状态
+任务日志：创建的每个任务都记录在本地，中断后用 resume 继续等待和下载，status 查看记录
+结果缓存：相同请求（模型、prompt、尺寸、时长、图片内容）直接复用已生成的视频或进行中的任务，--force 强制重新生成
 """
 
 import os
 import sys
+import json
 import time
+import base64
+import io
+import heapq
+import hashlib
+import shutil
+import random
+import asyncio
 import argparse
+import warnings
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 
 import requests
-from PIL import Image
+from requests.adapters import HTTPAdapter
+from PIL import Image, ImageOps
 
 # 配置
-BASE_URL = "https://internal.infquest.com/api/aihubmix/v1"
+BASE_URL = os.environ.get("VIDEO_GEN_BASE_URL", "https://internal.infquest.com/api/aihubmix/v1")  # 可指向 mock_server.py
 
 # 模型映射
 MODEL_MAP = {
@@ -30,6 +47,38 @@ MODEL_MAP = {
 # 支持图片输入的模型
 IMAGE_SUPPORTED_MODELS = ["sora-2-pro"]
 
+# 任务状态
+DONE_STATUSES = ("completed", "done", "success")
+FAILED_STATUSES = ("failed", "error")
+
+# 本地记录的生成耗时，用于预估完成时间、安排轮询
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "vibe-ops" / "video-gen"
+HISTORY_PATH = CACHE_DIR / "history.json"
+HISTORY_SIZE = 20  # 每种配置保留最近的记录数
+DEFAULT_EXPECTED_SECONDS = 120.0  # 没有历史记录时的预估耗时
+
+# 任务日志（追加写入的 JSONL），记录每个已创建任务的参数和状态
+JOURNAL_PATH = CACHE_DIR / "jobs.jsonl"
+RESUMABLE_STATES = ("created", "generated")  # 未完成下载、可以继续的状态
+JOURNAL_KEEP_FINISHED = 200  # 压缩日志时保留的最近已结束（已下载或失败）任务数，供 status 查看
+
+# 结果缓存：按请求内容寻址，保存已生成的视频；超过大小或时间上限时从最久未使用的开始清理
+RESULTS_DIR = CACHE_DIR / "results"
+RESULTS_MAX_BYTES = 5 << 30
+RESULTS_MAX_AGE = 7 * 24 * 3600
+INFLIGHT_MAX_AGE = 24 * 3600  # 更早创建的未完成任务可能已在服务端过期，不再复用
+
+# 轮询间隔范围（秒）
+MIN_POLL_INTERVAL = 3.0
+MAX_POLL_INTERVAL = 30.0
+NO_HISTORY_MAX_INTERVAL = 10.0  # 没有历史记录时预估不可靠，轮询间隔不超过此值
+
+# 下载：先写入 .part 临时文件，支持 Range 续传，大文件分段并行下载
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+DOWNLOAD_PARTS = 4
+PARALLEL_MIN_BYTES = 16 << 20  # 小于此大小不分段
+DOWNLOAD_RETRIES = 3
+
 
 def parse_size(size: str) -> tuple[int, int] | None:
     """解析尺寸字符串，如 '1280x720' -> (1280, 720)"""
@@ -42,30 +91,70 @@ def parse_size(size: str) -> tuple[int, int] | None:
     return None
 
 
-def resize_image(image_path: str, target_size: tuple[int, int]) -> str | None:
-    """缩放图片到目标尺寸，返回临时文件路径"""
-    try:
-        img = Image.open(image_path)
-        current_size = img.size  # (width, height)
+# 重新编码时保留的图片格式，其余格式转为 PNG
+UPLOAD_FORMATS = {"JPEG": ("image/jpeg", ".jpg"), "PNG": ("image/png", ".png"), "WEBP": ("image/webp", ".webp")}
 
-        print(f"[Check] Image size: {current_size[0]}x{current_size[1]}, target: {target_size[0]}x{target_size[1]}")
 
-        if current_size == target_size:
+def fit_image(image_path: str, target_size: tuple[int, int]) -> tuple[bytes, str, str] | None:
+    """按目标尺寸等比缩放并居中裁剪，在内存中编码，返回 (图片数据, MIME 类型, 扩展名)；尺寸已匹配时返回 None"""
+    with Image.open(image_path) as img:
+        fmt = img.format
+        width, height = img.size
+        print(f"[Check] Image size: {width}x{height}, target: {target_size[0]}x{target_size[1]}")
+        orientation = img.getexif().get(0x0112, 1)
+        if img.size == target_size and orientation == 1:
             print("[Check] Image size matches, no resize needed")
             return None
 
         print("[Resize] Resizing image to match target size...")
-        resized = img.resize(target_size, Image.Resampling.LANCZOS)
-
-        # 保存到临时文件
-        path = Path(image_path)
-        temp_path = path.parent / f"resized_{int(time.time())}{path.suffix}"
-        resized.save(temp_path, quality=95)
-        print(f"[Resize] Image resized to {target_size[0]}x{target_size[1]}: {temp_path}")
-        return str(temp_path)
-    except Exception as e:
-        print(f"[Warning] Failed to resize image: {e}")
+        # JPEG 直接以 1/2~1/8 比例解码，大图缩小时省去大部分解码和缩放开销（EXIF 旋转 90° 时按转置后的目标计算）
+        target_w, target_h = target_size if orientation < 5 else target_size[::-1]
+        scale = max(target_w / width, target_h / height)
+        img.draft("RGB", (int(width * scale) + 1, int(height * scale) + 1))
+        img = ImageOps.exif_transpose(img)
+
+        # 覆盖目标尺寸后居中裁掉多余部分，不拉伸画面
+        width, height = img.size
+        scale = max(target_size[0] / width, target_size[1] / height)
+        crop_w, crop_h = target_size[0] / scale, target_size[1] / scale
+        left, top = (width - crop_w) / 2, (height - crop_h) / 2
+        resized = img.resize(
+            target_size, Image.Resampling.LANCZOS, box=(left, top, left + crop_w, top + crop_h), reducing_gap=3.0
+        )
+
+    fmt = fmt if fmt in UPLOAD_FORMATS else "PNG"
+    if fmt == "JPEG" and resized.mode != "RGB":
+        resized = resized.convert("RGB")
+    buffer = io.BytesIO()
+    resized.save(buffer, format=fmt, quality=95)
+    mime_type, ext = UPLOAD_FORMATS[fmt]
+    print(f"[Resize] Image resized to {target_size[0]}x{target_size[1]} ({buffer.tell() / 1024:.0f} KB)")
+    return buffer.getvalue(), mime_type, ext
+
+
+def prepare_image(model_id: str, input_image: str, size: str) -> tuple[str, bytes, str] | None:
+    """检查并按需缩放输入图片，返回上传用的 (文件名, 图片数据, MIME 类型)，不写任何临时文件"""
+    if not input_image:
+        return None
+    if model_id not in IMAGE_SUPPORTED_MODELS:
+        print(f"[Warning] Model {model_id} does not support image input, ignoring input image")
         return None
+    path = Path(input_image)
+    if not path.exists():
+        raise FileNotFoundError(f"Input image not found: {input_image}")
+
+    # 检查是否需要缩放
+    target_size = parse_size(size)
+    if target_size:
+        try:
+            fitted = fit_image(input_image, target_size)
+        except Exception as e:
+            print(f"[Warning] Failed to resize image: {e}")
+            fitted = None
+        if fitted:
+            data, mime_type, ext = fitted
+            return path.stem + ext, data, mime_type
+    return path.name, path.read_bytes(), get_mime_type(input_image)
 
 
 def get_mime_type(file_path: str) -> str:
@@ -80,23 +169,46 @@ def get_mime_type(file_path: str) -> str:
     return mime_map.get(ext, "image/jpeg")
 
 
-def create_video_task(api_key: str, model: str, prompt: str, size: str, seconds: str, image_path: str | None = None) -> str:
-    """创建视频生成任务，返回 video_id"""
+def make_session(pool_size: int = 10) -> requests.Session:
+    """创建复用 keep-alive 连接的 HTTP 会话，连接池大小与并发数匹配"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def create_video_task(
+    api_key: str,
+    model: str,
+    prompt: str,
+    size: str,
+    seconds: str,
+    image_path: str | None = None,
+    session: requests.Session | None = None,
+    image: tuple[str, bytes, str] | None = None,
+) -> str:
+    """创建视频生成任务，返回 video_id
+
+    image_path 为输入图片路径，上传前按 size 缩放；已调用过 prepare_image 时可直接传入
+    其返回的 (文件名, 图片数据, MIME 类型) 作为 image，避免重复处理。
+    """
+    http = session or requests
     headers = {"Authorization": f"Bearer {api_key}"}
 
-    if image_path and model in IMAGE_SUPPORTED_MODELS:
-        # 使用 multipart/form-data 上传图片，需指定 MIME 类型
-        mime_type = get_mime_type(image_path)
-        filename = Path(image_path).name
-        with open(image_path, "rb") as f:
-            files = {"input_reference": (filename, f, mime_type)}
-            data = {"model": model, "prompt": prompt, "size": size, "seconds": seconds}
-            response = requests.post(f"{BASE_URL}/videos", headers=headers, data=data, files=files)
+    if image is None and image_path:
+        image = prepare_image(model, image_path, size)
+    if image and model in IMAGE_SUPPORTED_MODELS:
+        # 使用 multipart/form-data 上传内存中的图片，需指定 MIME 类型
+        filename, content, mime_type = image
+        files = {"input_reference": (filename, io.BytesIO(content), mime_type)}
+        data = {"model": model, "prompt": prompt, "size": size, "seconds": seconds}
+        response = http.post(f"{BASE_URL}/videos", headers=headers, data=data, files=files)
     else:
         # 纯 JSON 请求
         headers["Content-Type"] = "application/json"
         json_data = {"model": model, "prompt": prompt, "size": size, "seconds": seconds}
-        response = requests.post(f"{BASE_URL}/videos", headers=headers, json=json_data)
+        response = http.post(f"{BASE_URL}/videos", headers=headers, json=json_data)
 
     if response.status_code not in (200, 201):
         raise Exception(f"Failed to create task: {response.text}")
@@ -104,55 +216,847 @@ def create_video_task(api_key: str, model: str, prompt: str, size: str, seconds:
     return response.json()["id"]
 
 
-def wait_for_completion(api_key: str, video_id: str, max_wait: int = 1200, poll_interval: int = 10) -> None:
-    """轮询等待视频生成完成"""
+def parse_retry_after(value: str | None) -> float | None:
+    """解析 Retry-After 头（秒数或 HTTP 日期），返回需等待的秒数"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_video_status(
+    api_key: str, video_id: str, session: requests.Session | None = None
+) -> tuple[dict | None, float | None]:
+    """查询一次任务状态，返回 (状态数据, Retry-After 秒数)；请求失败时状态数据为 None"""
+    http = session or requests
     headers = {"Authorization": f"Bearer {api_key}"}
+    try:
+        response = http.get(f"{BASE_URL}/videos/{video_id}", headers=headers, timeout=30)
+    except requests.RequestException as e:
+        print(f"[Warning] Failed to get status of {video_id}: {e}")
+        return None, None
+
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    if response.status_code != 200:
+        print(f"[Warning] Failed to get status of {video_id}: HTTP {response.status_code} {response.text[:200]}")
+        return None, retry_after
+    try:
+        return response.json(), retry_after
+    except ValueError:
+        # 代理或维护页面返回的非 JSON 内容按请求失败处理，走退避重试
+        print(f"[Warning] Failed to get status of {video_id}: invalid JSON {response.text[:200]!r}")
+        return None, retry_after
+
+
+def journal_append(video_id: str, state: str, **fields) -> None:
+    """向任务日志追加一条状态记录，写入后立即落盘，进程被杀也不会丢失已创建的任务"""
+    entry = {"video_id": video_id, "state": state, "time": time.time(), **fields}
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(JOURNAL_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    except OSError as e:
+        print(f"[Warning] Failed to write job journal: {e}")
+
+
+def load_journal() -> dict[str, dict]:
+    """按 video_id 合并任务日志，返回每个任务的参数和最新状态（按创建顺序）
+
+    日志中有重复记录时顺带压缩为每个任务一行，只保留最近 JOURNAL_KEEP_FINISHED 个已结束的任务。
+    """
+    jobs: dict[str, dict] = {}
+    lines = 0
+    try:
+        f = open(JOURNAL_PATH, encoding="utf-8")
+    except OSError:
+        return jobs
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        for line in f:
+            lines += 1
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # 写到一半被中断的行
+            job = jobs.setdefault(entry["video_id"], {"created_at": entry["time"]})
+            job.update(entry)
+
+    finished = [video_id for video_id, job in jobs.items() if job["state"] not in RESUMABLE_STATES]
+    for video_id in finished[: max(0, len(finished) - JOURNAL_KEEP_FINISHED)]:
+        del jobs[video_id]
+    if lines > len(jobs):
+        compact_journal(jobs, size)
+    return jobs
+
+
+def compact_journal(jobs: dict[str, dict], size: int) -> None:
+    """把任务日志重写为每个任务一行；读取后有其他进程追加了记录（文件大小变化）时放弃本次压缩"""
+    tmp = JOURNAL_PATH.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            for job in jobs.values():
+                f.write(json.dumps(job, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if JOURNAL_PATH.stat().st_size == size:
+            os.replace(tmp, JOURNAL_PATH)
+        else:
+            tmp.unlink()
+    except OSError as e:
+        print(f"[Warning] Failed to compact job journal: {e}")
+        tmp.unlink(missing_ok=True)
+
+
+def new_output_path(output_dir: str, name: str | None = None, index: int | None = None) -> Path:
+    """在创建任务时确定输出文件路径，记入日志后 resume 会下载到同一位置"""
+    directory = Path(output_dir or ".")
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = f"_{index}" if index is not None else ""
+    return directory / (name or f"generated_video_{int(time.time() * 1000)}{suffix}.mp4")
+
+
+def request_key(model: str, prompt: str, size: str, seconds: str, image: str | None = None) -> str:
+    """规范化请求参数（含图片内容哈希）后计算缓存键"""
+    request = {
+        "model": model,
+        "prompt": " ".join(prompt.split()),
+        "size": str(size).strip().lower(),
+        "seconds": str(seconds).strip(),
+    }
+    # 不支持图片的模型会忽略输入图片，不计入缓存键
+    if image and model in IMAGE_SUPPORTED_MODELS:
+        digest = hashlib.sha256()
+        with open(image, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        request["image"] = digest.hexdigest()
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+def cached_result(key: str) -> Path | None:
+    """返回缓存中该请求的视频（并刷新其使用时间），没有或已过期时返回 None"""
+    path = RESULTS_DIR / f"{key}.mp4"
+    try:
+        if time.time() - path.stat().st_mtime > RESULTS_MAX_AGE:
+            path.unlink()
+            return None
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+
+def store_result(key: str, video: Path) -> None:
+    """把下载好的视频存入结果缓存，并按大小和时间上限清理"""
+    try:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = RESULTS_DIR / f"{key}.{os.getpid()}.tmp"
+        shutil.copyfile(video, tmp)
+        os.replace(tmp, RESULTS_DIR / f"{key}.mp4")
+        evict_results()
+    except OSError as e:
+        print(f"[Warning] Failed to cache result: {e}")
+
+
+def evict_results(max_bytes: int = RESULTS_MAX_BYTES, max_age: float = RESULTS_MAX_AGE) -> None:
+    """删除过期的缓存视频，总大小超限时从最久未使用的开始删除"""
+    now = time.time()
+    entries = []
+    for path in RESULTS_DIR.glob("*.mp4"):
+        stat = path.stat()
+        if now - stat.st_mtime > max_age:
+            path.unlink()
+        else:
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink()
+        total -= size
+
+
+def copy_result(source: Path, output_dir: str | None, name: str | None = None, index: int | None = None) -> Path:
+    """复用已有视频：复制到本次请求的输出位置"""
+    filepath = new_output_path(output_dir, name, index)
+    shutil.copyfile(source, filepath)
+    return filepath
+
+
+def inflight_job(key: str) -> dict | None:
+    """在任务日志中查找相同请求、仍在生成或待下载的任务"""
+    now = time.time()
+    for job in reversed(list(load_journal().values())):
+        if job.get("key") == key and job["state"] in RESUMABLE_STATES and now - job["created_at"] < INFLIGHT_MAX_AGE:
+            return job
+    return None
+
+
+def history_key(model: str, size: str, seconds: str) -> str:
+    return f"{model}|{size}|{seconds}"
+
+
+def load_history() -> dict:
+    try:
+        with open(HISTORY_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def expected_duration(model: str, size: str, seconds: str) -> float:
+    """按本地历史记录（同模型、尺寸、时长）的中位数预估生成耗时"""
+    durations = load_history().get(history_key(model, size, seconds))
+    return statistics.median(durations) if durations else DEFAULT_EXPECTED_SECONDS
+
+
+def record_duration(model: str, size: str, seconds: str, duration: float) -> None:
+    """记录一次成功生成的耗时"""
+    history = load_history()
+    key = history_key(model, size, seconds)
+    history[key] = (history.get(key, []) + [round(duration, 1)])[-HISTORY_SIZE:]
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = HISTORY_PATH.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(history, indent=2), encoding="utf-8")
+        os.replace(tmp, HISTORY_PATH)
+    except OSError as e:
+        print(f"[Warning] Failed to save generation history: {e}")
+
+
+def poll_schedule(model: str, size: str, seconds: str) -> "PollSchedule":
+    """按历史记录建立轮询节奏；没有历史时用默认预估并限制最大间隔，避免短任务完成后迟迟发现"""
+    if load_history().get(history_key(model, size, seconds)):
+        return PollSchedule(expected_duration(model, size, seconds))
+    return PollSchedule(DEFAULT_EXPECTED_SECONDS, max_interval=NO_HISTORY_MAX_INTERVAL)
+
+
+def generation_seconds(data: dict, detected: float) -> float:
+    """服务端记录的生成耗时（completed_at - created_at）；缺少时间戳时用检测到完成的耗时（含轮询延迟）"""
+    created, completed = data.get("created_at"), data.get("completed_at")
+    if isinstance(created, (int, float)) and isinstance(completed, (int, float)) and completed >= created:
+        return float(completed - created)
+    return detected
+
+
+class PollSchedule:
+    """单个任务的轮询节奏：离预计完成时间越远查询越稀疏，临近时加密，超时后逐渐放缓
+
+    预计完成时间来自历史记录；接口返回 progress 时按进度线性外推。
+    请求失败时按指数退避并加随机抖动，且不早于服务端要求的 Retry-After。
+    """
+
+    def __init__(self, expected: float, min_interval: float = MIN_POLL_INTERVAL, max_interval: float = MAX_POLL_INTERVAL):
+        self.expected = expected
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.failures = 0
+
+    def next_delay(self, elapsed: float, data: dict | None, retry_after: float | None = None) -> float:
+        """根据本次查询结果计算距下次查询的秒数"""
+        if data is None:
+            self.failures += 1
+            backoff = min(self.max_interval * 2, self.min_interval * 2 ** self.failures)
+            delay = backoff * random.uniform(0.5, 1.5)
+        else:
+            self.failures = 0
+            expected = self.expected
+            progress = data.get("progress")
+            if isinstance(progress, (int, float)) and 0 < progress < 100 and elapsed > 0:
+                expected = elapsed * 100 / progress
+            remaining = expected - elapsed
+            # 未到预计时间时每次缩短一半距离；超过后按超出时间的 1/4 放缓
+            delay = remaining / 2 if remaining > 0 else -remaining / 4
+            delay = min(max(delay, self.min_interval), self.max_interval)
+            delay *= random.uniform(0.9, 1.1)  # 避免批量任务同时查询
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class GenerationFailed(Exception):
+    """服务端报告任务失败（与网络错误、超时不同，继续等待也不会完成）"""
+
+
+def is_finished(data: dict) -> bool:
+    """任务完成返回 True，失败时抛出 GenerationFailed"""
+    status = data.get("status", "").lower()
+    if status in DONE_STATUSES:
+        return True
+    if status in FAILED_STATUSES:
+        error = data.get("error", {})
+        error_msg = error if isinstance(error, str) else str(error)
+        raise GenerationFailed(f"Video generation failed: {error_msg}")
+    return False
+
+
+def wait_for_completion(
+    api_key: str,
+    video_id: str,
+    max_wait: int = 1200,
+    poll_interval: int | None = None,
+    schedule: PollSchedule | None = None,
+    session: requests.Session | None = None,
+) -> None:
+    """轮询等待视频生成完成
+
+    poll_interval 已弃用：传入时按固定间隔轮询，否则使用 schedule（默认按预计时间自适应）。
+    需要生成耗时请用 wait_for_generation。
+    """
+    if poll_interval is not None:
+        warnings.warn(
+            "poll_interval is deprecated, pass a PollSchedule instead", DeprecationWarning, stacklevel=2
+        )
+        schedule = PollSchedule(DEFAULT_EXPECTED_SECONDS, min_interval=poll_interval, max_interval=poll_interval)
+    wait_for_generation(api_key, video_id, max_wait, schedule, session)
+
+
+def wait_for_generation(
+    api_key: str,
+    video_id: str,
+    max_wait: int = 1200,
+    schedule: PollSchedule | None = None,
+    session: requests.Session | None = None,
+) -> float:
+    """轮询等待视频生成完成，返回生成耗时（秒，优先使用服务端时间戳）"""
+    schedule = schedule or PollSchedule(DEFAULT_EXPECTED_SECONDS)
     start_time = time.time()
     last_status = ""
+    polls = 0
 
+    # 刚创建的任务不会立即完成，先按预计时间等待第一次查询
+    time.sleep(schedule.next_delay(0.0, {}))
     while time.time() - start_time < max_wait:
-        response = requests.get(f"{BASE_URL}/videos/{video_id}", headers=headers)
+        data, retry_after = get_video_status(api_key, video_id, session)
+        polls += 1
+        elapsed = time.time() - start_time
 
+        if data is not None:
+            status = data.get("status", "").lower()
+            if status != last_status:
+                progress = data.get("progress")
+                suffix = f", {progress}%" if isinstance(progress, (int, float)) else ""
+                print(f"[Status] {status} ({int(elapsed)}s elapsed{suffix})")
+                last_status = status
+
+            if is_finished(data):
+                print(f"[Status] Detected completion after {polls} status checks")
+                return generation_seconds(data, elapsed)
+
+        delay = schedule.next_delay(elapsed, data, retry_after)
+        time.sleep(max(0.0, min(delay, max_wait - elapsed)))
+
+    raise Exception(f"Video generation timed out ({max_wait // 60} minutes)")
+
+
+class DownloadChanged(Exception):
+    """续传时服务端返回了完整内容（不支持 Range 或文件已变化），需要从头下载"""
+
+
+class DownloadCorrupt(Exception):
+    """下载完成的文件大小或 MD5 校验失败，已下载的内容不能续传"""
+
+
+def _declared_md5(response_headers, partial: bool) -> str | None:
+    """服务端明确声明的整个文件的 MD5（base64），没有时返回 None
+
+    x-goog-hash 的 md5 对应整个对象；Content-MD5 只在完整响应中对应整个文件。
+    ETag 即使形如 MD5 也不使用：CDN 和分块上传的对象存储的 ETag 并不是内容的 MD5。
+    """
+    for item in (response_headers.get("x-goog-hash") or "").split(","):
+        name, _, value = item.strip().partition("=")
+        if name == "md5" and value:
+            return value.strip()
+    if not partial and response_headers.get("Content-MD5"):
+        return response_headers["Content-MD5"].strip()
+    return None
+
+
+def _entity_md5(http, url: str, headers: dict, response_headers, partial: bool) -> str | None:
+    """整个文件的 MD5（base64，与 Content-MD5 格式相同），取不到时返回 None
+
+    206 响应中的 Content-MD5 只对应返回的区间，此时改用 HEAD 响应中声明的 MD5。
+    """
+    md5 = _declared_md5(response_headers, partial)
+    if md5 or not partial:
+        return md5
+    try:
+        response = http.head(url, headers=headers, timeout=30)
+    except requests.RequestException:
+        return None
+    return _declared_md5(response.headers, partial=False) if response.status_code == 200 else None
+
+
+def _probe_download(http, url: str, headers: dict) -> dict:
+    """请求第一个字节，获取文件大小、ETag、整个文件的 MD5 以及是否支持 Range"""
+    with http.get(url, headers={**headers, "Range": "bytes=0-0"}, stream=True, timeout=60) as response:
+        if response.status_code == 206:
+            total = response.headers.get("Content-Range", "").rpartition("/")[2]
+            return {
+                "length": int(total) if total.isdigit() else None,
+                "etag": response.headers.get("ETag"),
+                "md5": _entity_md5(http, url, headers, response.headers, partial=True),
+                "ranges": True,
+            }
+        if response.status_code == 200:
+            length = response.headers.get("Content-Length")
+            return {
+                "length": int(length) if length and length.isdigit() else None,
+                "md5": _entity_md5(http, url, headers, response.headers, partial=False),
+                "ranges": False,
+            }
+        raise Exception(f"Download failed with status {response.status_code}")
+
+
+def _fetch_range(http, url: str, headers: dict, path: Path, start: int, end: int, etag: str | None) -> None:
+    """下载字节区间 [start, end] 到 path，path 中已有的内容视为已下载的前缀"""
+    done = path.stat().st_size if path.exists() else 0
+    if start + done > end:
+        return
+    range_headers = {**headers, "Range": f"bytes={start + done}-{end}"}
+    if etag:
+        range_headers["If-Range"] = etag
+    with http.get(url, headers=range_headers, stream=True, timeout=60) as response:
+        if response.status_code == 200:
+            raise DownloadChanged(f"Server ignored range request for {path.name}")
+        if response.status_code != 206:
+            raise Exception(f"Download failed with status {response.status_code}")
+        with open(path, "ab") as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+
+
+def _fetch_full(http, url: str, headers: dict, path: Path) -> str | None:
+    """不支持 Range 时完整下载到 path，返回响应中声明的 MD5（如有）"""
+    with http.get(url, headers=headers, stream=True, timeout=60) as response:
         if response.status_code != 200:
-            print(f"[Warning] Failed to get status: {response.text}")
-            time.sleep(poll_interval)
-            continue
+            raise Exception(f"Download failed with status {response.status_code}")
+        with open(path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+        return _declared_md5(response.headers, partial=False)
 
-        data = response.json()
-        status = data.get("status", "").lower()
-        elapsed = int(time.time() - start_time)
 
-        if status != last_status:
-            print(f"[Status] {status} ({elapsed}s elapsed)")
-            last_status = status
+def _segment_count(meta: dict, parts: int) -> int:
+    """按 meta 分段并行下载时的段数，不分段时为 0"""
+    length = meta["length"]
+    if not meta["ranges"] or not length or parts <= 1 or length < PARALLEL_MIN_BYTES:
+        return 0
+    step = -(-length // parts)
+    return -(-length // step)
 
-        if status in ("completed", "done", "success"):
-            return
 
-        if status in ("failed", "error"):
-            error = data.get("error", {})
-            error_msg = error if isinstance(error, str) else str(error)
-            raise Exception(f"Video generation failed: {error_msg}")
+def _download_part(http, url: str, headers: dict, part: Path, meta: dict, parts: int) -> str | None:
+    """按 meta 把内容下载到 part 文件，返回需要校验的整个文件的 MD5（如有）"""
+    length = meta["length"]
+    if not meta["ranges"] or not length:
+        return _fetch_full(http, url, headers, part) or meta.get("md5")
+    if not _segment_count(meta, parts):
+        _fetch_range(http, url, headers, part, 0, length - 1, meta.get("etag"))
+        return meta.get("md5")
+
+    # 分段并行：每段写入各自的文件，中断后按各段已有大小续传，全部完成后拼接
+    step = -(-length // parts)
+    ranges = [(i, start, min(start + step, length) - 1) for i, start in enumerate(range(0, length, step))]
+    segment_paths = [part.with_name(f"{part.name}.{i}") for i, _, _ in ranges]
+    with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [
+            pool.submit(_fetch_range, http, url, headers, segment_paths[i], start, end, meta.get("etag"))
+            for i, start, end in ranges
+        ]
+        for future in futures:
+            future.result()
+    with open(part, "wb") as out:
+        for segment in segment_paths:
+            with open(segment, "rb") as f:
+                shutil.copyfileobj(f, out, DOWNLOAD_CHUNK_SIZE)
+    for segment in segment_paths:
+        segment.unlink()
+    return meta.get("md5")
+
+
+def _verify_download(path: Path, length: int | None, content_md5: str | None) -> None:
+    """校验下载文件的大小和 MD5（服务端提供时）"""
+    size = path.stat().st_size
+    if length is not None and size != length:
+        raise DownloadCorrupt(f"Downloaded size mismatch: {size} != {length} bytes")
+    if content_md5:
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+                md5.update(chunk)
+        if base64.b64encode(md5.digest()).decode() != content_md5.strip():
+            raise DownloadCorrupt("Downloaded file failed MD5 check")
+
 
-        time.sleep(poll_interval)
+def _clear_partial(part: Path) -> None:
+    """删除未完成的下载（.part 以及 .part.* 分段文件和元数据）"""
+    if not part.parent.exists():
+        return
+    for path in part.parent.iterdir():
+        if path == part or path.name.startswith(part.name + "."):
+            path.unlink()
 
-    raise Exception("Video generation timed out (20 minutes)")
 
+def download_video(
+    api_key: str,
+    video_id: str,
+    output_path: str,
+    session: requests.Session | None = None,
+    parts: int = DOWNLOAD_PARTS,
+) -> None:
+    """下载生成的视频
 
-def download_video(api_key: str, video_id: str, output_path: str) -> None:
-    """下载生成的视频"""
+    先写入 output_path.part，校验大小后原子重命名，不会留下不完整的 MP4。
+    中断后再次调用会通过 Range 从断点续传；服务端支持 Range 且文件较大时分 parts 段并行下载。
+    """
+    http = session or requests
+    url = f"{BASE_URL}/videos/{video_id}/content"
     headers = {"Authorization": f"Bearer {api_key}"}
-    response = requests.get(f"{BASE_URL}/videos/{video_id}/content", headers=headers, stream=True, allow_redirects=True)
+    output = Path(output_path)
+    part = output.with_name(output.name + ".part")
+    meta_path = output.with_name(output.name + ".part.json")
 
-    if response.status_code != 200:
-        raise Exception(f"Download failed with status {response.status_code}")
+    for attempt in range(DOWNLOAD_RETRIES):
+        try:
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                _clear_partial(part)
+                meta = _probe_download(http, url, headers)
+            # 分段方式变化后，旧的分段文件与新的区间对不上，不能续传
+            segments = _segment_count(meta, parts)
+            if meta.get("segments") != segments:
+                _clear_partial(part)
+                meta["segments"] = segments
+                meta_path.write_text(json.dumps(meta), encoding="utf-8")
+            content_md5 = _download_part(http, url, headers, part, meta, parts)
+            _verify_download(part, meta["length"], content_md5)
+            os.replace(part, output)
+            _clear_partial(part)
+            return
+        except DownloadChanged as e:
+            print(f"[Download] {e}, restarting")
+            _clear_partial(part)
+        except Exception as e:
+            # 校验失败的文件无法续传；网络错误和 HTTP 错误保留已下载部分
+            if isinstance(e, DownloadCorrupt):
+                _clear_partial(part)
+            if attempt == DOWNLOAD_RETRIES - 1:
+                raise
+            print(f"[Download] {e}, retrying ({attempt + 1}/{DOWNLOAD_RETRIES - 1})")
+            time.sleep(2**attempt)
+    raise Exception(f"Download of {video_id} failed after {DOWNLOAD_RETRIES} attempts")
+
+
+class StatusPoller:
+    """单个轮询循环：按每个任务各自的 PollSchedule 安排查询，完成即唤醒对应的等待者"""
+
+    def __init__(self, api_key: str, session: requests.Session, max_wait: int = 1200):
+        self.api_key = api_key
+        self.session = session
+        self.max_wait = max_wait
+        # video_id -> [future, start, last status, schedule, deadline]
+        self.waiting: dict[str, list] = {}
+        self.due: list[tuple[float, str]] = []  # (下次查询时间, video_id) 的小顶堆
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+    async def wait(self, video_id: str, schedule: PollSchedule, started: float | None = None) -> float:
+        """等待任务完成并返回生成耗时（优先使用服务端时间戳；失败或超时抛出异常）
+
+        started 为任务的创建时间（resume 时传入），此时立即查询一次；超时从本次等待开始计算。
+        """
+        future = asyncio.get_running_loop().create_future()
+        now = time.time()
+        self.waiting[video_id] = [future, started or now, "", schedule, now + self.max_wait]
+        first = now if started else now + schedule.next_delay(0.0, {})
+        heapq.heappush(self.due, (first, video_id))
+        self.wakeup.set()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        return await future
+
+    async def _poll_one(self, video_id: str) -> None:
+        entry = self.waiting[video_id]
+        future, start, last_status, schedule, deadline = entry
+        try:
+            data, retry_after = await asyncio.to_thread(get_video_status, self.api_key, video_id, self.session)
+            elapsed = time.time() - start
+            if data is not None:
+                status = data.get("status", "").lower()
+                if status != last_status:
+                    progress = data.get("progress")
+                    suffix = f", {progress}%" if isinstance(progress, (int, float)) else ""
+                    print(f"[Status] {video_id}: {status} ({int(elapsed)}s elapsed{suffix})")
+                    entry[2] = status
+                if is_finished(data):
+                    del self.waiting[video_id]
+                    future.set_result(generation_seconds(data, elapsed))
+                    return
+            if time.time() >= deadline:
+                raise Exception(f"Video generation timed out ({self.max_wait // 60} minutes)")
+            delay = min(schedule.next_delay(elapsed, data, retry_after), deadline - time.time())
+            heapq.heappush(self.due, (time.time() + max(0.0, delay), video_id))
+        except Exception as e:
+            self.waiting.pop(video_id, None)
+            if not future.done():
+                future.set_exception(e)
+
+    async def _run(self) -> None:
+        while self.waiting:
+            now = time.time()
+            ready = []
+            while self.due and self.due[0][0] <= now:
+                ready.append(heapq.heappop(self.due)[1])
+            if ready:
+                results = await asyncio.gather(
+                    *(self._poll_one(video_id) for video_id in ready), return_exceptions=True
+                )
+                # 单个查询出错只结束对应的任务，不能让整个轮询循环退出
+                for video_id, result in zip(ready, results):
+                    if isinstance(result, BaseException):
+                        entry = self.waiting.pop(video_id, None)
+                        if entry and not entry[0].done():
+                            entry[0].set_exception(result)
+                continue
+            # 睡到最早的下次查询时间，新任务加入时提前醒来
+            self.wakeup.clear()
+            timeout = self.due[0][0] - now if self.due else None
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+def load_jobs(path: str, defaults: dict) -> list[dict]:
+    """读取 JSONL 任务文件，每行一个任务，缺省字段使用命令行参数的值"""
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            job = json.loads(line)
+            if not job.get("prompt"):
+                raise ValueError(f"{path}:{line_no}: job has no prompt")
+            jobs.append({**defaults, **job})
+    return jobs
+
+
+async def run_job(
+    index: int,
+    job: dict,
+    api_key: str,
+    session: requests.Session,
+    poller: StatusPoller,
+    limit: asyncio.Semaphore,
+    shared: dict[str, tuple[int, asyncio.Future]],
+    force: bool = False,
+) -> dict:
+    """提交、等待并下载一个任务，返回结果摘要
 
-    with open(output_path, "wb") as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+    job 带 video_id 时（来自任务日志）跳过提交；相同请求优先复用结果缓存、进行中的任务
+    或同一批次中的相同任务（shared: 缓存键 -> (首个任务序号, 其结果)），force 时总是重新生成。
+    """
+    model_id = MODEL_MAP.get(job["model"], job["model"])
+    size, seconds = str(job["size"]), str(job["seconds"])
+    label = f"[Job {index}]"
+    result = {"index": index, "model": model_id, "prompt": job["prompt"]}
+    video_id = job.get("video_id")
+    resumed = video_id is not None
+    owner = None  # 本任务负责生成时，同批次的相同任务等待这个 future
+    start_time = time.time()
+    try:
+        key = job.get("key") or request_key(model_id, job["prompt"], size, seconds, job.get("image"))
+        if not resumed and not force:
+            cached = cached_result(key)
+            if cached is None and key in shared:
+                first_index, first_result = shared[key]
+                print(f"{label} Same request as job {first_index}, waiting for it")
+                first = await asyncio.shield(first_result)
+                if first["status"] != "ok":
+                    raise Exception(f"Same request as job {first_index}, which failed: {first['error']}")
+                cached = Path(first["output"])
+            if cached is not None:
+                filepath = copy_result(cached, job.get("output_dir"), job.get("name"), index)
+                result.update({"status": "ok", "output": str(filepath), "seconds": 0, "cached": True})
+                print(f"{label} Reused cached video: {filepath}")
+                return result
+            inflight = inflight_job(key)
+            if inflight is not None:
+                video_id, resumed = inflight["video_id"], True
+                job = {**inflight, "output": str(new_output_path(job.get("output_dir"), job.get("name"), index))}
+            owner = asyncio.get_running_loop().create_future()
+            shared[key] = (index, owner)
+
+        async with limit:
+            schedule = poll_schedule(model_id, size, seconds)
+            expected = schedule.expected
+            if resumed:
+                filepath = Path(job["output"])
+                print(f"{label} Attaching to task: {video_id} ({job['state']})")
+            else:
+                upload = await asyncio.to_thread(prepare_image, model_id, job.get("image") or "", size)
+                video_id = await asyncio.to_thread(
+                    create_video_task, api_key, model_id, job["prompt"], size, seconds, session=session, image=upload
+                )
+                filepath = new_output_path(job.get("output_dir"), job.get("name"), index)
+                journal_append(
+                    video_id, "created", model=model_id, prompt=job["prompt"], size=size, seconds=seconds,
+                    image=job.get("image") or None, output=str(filepath), key=key,
+                )
+                print(f"{label} Task created: {video_id} (expected ~{int(expected)}s)")
+            result["video_id"] = video_id
+
+            if job.get("state") != "generated":
+                duration = await poller.wait(video_id, schedule, job.get("created_at"))
+                # 中断期间的时间不代表生成耗时，续接的任务不计入历史
+                if not resumed:
+                    record_duration(model_id, size, seconds, duration)
+                journal_append(video_id, "generated")
+
+            await asyncio.to_thread(download_video, api_key, video_id, str(filepath), session)
+            journal_append(video_id, "downloaded", output=str(filepath))
+            store_result(key, filepath)
+
+        result.update({"status": "ok", "output": str(filepath), "seconds": int(time.time() - start_time)})
+        print(f"{label} Video downloaded: {filepath} ({result['seconds']}s)")
+    except Exception as e:
+        if isinstance(e, GenerationFailed):
+            journal_append(video_id, "failed", error=str(e))
+        result.update({"status": "error", "error": str(e)})
+        print(f"{label} [Error] {e}")
+    finally:
+        if owner is not None:
+            owner.set_result(result)
+    return result
+
+
+async def run_batch(jobs: list[dict], api_key: str, concurrency: int, force: bool = False) -> list[dict]:
+    """并发执行所有任务：最多 concurrency 个任务同时生成，共享一个 HTTP 会话和一个轮询循环"""
+    session = make_session(concurrency)
+    poller = StatusPoller(api_key, session)
+    limit = asyncio.Semaphore(concurrency)
+    shared: dict[str, tuple[int, asyncio.Future]] = {}
+    try:
+        return await asyncio.gather(
+            *(run_job(i, job, api_key, session, poller, limit, shared, force) for i, job in enumerate(jobs, 1))
+        )
+    finally:
+        session.close()
+
+
+def batch_main(args: argparse.Namespace, api_key: str) -> None:
+    """批量模式入口"""
+    defaults = {"model": args.model, "size": args.size, "seconds": args.seconds, "output_dir": args.output_dir}
+    if args.input_image:
+        defaults["image"] = args.input_image
+    jobs = load_jobs(args.batch, defaults)
+
+    print(f"[Batch] {len(jobs)} jobs, concurrency {args.concurrency}")
+    print()
+    start_time = time.time()
+    results = asyncio.run(run_batch(jobs, api_key, args.concurrency, args.force))
+    print_summary(results, int(time.time() - start_time))
+
+
+def print_summary(results: list[dict], total_time: int) -> None:
+    """打印每个任务的结果，有失败时以非零状态退出"""
+    failed = [r for r in results if r["status"] != "ok"]
+    print()
+    print("=" * 50)
+    for r in results:
+        outcome = r.get("output") or r.get("error")
+        print(f"[{r['index']}] {r['status']}: {outcome}")
+    print(f"Completed: {len(results) - len(failed)}/{len(results)}")
+    print(f"Total time: {total_time}s")
+    print("=" * 50)
+    if failed:
+        sys.exit(1)
+
+
+def resume_main(argv: list[str]) -> None:
+    """resume 子命令：续接任务日志中未完成的任务，继续轮询并下载"""
+    parser = argparse.ArgumentParser(
+        prog="video-gen.py resume", description="Resume unfinished video generation tasks from the job journal"
+    )
+    parser.add_argument("video_ids", nargs="*", help="Tasks to resume (default: all unfinished tasks)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Maximum tasks resumed at once (default: 10)")
+    args = parser.parse_args(argv)
+
+    api_key = os.environ.get("MAX_API_KEY")
+    if not api_key:
+        print("Error: Missing MAX_API_KEY environment variable")
+        sys.exit(1)
+
+    journal = load_journal()
+    if args.video_ids:
+        video_ids = list(dict.fromkeys(args.video_ids))  # 同一任务只轮询一次
+        unknown = [video_id for video_id in video_ids if video_id not in journal]
+        if unknown:
+            print(f"Error: Not in job journal: {', '.join(unknown)}")
+            sys.exit(1)
+        jobs = [journal[video_id] for video_id in video_ids]
+    else:
+        jobs = [job for job in journal.values() if job["state"] in RESUMABLE_STATES]
+    for job in [job for job in jobs if job["state"] not in RESUMABLE_STATES]:
+        print(f"[Resume] Skipping {job['video_id']}: {job['state']}")
+    jobs = [job for job in jobs if job["state"] in RESUMABLE_STATES]
+    if not jobs:
+        print("[Resume] No unfinished tasks")
+        return
+
+    print(f"[Resume] {len(jobs)} unfinished tasks")
+    print()
+    start_time = time.time()
+    results = asyncio.run(run_batch(jobs, api_key, args.concurrency))
+    print_summary(results, int(time.time() - start_time))
+
+
+def status_main(argv: list[str]) -> None:
+    """status 子命令：列出任务日志中的任务及其状态、输出文件"""
+    parser = argparse.ArgumentParser(prog="video-gen.py status", description="List tasks in the job journal")
+    parser.add_argument("--limit", type=int, default=20, help="Show the most recent N tasks (default: 20, 0 = all)")
+    args = parser.parse_args(argv)
+
+    jobs = list(load_journal().values())
+    if args.limit > 0:
+        jobs = jobs[-args.limit:]
+    if not jobs:
+        print(f"No tasks in {JOURNAL_PATH}")
+        return
+
+    for job in jobs:
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(job["created_at"]))
+        prompt = job.get("prompt", "")
+        prompt = prompt if len(prompt) <= 40 else prompt[:39] + "…"
+        print(f"{created}  {job['state']:<10} {job['video_id']}  {job.get('model', '')}  {prompt}")
+        if job["state"] == "failed":
+            print(f"    error: {job.get('error')}")
+        else:
+            print(f"    output: {job.get('output')}")
+    pending = sum(job["state"] in RESUMABLE_STATES for job in jobs)
+    if pending:
+        print(f"\n{pending} unfinished tasks, run `video-gen.py resume` to finish them")
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "resume":
+        resume_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        status_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(description="AI Video Generator")
     parser.add_argument("model", nargs="?", default="veo-3.1", help="Model: veo-3.1 / sora-2-pro")
     parser.add_argument("prompt", nargs="?", default="A cat sitting on a windowsill", help="Video description")
@@ -160,6 +1064,17 @@ def main():
     parser.add_argument("seconds", nargs="?", default="8", help="Duration in seconds")
     parser.add_argument("output_dir", nargs="?", default=".", help="Output directory")
     parser.add_argument("input_image", nargs="?", default="", help="Input image path (optional, Sora only)")
+    parser.add_argument(
+        "--batch",
+        help="JSONL file with one job per line (model, prompt, size, seconds, image, output_dir, name); "
+        "missing fields default to the positional arguments",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=10, help="Batch mode: maximum jobs generating at once (default: 10)"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Always create a new task, ignoring cached results and in-flight tasks"
+    )
     args = parser.parse_args()
 
     # 获取 API Key
@@ -168,6 +1083,10 @@ def main():
         print("Error: Missing MAX_API_KEY environment variable")
         sys.exit(1)
 
+    if args.batch:
+        batch_main(args, api_key)
+        return
+
     # 解析模型
     model_id = MODEL_MAP.get(args.model, args.model)
 
@@ -180,47 +1099,73 @@ def main():
         print(f"[Config] Input image: {args.input_image}")
     print()
 
-    temp_image = None
-    image_to_upload = None
+    session = make_session(1)
 
     try:
         # 处理输入图片
-        if args.input_image and model_id in IMAGE_SUPPORTED_MODELS:
-            if not Path(args.input_image).exists():
-                print(f"Error: Input image not found: {args.input_image}")
-                sys.exit(1)
-
-            # 检查是否需要缩放
-            target_size = parse_size(args.size)
-            if target_size:
-                temp_image = resize_image(args.input_image, target_size)
-                image_to_upload = temp_image if temp_image else args.input_image
-            else:
-                image_to_upload = args.input_image
-        elif args.input_image and model_id not in IMAGE_SUPPORTED_MODELS:
-            print(f"[Warning] Model {model_id} does not support image input, ignoring input image")
+        try:
+            upload = prepare_image(model_id, args.input_image, args.size)
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+        # 相同请求：直接复用缓存的视频或进行中的任务
+        key = request_key(model_id, args.prompt, args.size, args.seconds, args.input_image)
+        inflight = None
+        if not args.force:
+            cached = cached_result(key)
+            if cached is not None:
+                filepath = copy_result(cached, args.output_dir)
+                print("[Cache] Same request was generated before, reusing the cached video (--force to regenerate)")
+                print()
+                print("=" * 50)
+                print(f"Video saved: {filepath}")
+                print("=" * 50)
+                return
+            inflight = inflight_job(key)
 
         # Step 1: 创建任务
-        print("[Step 1] Creating video generation task...")
-        video_id = create_video_task(api_key, model_id, args.prompt, args.size, args.seconds, image_to_upload)
-        print(f"[Step 1] Task created: {video_id}")
+        filepath = new_output_path(args.output_dir)
+        if inflight is not None:
+            video_id = inflight["video_id"]
+            print(f"[Step 1] Same request is already in progress, attaching to task: {video_id} (--force to regenerate)")
+        else:
+            print("[Step 1] Creating video generation task...")
+            video_id = create_video_task(
+                api_key, model_id, args.prompt, args.size, args.seconds, session=session, image=upload
+            )
+            journal_append(
+                video_id, "created", model=model_id, prompt=args.prompt, size=args.size, seconds=args.seconds,
+                image=args.input_image or None, output=str(filepath), key=key,
+            )
+            print(f"[Step 1] Task created: {video_id}")
+            print("[Step 1] If interrupted, run `video-gen.py resume` to continue without regenerating")
         print()
 
         # Step 2: 等待完成
         print("[Step 2] Waiting for video generation...")
         start_time = time.time()
-        wait_for_completion(api_key, video_id)
+        schedule = poll_schedule(model_id, args.size, args.seconds)
+        expected = schedule.expected
+        if inflight is None or inflight["state"] != "generated":
+            print(f"[Step 2] Expected generation time: ~{int(expected)}s")
+            try:
+                duration = wait_for_generation(api_key, video_id, schedule=schedule, session=session)
+            except GenerationFailed as e:
+                journal_append(video_id, "failed", error=str(e))
+                raise
+            # 接续的任务只等待了部分生成时间，不计入历史
+            if inflight is None:
+                record_duration(model_id, args.size, args.seconds, duration)
+            journal_append(video_id, "generated")
         print("[Step 2] Video generation completed!")
         print()
 
         # Step 3: 下载视频
         print("[Step 3] Downloading video...")
-        timestamp = int(time.time() * 1000)
-        filename = f"generated_video_{timestamp}.mp4"
-        output_dir = Path(args.output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)  # 确保目录存在
-        filepath = output_dir / filename
-        download_video(api_key, video_id, str(filepath))
+        download_video(api_key, video_id, str(filepath), session)
+        journal_append(video_id, "downloaded", output=str(filepath))
+        store_result(key, filepath)
 
         file_size_mb = filepath.stat().st_size / (1024 * 1024)
         total_time = int(time.time() - start_time)
@@ -234,10 +1179,7 @@ def main():
         print("=" * 50)
 
     finally:
-        # 清理临时文件
-        if temp_image and Path(temp_image).exists():
-            Path(temp_image).unlink()
-            print(f"[Cleanup] Removed temp file: {temp_image}")
+        session.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,180 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+
+"""
+Benchmark chunked parallel encoding (farm.py) against the single-process path.
+
+Encodes the same range of a source with every requested chunk count
+(``--chunks 1`` is the single-process baseline) and reports wall time,
+speedup, CPU utilisation, output size and frame count, plus PSNR against the
+source with ``--psnr``. A frame count that differs from the baseline means a
+chunk boundary dropped or duplicated frames.
+
+Without ``--source`` a synthetic 1080p30 clip (testsrc2 + sine audio, GOP 250)
+is generated first, so the benchmark runs anywhere ffmpeg does.
+
+Usage:
+    uv run benchmark.py [options]
+
+Examples:
+    uv run benchmark.py
+    uv run benchmark.py --source movie.mp4 --start 60 --end 660 --chunks 1 4 8 16 -o bench.json
+    uv run benchmark.py --duration 300 --preset medium --crf 23 --psnr
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR.parent / "media-probe"))
+from farm import chunked_encode, run  # noqa: E402
+from probe import first_stream, probe  # noqa: E402
+
+
+def make_source(path: str, duration: float, resolution: str) -> None:
+    """Synthetic test clip with regular keyframes and audio."""
+    run([
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=s={resolution}:r=30:d={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:d={duration}",
+        "-c:v", "libx264", "-preset", "veryfast", "-g", "250", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "128k", path,
+    ])
+
+
+def frame_count(path: str) -> int:
+    out = run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0", "-count_packets",
+        "-show_entries", "stream=nb_read_packets", "-of", "csv=p=0", path,
+    ])
+    return int(out.strip() or 0)
+
+
+def psnr(path: str, source: str, start: float, end: float) -> Optional[float]:
+    """Average PSNR (dB) of an encode against the same range of the source, frame by frame."""
+    result = subprocess.run(
+        [
+            "ffmpeg", "-v", "info", "-i", path, "-ss", f"{start:.6f}", "-to", f"{end:.6f}", "-i", source,
+            "-lavfi", "[0:v]settb=AVTB,setpts=N[a];[1:v]settb=AVTB,setpts=N[b];[a][b]psnr", "-f", "null", "-",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    for line in reversed(result.stderr.splitlines()):
+        if "average:" in line:
+            value = line.split("average:")[1].split()[0]
+            return None if value == "inf" else round(float(value), 2)
+    return None
+
+
+def bench(args: argparse.Namespace, source: str, start: float, end: float, workdir: str) -> List[Dict]:
+    video_args = ["-c:v", "libx264", "-preset", args.preset, "-crf", str(args.crf)]
+    audio_args = ["-c:a", "aac", "-b:a", "128k"]
+    results = []
+    for chunks in args.chunks:
+        output = os.path.join(workdir, f"chunks_{chunks}.mp4")
+        cpu_before = os.times()
+        began = time.time()
+        ranges = chunked_encode(source, output, start, end, video_args, audio_args, chunks=chunks)
+        wall = time.time() - began
+        cpu_after = os.times()
+        cpu = (cpu_after.children_user - cpu_before.children_user) + (
+            cpu_after.children_system - cpu_before.children_system
+        )
+        run_result = {
+            "chunks": chunks,
+            "actual_chunks": len(ranges),
+            "wall_seconds": round(wall, 2),
+            "realtime_factor": round((end - start) / wall, 2),
+            "cpu_utilisation": round(cpu / wall / (os.cpu_count() or 1), 2),
+            "size_mb": round(os.path.getsize(output) / (1 << 20), 2),
+            "frames": frame_count(output),
+        }
+        if args.psnr:
+            run_result["psnr_db"] = psnr(output, source, start, end)
+        baseline = results[0] if results else run_result
+        run_result["speedup"] = round(baseline["wall_seconds"] / wall, 2)
+        if run_result["frames"] != baseline["frames"]:
+            run_result["frame_mismatch"] = run_result["frames"] - baseline["frames"]
+        results.append(run_result)
+        extra = f", PSNR {run_result['psnr_db']} dB" if args.psnr else ""
+        print(
+            f"  chunks={chunks} ({len(ranges)} used): {run_result['wall_seconds']}s, x{run_result['speedup']},"
+            f" CPU {run_result['cpu_utilisation']:.0%}, {run_result['size_mb']} MB, {run_result['frames']} frames{extra}"
+        )
+        os.remove(output)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    """Current git commit of this checkout, if any."""
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunked parallel encoding against a single process")
+    parser.add_argument("--source", help="Video to encode (default: generate a synthetic clip)")
+    parser.add_argument("--start", type=float, default=0.0, help="Range start in seconds (default: 0)")
+    parser.add_argument("--end", type=float, help="Range end in seconds (default: end of source)")
+    parser.add_argument("--duration", type=float, default=120.0, help="Synthetic clip length (default: 120)")
+    parser.add_argument("--resolution", default="1920x1080", help="Synthetic clip size (default: 1920x1080)")
+    parser.add_argument(
+        "--chunks", type=int, nargs="+", default=[1, 2, 4, 8], help="Chunk counts to compare (default: 1 2 4 8)"
+    )
+    parser.add_argument("--crf", type=int, default=23, help="x264 CRF (default: 23)")
+    parser.add_argument("--preset", default="veryfast", help="x264 preset (default: veryfast)")
+    parser.add_argument("--psnr", action="store_true", help="Also measure PSNR against the source (slow)")
+    parser.add_argument("--output", "-o", default="encode_farm_bench.json", help="Result JSON path")
+    args = parser.parse_args()
+    if args.chunks[0] != 1:
+        args.chunks.insert(0, 1)  # the single-process baseline comes first
+
+    with tempfile.TemporaryDirectory(prefix="encode-farm-bench-") as workdir:
+        source = args.source
+        if source is None:
+            source = os.path.join(workdir, "source.mp4")
+            print(f"[source] generating {args.duration:.0f}s {args.resolution} test clip")
+            make_source(source, args.duration, args.resolution)
+        info = probe(source, keyframes=True)
+        video = first_stream(info, "video") or {}
+        end = args.end or float(info["format"]["duration"])
+        print(
+            f"[encode] {source}: {args.start:.1f}s -> {end:.1f}s, {video.get('width')}x{video.get('height')},"
+            f" {len(info.get('keyframes', []))} keyframes, libx264 {args.preset} CRF {args.crf}"
+        )
+        runs = bench(args, source, args.start, end, workdir)
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "system": platform.system(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "options": vars(args),
+        "runs": runs,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Chunked parallel encoding: split a time range at keyframes, encode the chunks
+in separate ffmpeg processes with identical settings, and join them losslessly.
+
+A single x264/x265 process stops scaling well past a handful of cores, so on
+many-core machines long re-encodes leave most of the CPU idle. Here the range
+is cut into N chunks whose boundaries sit on source keyframes (from the
+cached media-probe keyframe index), so no worker decodes frames it throws
+away. Each chunk covers exactly the frames between its boundaries: ffmpeg's
+accurate input seek keeps frames at or after ``-ss`` and input ``-to`` drops
+frames at or after the next boundary, so consecutive chunks partition the
+frames with no gaps or duplicates. The encoded chunks are stream-copied
+together with the concat demuxer, and the audio is cut once from the source
+and muxed back, so it has no chunk seams at all.
+
+Used by trim.py (``--mode encode``) and video-concat's concat.py.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "media-probe"))
+from probe import first_stream, probe  # noqa: E402
+
+# Chunks shorter than this are not worth the extra process and keyframe
+MIN_CHUNK_SECONDS = 20.0
+
+# Chunk boundaries are placed this far before a keyframe, safely between it
+# and the frame before, so rounding in printed timestamps cannot move a frame
+# across the boundary
+BOUNDARY_MARGIN = 0.001
+
+# Parameter sets in-band before every keyframe, so the chunks still decode
+# after joining even if an encoder writes them differently per chunk
+ANNEXB_FILTERS = {"libx264": "h264_mp4toannexb", "libx265": "hevc_mp4toannexb"}
+
+
+def run(cmd: List[str]) -> str:
+    """Run an ffmpeg command and return stdout, raising with stderr on failure."""
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{cmd[0]} failed: {result.stderr.strip()[-2000:]}")
+    return result.stdout
+
+
+def auto_chunks(duration: float, cpus: Optional[int] = None) -> int:
+    """Default chunk count: one per 8 CPUs (x264 uses ~8 cores well), at least MIN_CHUNK_SECONDS each."""
+    cpus = cpus or os.cpu_count() or 1
+    return max(1, min(cpus // 8, int(duration // MIN_CHUNK_SECONDS)))
+
+
+def plan_chunks(
+    keyframes: Sequence[float], start: float, end: float, chunks: int, min_seconds: float = MIN_CHUNK_SECONDS
+) -> List[Tuple[float, float]]:
+    """Split [start, end) into up to ``chunks`` (start, end) ranges with boundaries at keyframes.
+
+    Each interior boundary is the keyframe nearest an even split, moved
+    BOUNDARY_MARGIN earlier; ranges shorter than ``min_seconds`` are merged
+    away. Without usable keyframes the range is split evenly (still exact,
+    each chunk just decodes from the keyframe before its start).
+    """
+    # The outer ends get the same margin, so a frame exactly at ``end`` is left out
+    first, last = max(0.0, start - BOUNDARY_MARGIN), end - BOUNDARY_MARGIN
+    if chunks <= 1 or end - start < 2 * min_seconds:
+        return [(first, last)]
+    inside = [k for k in keyframes if start + min_seconds <= k <= end - min_seconds]
+    boundaries = [first]
+    for i in range(1, chunks):
+        target = start + (end - start) * i / chunks
+        point = min(inside, key=lambda k: abs(k - target)) - BOUNDARY_MARGIN if inside else target
+        if point - boundaries[-1] >= min_seconds and end - point >= min_seconds:
+            boundaries.append(point)
+    boundaries.append(last)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def encode_chunk(
+    input_path: str, path: str, start: float, end: float, video_args: List[str], threads: int, timescale: List[str]
+) -> str:
+    """Encode the video frames of one range to ``path`` (video only)."""
+    encoder = video_args[video_args.index("-c:v") + 1] if "-c:v" in video_args else ""
+    bsf = ["-bsf:v", ANNEXB_FILTERS[encoder]] if encoder in ANNEXB_FILTERS else []
+    run([
+        "ffmpeg", "-v", "error", "-y", "-ss", f"{start:.6f}", "-to", f"{end:.6f}", "-i", input_path,
+        "-map", "0:v:0", "-an", "-sn", "-dn", *video_args, *bsf, "-threads", str(threads),
+        "-fps_mode", "passthrough", *timescale, path,
+    ])
+    return path
+
+
+def chunked_encode(
+    input_path: str,
+    output: str,
+    start: float,
+    end: float,
+    video_args: List[str],
+    audio_args: List[str],
+    output_args: Sequence[str] = (),
+    chunks: int = 0,
+    jobs: Optional[int] = None,
+    cpus: Optional[int] = None,
+) -> List[Tuple[float, float]]:
+    """Re-encode [start, end) of a file, splitting the video into chunks encoded in parallel.
+
+    Args:
+        input_path: Source file.
+        output: Output file.
+        start: Start time in seconds.
+        end: End time in seconds.
+        video_args: Encoder (and filter) options applied identically to every
+            chunk, e.g. ``["-c:v", "libx264", "-crf", "23"]``. Filters must
+            not depend on earlier frames (scale/pad/fps are fine).
+        audio_args: Options for the first audio track, cut from the source in
+            one piece, e.g. ``["-c:a", "aac", "-b:a", "128k"]`` or ``["-an"]``.
+        output_args: Extra muxer options for the output (e.g. ``-movflags``).
+        chunks: Number of chunks; 0 picks auto_chunks(), 1 is a single process.
+        jobs: Chunks encoded at the same time (default: all of them).
+        cpus: CPUs this call may use, split between the chunk processes
+            (default: all of them). Callers that run several encodes at once
+            pass their share, so jobs x threads stays within the machine.
+
+    Returns:
+        The (start, end) range of every chunk.
+    """
+    cpus = cpus or os.cpu_count() or 1
+    chunks = chunks or auto_chunks(end - start, cpus)
+    # The keyframe scan reads every packet, so it is skipped for a single process
+    info = probe(input_path, keyframes=chunks > 1)
+    ranges = plan_chunks(info.get("keyframes", []), start, end, chunks)
+    # MP4 chunks in the source's time base keep timestamps exact through the join
+    time_base = (first_stream(info, "video") or {}).get("time_base", "")
+    timescale = ["-video_track_timescale", time_base.split("/")[1]] if "/" in time_base else []
+    jobs = max(1, min(jobs or len(ranges), len(ranges)))
+    threads = max(1, cpus // jobs)
+    audio_map = ["-map", "1:a:0?"] if "-an" not in audio_args else []
+
+    with tempfile.TemporaryDirectory(prefix="encode-farm-") as workdir:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = [
+                pool.submit(
+                    encode_chunk, input_path, os.path.join(workdir, f"{i:03d}.mp4"), lo, hi, video_args, threads, timescale
+                )
+                for i, (lo, hi) in enumerate(ranges)
+            ]
+            paths = [future.result() for future in futures]
+        list_path = os.path.join(workdir, "chunks.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            f.writelines(f"file '{path}'\n" for path in paths)
+        run([
+            "ffmpeg", "-v", "error", "-y",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-ss", f"{start:.6f}", "-to", f"{end:.6f}", "-i", input_path,
+            "-map", "0:v:0", *audio_map, "-c:v", "copy", *audio_args,
+            "-map_metadata", "1", *output_args, output,
+        ])
+    return ranges
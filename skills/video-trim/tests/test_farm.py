@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from farm import BOUNDARY_MARGIN, auto_chunks, plan_chunks  # noqa: E402
+
+KEYFRAMES = [i * 2.0 for i in range(61)]  # every 2 s over 120 s
+
+
+def test_single_chunk_keeps_margins():
+    assert plan_chunks(KEYFRAMES, 10.0, 50.0, 1) == [(10.0 - BOUNDARY_MARGIN, 50.0 - BOUNDARY_MARGIN)]
+    assert plan_chunks(KEYFRAMES, 0.0, 50.0, 1)[0][0] == 0.0
+
+
+def test_boundaries_sit_just_before_keyframes():
+    ranges = plan_chunks(KEYFRAMES, 0.0, 120.0, 4)
+    assert len(ranges) == 4
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    for _, end in ranges[:-1]:
+        assert end + BOUNDARY_MARGIN in KEYFRAMES
+    assert ranges[-1][1] == pytest.approx(120.0 - BOUNDARY_MARGIN)
+
+
+def test_short_chunks_are_merged():
+    # 60 s cannot hold four chunks of at least 20 s
+    ranges = plan_chunks(KEYFRAMES, 0.0, 60.0, 4)
+    assert len(ranges) == 2
+    assert all(end - start >= 20.0 - 2 * BOUNDARY_MARGIN for start, end in ranges)
+    assert plan_chunks(KEYFRAMES, 0.0, 30.0, 4) == [(0.0, 30.0 - BOUNDARY_MARGIN)]
+
+
+def test_even_split_without_keyframes():
+    ranges = plan_chunks([], 0.0, 90.0, 3)
+    assert [round(end, 3) for _, end in ranges] == [30.0, 60.0, 89.999]
+
+
+def test_auto_chunks():
+    assert auto_chunks(600.0, cpus=4) == 1
+    assert auto_chunks(600.0, cpus=64) == 8
+    assert auto_chunks(45.0, cpus=64) == 2
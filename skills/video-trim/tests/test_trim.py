@@ -0,0 +1,85 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from trim import Piece, open_gop, plan_smart_cut, smart_trim  # noqa: E402
+
+
+def packets(seconds: float = 10.0, fps: int = 30, gop: int = 60):
+    """(pts, is_keyframe) of a constant frame rate stream with a keyframe every ``gop`` frames."""
+    return [(i / fps, i % gop == 0) for i in range(int(seconds * fps))]
+
+
+def test_partial_gops_are_encoded_and_the_middle_copied():
+    pieces = plan_smart_cut(packets(), 1.0, 7.0)
+    assert [p.mode for p in pieces] == ["encode", "copy", "encode"]
+    assert (pieces[0].start, pieces[0].end) == (1.0, 2.0)
+    assert (pieces[1].start, pieces[1].end) == (2.0, 6.0)
+    assert (pieces[2].start, pieces[2].end) == (6.0, 7.0)
+    assert sum(p.frames for p in pieces) == 180
+
+
+def test_start_on_a_keyframe_needs_no_head():
+    assert plan_smart_cut(packets(), 2.0, 7.0) == [Piece("copy", 2.0, 6.0, 120), Piece("encode", 6.0, 7.0, 30)]
+
+
+def test_copy_through_end_of_file():
+    pieces = plan_smart_cut(packets(), 3.0, 20.0)
+    assert [p.mode for p in pieces] == ["encode", "copy"]
+    assert pieces[-1] == Piece("copy", 4.0, 20.0, None)
+
+
+def test_range_inside_one_gop_is_encoded():
+    assert plan_smart_cut(packets(), 2.5, 3.5) == [Piece("encode", 2.5, 3.5, 30)]
+
+
+def test_empty_range():
+    with pytest.raises(ValueError):
+        plan_smart_cut(packets(), 11.0, 12.0)
+
+
+def test_open_gop():
+    # Decode order: keyframe, then a P frame, then B frames shown between them
+    closed = [(2.0, True), (2.12, False), (2.04, False), (2.08, False)]
+    assert not open_gop(closed)
+    # Leading B frames shown before the keyframe reference the previous GOP
+    assert open_gop([(2.0, True), (2.12, False), (1.92, False), (1.96, False)])
+
+
+def packet_times(path: str, stream: str):
+    out = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", stream, "-show_entries", "packet=pts_time,duration_time",
+         "-of", "csv=p=0", path],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return sorted(tuple(map(float, line.split(",")[:2])) for line in out.split())
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+@pytest.mark.parametrize("ext", [".mp4", ".mkv"])
+def test_smart_trim_timestamps(tmp_path, ext, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    source = str(tmp_path / f"source{ext}")
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc2=s=320x180:r=25:d=12",
+         "-f", "lavfi", "-i", "sine=d=12:sample_rate=48000",
+         "-c:v", "libx264", "-bf", "2", "-g", "50", "-pix_fmt", "yuv420p", "-c:a", "aac", source],
+        check=True,
+    )
+    output = str(tmp_path / f"out{ext}")
+    pieces = smart_trim(source, output, 1.3, 9.94)
+    assert [p.mode for p in pieces] == ["encode", "copy", "encode"]
+
+    video = packet_times(output, "v:0")
+    assert len(video) == 216  # frames at 1.32 ... 9.92
+    # One frame interval at every join, no gaps or overlaps
+    assert all(b[0] - a[0] == pytest.approx(0.04, abs=0.002) for a, b in zip(video, video[1:]))
+    audio = packet_times(output, "a:0")
+    video_seconds = video[-1][0] + 0.04 - video[0][0]
+    audio_seconds = audio[-1][0] + audio[-1][1] - audio[0][0]
+    assert audio_seconds == pytest.approx(video_seconds, abs=0.05)
+    assert audio[0][0] == pytest.approx(video[0][0], abs=0.05)
@@ -0,0 +1,383 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+
+"""
+Frame-accurate video trimming at close to stream-copy speed (smart cut).
+
+Stream copy can only start on a keyframe; a full re-encode is exact but
+slow. Smart cut probes the keyframes inside the requested range, stream-copies
+the GOP-aligned middle and re-encodes only the partial GOPs before the first
+and after the last keyframe, with the source codec, profile, level and pixel
+format, then joins the pieces with the concat demuxer. Audio is cut
+separately (every audio frame is a keyframe) and muxed back in. Sources
+with open GOPs (HEVC CRA, x264 open-gop) cannot be cut at a keyframe on
+their own, so the whole range is re-encoded for them instead.
+
+Usage:
+    uv run trim.py INPUT START END -o OUTPUT [options]
+
+Examples:
+    uv run trim.py movie.mp4 1:30 3:45 -o clip.mp4
+    uv run trim.py movie.mp4 01:02:03.5 +300 -o clip.mp4 --audio aac --audio-bitrate 256k
+    uv run trim.py movie.mp4 90 225 -o clip.mp4 --mode encode --crf 28
+    uv run trim.py movie.mp4 0 3600 -o small.mp4 --mode encode --crf 28 --chunks 8
+    uv run trim.py movie.mp4 90 225 -o clip.mp4 --mode copy
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "media-probe"))
+from farm import chunked_encode  # noqa: E402
+from probe import first_stream, probe  # noqa: E402
+
+# Source codec -> encoder used for the partial GOPs
+ENCODERS = {
+    "h264": "libx264",
+    "hevc": "libx265",
+    "vp9": "libvpx-vp9",
+    "av1": "libaom-av1",
+    "mpeg4": "mpeg4",
+}
+
+# Puts parameter sets in-band before every keyframe, so pieces encoded with
+# different SPS/PPS (re-encoded edges vs. copied middle) decode after joining
+ANNEXB_FILTERS = {"h264": "h264_mp4toannexb", "hevc": "hevc_mp4toannexb"}
+
+# ffprobe profile names -> encoder -profile:v values
+PROFILES = {
+    "libx264": {
+        "Constrained Baseline": "baseline",
+        "Baseline": "baseline",
+        "Main": "main",
+        "High": "high",
+        "High 10": "high10",
+        "High 4:2:2": "high422",
+        "High 4:4:4 Predictive": "high444",
+    },
+    "libx265": {"Main": "main", "Main 10": "main10", "Main Still Picture": "mainstillpicture"},
+}
+
+# Timestamps from ffprobe are printed with microsecond precision; anything
+# closer than this is treated as the same instant
+EPSILON = 0.001
+
+
+@dataclass
+class Piece:
+    """One part of a smart cut: re-encode or stream-copy ``frames`` frames starting at ``start``."""
+
+    mode: str  # "encode" or "copy"
+    start: float
+    end: float
+    frames: Optional[int]  # None = until the end of the input
+
+
+def parse_time(value: str, start: Optional[float] = None) -> float:
+    """Parse ``HH:MM:SS(.ms)``, ``MM:SS`` or seconds; ``+N`` is a duration after ``start``."""
+    value = value.strip()
+    if value.startswith("+"):
+        if start is None:
+            raise ValueError(f"Relative time {value!r} needs a start time")
+        return start + parse_time(value[1:])
+    seconds = 0.0
+    for part in value.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def run(cmd: List[str]) -> str:
+    """Run an ffmpeg/ffprobe command and return stdout, raising with stderr on failure."""
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{cmd[0]} failed: {result.stderr.strip()[-2000:]}")
+    return result.stdout
+
+
+def video_packets(path: str, start: float, end: float) -> List[Tuple[float, bool]]:
+    """(pts, is_keyframe) of the first video stream's packets around [start, end], in decode order.
+
+    Only the packets in the range are demuxed (no decoding), so this takes
+    well under a second even deep into a long file.
+    """
+    out = run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-read_intervals", f"{max(0.0, start - 1)}%{end + 1}",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path,
+    ])
+    packets = []
+    for line in out.splitlines():
+        pts, _, flags = line.partition(",")
+        if pts and pts != "N/A":
+            packets.append((float(pts), "K" in flags))
+    return packets
+
+
+def open_gop(packets: List[Tuple[float, bool]]) -> bool:
+    """Whether any keyframe is followed, in decode order, by frames shown before it.
+
+    Such leading frames (open GOPs: HEVC CRA, x264 ``open-gop``) reference
+    the previous GOP, so a piece starting at that keyframe cannot be cut on
+    its own.
+    """
+    key_pts = None
+    for pts, key in packets:
+        if key:
+            key_pts = pts
+        elif key_pts is not None and pts < key_pts - EPSILON:
+            return True
+    return False
+
+
+def plan_smart_cut(packets: List[Tuple[float, bool]], start: float, end: float) -> List[Piece]:
+    """Split [start, end) into re-encoded partial GOPs and a stream-copied keyframe-aligned middle."""
+    frames = [(pts, key) for pts, key in packets if start - EPSILON <= pts < end - EPSILON]
+    if not frames:
+        raise ValueError(f"No video frames between {start:.3f}s and {end:.3f}s")
+    keyframes = [pts for pts, key in frames if key]
+    reaches_eof = packets[-1][0] < end - EPSILON
+
+    def count(lo: float, hi: float) -> int:
+        return sum(1 for pts, _ in frames if lo - EPSILON <= pts < hi - EPSILON)
+
+    if keyframes:
+        first_key = keyframes[0]
+        # Copying through EOF needs no closing keyframe; otherwise copy up to the last keyframe
+        last_key = end if reaches_eof else keyframes[-1]
+    if not keyframes or last_key - first_key <= EPSILON:
+        # No whole GOP inside the range: nothing can be copied
+        return [Piece("encode", start, end, len(frames))]
+
+    pieces = []
+    if first_key - start > EPSILON:
+        pieces.append(Piece("encode", start, first_key, count(start, first_key)))
+    if last_key - first_key > EPSILON:
+        pieces.append(Piece("copy", first_key, last_key, None if reaches_eof else count(first_key, last_key)))
+    if not reaches_eof and end - last_key > EPSILON:
+        pieces.append(Piece("encode", last_key, end, count(last_key, end)))
+    return pieces
+
+
+def encoder_args(stream: Dict, crf: int, preset: str) -> List[str]:
+    """Encoder options that reproduce the source stream's codec, profile, level and pixel format."""
+    encoder = ENCODERS.get(stream.get("codec_name", ""))
+    if encoder is None:
+        raise ValueError(
+            f"Smart cut does not support {stream.get('codec_name')} video; use --mode encode or --mode copy"
+        )
+    args = ["-c:v", encoder]
+    if encoder in ("libx264", "libx265"):
+        args += ["-preset", preset, "-crf", str(crf)]
+    elif encoder in ("libvpx-vp9", "libaom-av1"):
+        args += ["-crf", str(crf), "-b:v", "0"]
+    else:
+        args += ["-q:v", "2"]
+    profile = PROFILES.get(encoder, {}).get(stream.get("profile", ""))
+    if profile:
+        args += ["-profile:v", profile]
+    level = stream.get("level")
+    if encoder == "libx264" and isinstance(level, int) and level > 0:
+        args += ["-level:v", f"{level / 10:.1f}"]
+    if stream.get("pix_fmt"):
+        args += ["-pix_fmt", stream["pix_fmt"]]
+    for key, option in (("color_primaries", "-color_primaries"), ("color_transfer", "-color_trc"), ("color_space", "-colorspace")):
+        if stream.get(key) and stream[key] != "unknown":
+            args += [option, stream[key]]
+    return args
+
+
+def audio_args(audio: str, bitrate: str) -> List[str]:
+    if audio == "none":
+        return ["-an"]
+    if audio == "aac":
+        return ["-c:a", "aac", "-b:a", bitrate]
+    return ["-c:a", "copy"]
+
+
+def container_args(output: str, stream: Dict) -> List[str]:
+    """Muxer options for the final file."""
+    args = []
+    if os.path.splitext(output)[1].lower() in (".mp4", ".mov", ".m4v"):
+        args += ["-movflags", "+faststart"]
+        if stream.get("codec_name") == "hevc":
+            args += ["-tag:v", "hvc1"]
+    return args
+
+
+def smart_trim(
+    input_path: str,
+    output: str,
+    start: float,
+    end: float,
+    audio: str = "copy",
+    audio_bitrate: str = "128k",
+    crf: int = 18,
+    preset: str = "medium",
+) -> List[Piece]:
+    """Frame-accurate trim of [start, end) that re-encodes only the partial GOPs at the edges."""
+    info = probe(input_path)
+    video = first_stream(info, "video")
+    if video is None:
+        raise ValueError(f"No video stream in {input_path}")
+    packets = video_packets(input_path, start, end)
+    if open_gop(packets):
+        # -frames:v after a seek to a keyframe assumes closed GOPs
+        print("[Warning] Source uses open GOPs; re-encoding the whole range instead")
+        chunked_encode(
+            input_path, output, start, end, encoder_args(video, crf, preset),
+            audio_args("aac" if audio == "copy" else audio, audio_bitrate), container_args(output, video),
+        )
+        return [Piece("encode", start, end, sum(1 for pts, _ in packets if start - EPSILON <= pts < end - EPSILON))]
+    packets.sort()
+    pieces = plan_smart_cut(packets, start, end)
+    # The concat demuxer places each piece's first frame right after the
+    # previous piece's duration, so durations run from first frame to first frame
+    firsts = [min(pts for pts, _ in packets if pts >= piece.start - EPSILON) for piece in pieces]
+    encode = encoder_args(video, crf, preset)
+    annexb = ANNEXB_FILTERS.get(video["codec_name"])
+    bsf = ["-bsf:v", annexb] if annexb else []
+
+    with tempfile.TemporaryDirectory(prefix="smart-cut-") as workdir:
+        list_path = os.path.join(workdir, "pieces.txt")
+        with open(list_path, "w", encoding="utf-8") as listing:
+            for i, piece in enumerate(pieces):
+                path = os.path.join(workdir, f"{i:02d}_{piece.mode}.mkv")
+                frames = ["-frames:v", str(piece.frames)] if piece.frames is not None else []
+                if piece.mode == "encode":
+                    # Accurate input seek: decodes from the previous keyframe, drops frames before start
+                    cmd = [
+                        "ffmpeg", "-v", "error", "-y", "-ss", f"{piece.start:.6f}", "-i", input_path,
+                        "-map", "0:v:0", "-an", "-sn", "-dn", *frames, *encode, *bsf, "-fps_mode", "passthrough", path,
+                    ]
+                else:
+                    # Seeking just past the keyframe lands on it exactly
+                    cmd = [
+                        "ffmpeg", "-v", "error", "-y", "-ss", f"{piece.start + EPSILON:.6f}", "-i", input_path,
+                        "-map", "0:v:0", "-an", "-sn", "-dn", *frames, "-c:v", "copy", *bsf,
+                        "-avoid_negative_ts", "make_zero", path,
+                    ]
+                run(cmd)
+                listing.write(f"file '{path}'\n")
+                if i + 1 < len(pieces):
+                    # The file's own duration includes its B-frame delay and
+                    # would push every later piece back
+                    listing.write(f"duration {firsts[i + 1] - firsts[i]:.6f}\n")
+
+        run([
+            "ffmpeg", "-v", "error", "-y",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", input_path,
+            "-map", "0:v:0", "-map", "1:a?", "-c:v", "copy", *audio_args(audio, audio_bitrate),
+            # Copied audio starts at the seek point, not at the video keyframe before it
+            "-copypriorss", "0", "-map_metadata", "1", *container_args(output, video), output,
+        ])
+    return pieces
+
+
+def copy_trim(input_path: str, output: str, start: float, end: float, audio: str, audio_bitrate: str) -> None:
+    """Stream-copy trim; the start snaps to the keyframe at or before ``start``."""
+    video = first_stream(probe(input_path), "video") or {}
+    run([
+        "ffmpeg", "-v", "error", "-y", "-ss", f"{start:.6f}", "-to", f"{end:.6f}", "-i", input_path,
+        "-map", "0:v?", "-map", "0:a?", "-c:v", "copy", *audio_args(audio, audio_bitrate),
+        "-avoid_negative_ts", "make_zero", *container_args(output, video), output,
+    ])
+
+
+def encode_trim(
+    input_path: str,
+    output: str,
+    start: float,
+    end: float,
+    audio: str,
+    audio_bitrate: str,
+    crf: int,
+    preset: str,
+    chunks: int = 0,
+) -> List[Tuple[float, float]]:
+    """Frame-accurate trim with a full H.264 re-encode (for compression), in parallel chunks."""
+    return chunked_encode(
+        input_path, output, start, end,
+        ["-c:v", "libx264", "-preset", preset, "-crf", str(crf)],
+        audio_args("aac" if audio == "copy" else audio, audio_bitrate),
+        container_args(output, {}), chunks=chunks,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trim a video segment (frame-accurate smart cut by default)")
+    parser.add_argument("input", help="Input video file")
+    parser.add_argument("start", help="Start time: HH:MM:SS(.ms), MM:SS or seconds")
+    parser.add_argument("end", nargs="?", help="End time, or +DURATION (default: end of file)")
+    parser.add_argument("--output", "-o", help="Output file (default: INPUT_trimmed.EXT)")
+    parser.add_argument(
+        "--mode",
+        choices=["smart", "copy", "encode"],
+        default="smart",
+        help="smart: frame-accurate, re-encodes only the edge GOPs (default); "
+        "copy: stream copy, start snaps to a keyframe; encode: full re-encode with --crf",
+    )
+    parser.add_argument("--crf", type=int, help="CRF for re-encoded video (default: 18 for smart, 23 for encode)")
+    parser.add_argument("--preset", default="medium", help="x264/x265 preset (default: medium)")
+    parser.add_argument(
+        "--audio", choices=["copy", "aac", "none"], default="copy", help="Audio handling (default: copy)"
+    )
+    parser.add_argument("--audio-bitrate", default="128k", help="AAC bitrate with --audio aac (default: 128k)")
+    parser.add_argument(
+        "--chunks",
+        type=int,
+        default=0,
+        help="--mode encode: split at keyframes into N chunks encoded in parallel (default: 0 = auto, 1 = single process)",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error: Input file not found: {args.input}")
+        sys.exit(1)
+    start = parse_time(args.start)
+    if args.end:
+        end = parse_time(args.end, start)
+    else:
+        end = float(probe(args.input)["format"]["duration"])
+    if end <= start:
+        print(f"Error: End time ({end:.3f}s) must be after start time ({start:.3f}s)")
+        sys.exit(1)
+    output = args.output or "{0}_trimmed{1}".format(*os.path.splitext(args.input))
+
+    print(f"[Trim] {args.input}: {start:.3f}s -> {end:.3f}s ({end - start:.3f}s), mode {args.mode}")
+    began = time.time()
+    try:
+        if args.mode == "smart":
+            pieces = smart_trim(
+                args.input, output, start, end, args.audio, args.audio_bitrate,
+                18 if args.crf is None else args.crf, args.preset,
+            )
+            for piece in pieces:
+                print(f"[Plan] {piece.mode:<6} {piece.start:.3f}s -> {piece.end:.3f}s ({piece.end - piece.start:.3f}s)")
+        elif args.mode == "copy":
+            copy_trim(args.input, output, start, end, args.audio, args.audio_bitrate)
+        else:
+            ranges = encode_trim(
+                args.input, output, start, end, args.audio, args.audio_bitrate,
+                23 if args.crf is None else args.crf, args.preset, args.chunks,
+            )
+            print(f"[Plan] encoded in {len(ranges)} parallel chunk(s)")
+    except (RuntimeError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    size_mb = os.path.getsize(output) / (1024 * 1024)
+    print(f"[Done] {output} ({size_mb:.1f} MB) in {time.time() - began:.1f}s")
+
+
+if __name__ == "__main__":
+    main()